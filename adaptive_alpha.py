@@ -0,0 +1,67 @@
+import numpy
+
+#Adaptive Alpha Sequence
+#Replaces the fixed ASEQ sweep: march up from alpha_start with a coarse step, switch to the
+#fine step once the lift curve starts to bend over, stop once cl has stopped rising for
+#stall_points points in a row, then fill in the fine step around the coarse cl max, L/D max and cd min
+#solve_points(alphas, init) runs the angles in the order given and returns the converged
+#(alpha, cl, cd, cdp, cm) rows, each angle warm started from the one before it unless init
+#Tolerance against the fixed sweep with the same alpha_step: cl max, L/D max and AoA margin
+#land on the same alpha_step grid points as long as each is within coarse_step of its coarse
+#estimate, cd min is searched the same way, cm min is only taken from the points before
+#the stall cut (the fixed sweep also sees the post stall points)
+
+#==============================================================================================#
+#Functions
+
+def fine_grid(alpha_start, alpha_end, alpha_step, low, high):
+    k_low = int(numpy.ceil((max(low, alpha_start) - alpha_start)/alpha_step - 1e-9))
+    k_high = int(numpy.floor((min(high, alpha_end) - alpha_start)/alpha_step + 1e-9))
+    return [round(alpha_start + k*alpha_step, 6) for k in range(k_low, k_high + 1)]
+
+#---Adaptive Sweep: returns the polar as an (N, 5) array sorted by alpha
+def adaptive_sweep(solve_points, alpha_start, alpha_end, alpha_step, coarse_step = 2.0, stall_points = 2, bend_ratio = 0.5):
+    rows = {}
+
+    def run(alphas, init):
+        for row in solve_points(alphas, init):
+            rows[round(float(row[0]), 6)] = row
+
+    #---March up: coarse until the lift slope drops below bend_ratio of the first slope
+    alpha = alpha_start
+    step = coarse_step
+    first_slope = None
+    falling = 0
+    init = True
+    while alpha <= alpha_end + 1e-9:
+        before = len(rows)
+        run([round(alpha, 6)], init)
+        init = False
+        if len(rows) > before and len(rows) >= 2:
+            polar = numpy.array([rows[a] for a in sorted(rows)])
+            slope = (polar[-1, 1] - polar[-2, 1])/(polar[-1, 0] - polar[-2, 0])
+            first_slope = slope if first_slope is None else first_slope
+            falling = falling + 1 if polar[-1, 1] <= polar[-2, 1] else 0
+            if falling >= stall_points:
+                break
+            if first_slope > 0 and slope < bend_ratio*first_slope:
+                step = alpha_step
+        alpha += step
+
+    if not rows:
+        return numpy.zeros((0, 5))
+
+    #---Refine: fine step around the coarse optima, each region marched up from a fresh start
+    polar = numpy.array([rows[a] for a in sorted(rows)])
+    attached = polar[:max(int(numpy.argmax(polar[:, 1])) + 1, 1)]
+    with numpy.errstate(divide = "ignore", invalid = "ignore"):
+        L_D = numpy.where(attached[:, 2] > 0, attached[:, 1]/attached[:, 2], -numpy.inf)
+    targets = [attached[numpy.argmax(attached[:, 1]), 0],
+               attached[numpy.argmax(L_D), 0],
+               attached[numpy.argmin(attached[:, 2]), 0]]
+    for target in sorted(set(targets)):
+        alphas = [a for a in fine_grid(alpha_start, alpha_end, alpha_step, target - coarse_step, target + coarse_step) if a not in rows]
+        if alphas:
+            run(alphas, True)
+
+    return numpy.array([rows[a] for a in sorted(rows)]).reshape(-1, 5)
@@ -1,10 +1,19 @@
 import subprocess
-import csv
-import math as m
-from turtle import color
-import matplotlib.pyplot as plt
+import os
+import shutil
+import tempfile
+import time
 import numpy
-from tabulate import tabulate
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import polar_cache
+import panel_solver
+import atmosphere
+import surrogate_search
+import telemetry
+from xfoil_pool import XfoilPool, XfoilSession, geometry_command
+from sweep_journal import SweepJournal
+from airfoil_scoring import score_airfoils, metric_columns, normalize_table, total_score
+from polar_parser import load_polar, polar_metrics
 
 #Flow Condition
 
@@ -12,12 +21,48 @@ from tabulate import tabulate
 panel = int(300)
 reynolds_number = int(5153748)
 mach_number = 0.3
+flight_condition = None                     #(altitude ft, velocity ft/s, chord ft): Reynolds and Mach from atmosphere.py instead
 number_itterations = int(200)
 ncrit = 3
+alpha_start = 0
+alpha_end = 20
+alpha_step = 0.5
+solver = "xfoil"                            #"xfoil" runs xfoil.exe, "panel" runs panel_solver in process
+alpha_mode = "fixed"                        #"fixed" runs every alpha_step, "adaptive" refines near cl max and L/D max and stops at stall
+coarse_step = 2.0                           #adaptive only: step below the bend of the lift curve, a multiple of alpha_step
+stall_points = 2                            #adaptive only: points of falling cl before the sweep stops
+#Adaptive is XFOIL only, panel sweeps always run fixed: the panel solver does the whole alpha
+#sequence in one vectorized call, stepping it a point at a time is several times slower
 file_name = "airfoil_data_optimized.csv"
 file_name_for_normalized = "Normalized_Data.csv"
 file_name_for_scored = "Airfoil_Scores.csv"
 
+#Sweep Controls---------------------------------------------------------------
+workers = 4                                 #xfoil runs at the same time
+case_timeout = 120                          #seconds before a hung xfoil run is killed
+xfoil_command = [os.path.abspath("xfoil.exe")]  #[sys.executable, os.path.abspath("fake_xfoil.py")] without xfoil
+persistent_xfoil = False                    #True keeps xfoil sessions open between airfoils (no process start per
+                                            #airfoil, much faster), False runs one xfoil process per airfoil as before
+cases_per_session = 50                      #airfoils before a session is recycled
+scratch_root = "sweep_scratch"              #one scratch directory per case goes in here
+keep_scratch = False
+
+#Journal Controls-------------------------------------------------------------
+journal_file = "sweep_journal.db"           #finished cases survive an interrupted sweep
+commit_interval = 5.0                       #seconds between journal commits
+commit_batch = 50                           #or this many finished cases, whichever is first
+retry_failed = False                        #rerun cases that failed in an earlier sweep
+
+#Telemetry Controls-----------------------------------------------------------
+telemetry_file = None                       #per case records as JSON lines (telemetry.py), e.g. "sweep_telemetry.jsonl"
+metrics_file = None                         #counters and stage histograms in the Prometheus text format
+profile = False                             #sampling profiler over the sweep, hottest functions printed at the end
+print_rows = False                          #print every airfoil row as it is scored, the telemetry summary is printed either way
+
+if flight_condition is not None:
+    reynolds_number, mach_number = (float(value) for value in atmosphere.flight_numbers(*flight_condition))
+    reynolds_number = int(round(reynolds_number))
+
 #Airfoil Configuration Range-------------------------------------------------
 camber_min = 1
 camber_max = 3
@@ -26,6 +71,14 @@ camber_location_max = 5
 thickness_min = 12
 thickness_max = 15
 
+#Search Controls-------------------------------------------------------------
+search_mode = "grid"                        #"grid" runs every case in the range, "surrogate" picks them by expected improvement
+search_continuous = False                   #surrogate only: non-integer camber, location and thickness
+search_initial = 8                          #surrogate only: cases in the starting Latin hypercube
+search_iterations = 6                       #surrogate only: batches after the starting cases
+search_batch = workers                      #surrogate only: cases per batch
+search_seed = 0
+
 #Objective Weights------------------------------------------------------------
 cl_W = 0.16
 cd_W = 0.17
@@ -34,21 +87,32 @@ cm_W = 0.16
 tc_W = 0.17
 AoAmarg_W = 0.17
 W_Total = int(cl_W + cd_W + LD_W + cm_W + tc_W + AoAmarg_W)
+weights = {"Cl": cl_W, "Cd": cd_W, "L/Dmax": LD_W, "Cm": cm_W, "t/c": tc_W, "AoA_margin": AoAmarg_W}
 
 #Ideal Values---------------------------------------------------------------
 ideal_tc = 13
 deviation_tc = 5
 
 # Functions #====================================================================================#
-def airfoil_simulation():
+#---Design Space: every NACA case in grid order (camber, camber location, thickness)
+def naca_cases():
+    cases = []
     for m in range(camber_min,camber_max + 1):
         for p in range(camber_location_min,camber_location_max + 1):
             for t in range(thickness_min,thickness_max + 1):
-                airfoil_code= f"{m}{p}{t:02d}"
-                airfoil_name = f"NACA{airfoil_code}"
-                #Command Sequence-----------------------------------------------------------#               
-                xfoil_commands = f"""
-NACA {airfoil_code}
+                cases.append(design_case(m, p, t))
+    return cases
+
+#---Design Case: (airfoil_code, airfoil_name, t), non-integer designs get a "2.50_4.10_13.20" code
+def design_case(m, p, t):
+    airfoil_code = panel_solver.design_code(m, p, t)
+    t = int(t) if float(t).is_integer() else float(t)
+    return airfoil_code, f"NACA{airfoil_code}", t
+
+#---XFOIL Command Sequence
+def xfoil_commands(geometry, airfoil_name):
+    return f"""
+{geometry}
 PPAR
 N {panel}
 
@@ -64,159 +128,262 @@ MACH {mach_number}
 PACC
 {airfoil_name}.txt
 
-ASEQ 0 20 0.5
+ASEQ {alpha_start} {alpha_end} {alpha_step}
 PACC
 
 QUIT
 """
-                #initiates the commands
-                proc = subprocess.Popen(['xfoil.exe'],
-                        stdin = subprocess.PIPE,
-                        stdout = subprocess.PIPE,
-                        stderr = subprocess.PIPE,
-                        text = True)
-                proc.communicate(xfoil_commands)
-                #Stop the simulation if dCl/dalpha changes its sign
-                #Reads the {airfoil nadme} and outputs a list of tuples
-                with open(f"{airfoil_name}.txt",'r') as f:
-                    lines = f.readlines()
-                    data = []
-                    stall_trigger = False
-                    post_stall_error = False
-
-                    for i in range(len(lines) - 1):
-                        tokens_current = lines[i].strip().split()
-                        tokens_next = lines[i+1].strip().split()
-                        
-                        if len(tokens_current) == 7 and len(tokens_next) == 7:
-                            try:
-                                alpha = float(tokens_current[0])
-                                cl = float(tokens_current[1])
-                                cd = float(tokens_current[2])
-                                cdp = float(tokens_current[3])
-                                cm = float(tokens_current[4])
-                                L_D = cl/cd
-
-                                next_cl = float(tokens_next[1])
-
-                                #Stall and Post Stall Detection Logic to clean data
-                                if stall_trigger == False and post_stall_error == False:
-                                    data.append((alpha , cl , cd , cdp , cm, L_D))
-                                    if cl >= next_cl:
-                                        stall_trigger = True
-
-                                elif stall_trigger == True and post_stall_error == False:
-                                    data.append((alpha , cl , cd , cdp , cm, L_D))
-                                    if cl < next_cl:
-                                        post_stall_error = True
-                        
-                                else:
-                                    break
-                                            
-                            except ValueError:
-                                continue
-                            
-                #Getting the performance paramters           
-                cl_max = max(data, key = lambda x: x[1])
-                cd_min = min(data, key = lambda x: x[2])
-                L_Dmax = max(data, key = lambda x: x[5])
-                cm_min = min(data, key = lambda x: x[4])
-                t_ratio = t
-                stall_angle = cl_max[0]
-                L_Dmaxangle = L_Dmax[0]
-                delta_AoA = stall_angle - L_Dmaxangle
-
-                final_data = [
-                cl_max[1],   # maximum Cl
-                cd_min[2],   # minimum Cd
-                L_Dmax[5],   # maximum L/D
-                cm_min[4],   # minimum Cm
-                t_ratio,     # thickness
-                delta_AoA    # AoA margin
-                ]
-
-                print(f"{airfoil_name}: {final_data}")
-                #Store Data as csv
-                store_data(airfoil_name,final_data)
-
-                with open("Sim_Configuration.txt","a") as config:
-                    config.write(f"{airfoil_name}: {final_data}\n")
 
-    return airfoil_name,final_data
-
-#---Store Data
-def store_data(airfoil,parameters):
-    with open(file_name,"a") as f:
-        f.write(f"{airfoil},{parameters[0]},{parameters[1]},{parameters[2]},{parameters[3]},{parameters[4]},{parameters[5]}\n")
-
-#---Read Data to find min and max
-def find_min_max(header):
-    with open(file_name,"r") as f:
-        var_list  = []
-        reader = csv.DictReader(f)
-        for row in reader:
+#---Sim Controls: every setting that changes the polar, used as the cache key
+def sim_controls():
+    controls = {
+        "panel": panel,
+        "reynolds_number": reynolds_number,
+        "mach_number": mach_number,
+        "number_itterations": number_itterations,
+        "ncrit": ncrit,
+        "aseq": [alpha_start, alpha_end, alpha_step],
+        "solver": solver
+    }
+    #Only added for adaptive sweeps so fixed sweeps keep their cache and journal keys
+    if alpha_mode == "adaptive" and solver != "panel":
+        controls["adaptive"] = [coarse_step, stall_points]
+    #Which program or model made the polar, so fake_xfoil polars are never reused for xfoil.exe
+    if solver == "panel":
+        controls["boundary_layer"] = [panel_solver.bl_stations, panel_solver.H_separation, panel_solver.H_transition]
+    else:
+        controls["xfoil"] = solver_identity(xfoil_command)
+    return controls
+
+#---Solver Identity: file name and size of every existing file in the command (the executable
+#or script), other arguments as given, paths are left out so moving the folder keeps the cache
+def solver_identity(command):
+    identity = []
+    for part in command:
+        if os.path.isfile(part):
+            identity.append([os.path.basename(part), os.path.getsize(part)])
+        else:
+            identity.append(part)
+    return identity
+
+#---Alpha Sequence: the same angles as ASEQ alpha_start alpha_end alpha_step
+def alpha_sequence():
+    n = int(round((alpha_end - alpha_start)/alpha_step)) + 1
+    return alpha_start + alpha_step*numpy.arange(n)
+
+#---Run Case: solves one case with the selected solver backend
+def run_case(case):
+    if solver == "panel":
+        return run_panel_case(case)
+    return run_xfoil_case(case)
+
+#---Panel Case: in process panel method with the boundary layer drag estimate
+def run_panel_case(case):
+    airfoil_code, airfoil_name, t = case
+    start = time.perf_counter()
+    polar = panel_solver.naca_polar(airfoil_code, alpha_sequence(), panel, reynolds_number, mach_number)
+    telemetry.record("case", airfoil = airfoil_name, backend = "panel", solve_time = time.perf_counter() - start,
+                     points = len(polar))
+    return airfoil_name, polar, None
+
+#---XFOIL Case: one XFOIL run inside its own scratch directory
+#Each case gets a private directory so parallel runs never share {airfoil_name}.txt,
+#a hung solver is killed once case_timeout runs out
+#The adaptive sweep has to see each point before picking the next, so it runs in a
+#session that is closed after the case
+def run_xfoil_case(case):
+    airfoil_code, airfoil_name, t = case
+    if alpha_mode == "adaptive":
+        session = None
+        try:
+            session = XfoilSession(xfoil_command, sim_controls(), scratch_root, case_timeout)
+            return session.run(case)
+        except (TimeoutError, RuntimeError, OSError) as e:
+            telemetry.record("case", airfoil = airfoil_name, backend = "adaptive", error = str(e))
+            return airfoil_name, None, str(e)
+        finally:
+            if session is not None:
+                session.close()
+
+    os.makedirs(scratch_root, exist_ok = True)
+    scratch = tempfile.mkdtemp(prefix = f"{airfoil_name}_", dir = scratch_root)
+    #subprocess.run split into Popen and communicate, so the spawn is timed on its own
+    entry = {"airfoil": airfoil_name, "backend": "xfoil"}
+    try:
+        commands = xfoil_commands(geometry_command(airfoil_code, scratch, panel), airfoil_name)
+        start = time.perf_counter()
+        with subprocess.Popen(xfoil_command,
+                stdin = subprocess.PIPE,
+                stdout = subprocess.PIPE,
+                stderr = subprocess.PIPE,
+                text = True,
+                cwd = scratch) as process:
+            entry["spawn_time"] = time.perf_counter() - start
             try:
-                var = float(row[header])
-                var_list.append(var)
-            except (ValueError,KeyError):
-                continue
-
-    var_min = min(var_list)
-    var_max = max(var_list)
-
-    data = [[header,var_min,var_max]]
-    fieldname = ["Parameter","minimum value","maximum value"]
-    print(tabulate(data,headers = fieldname, floatfmt = ".4f", tablefmt = "fancy_grid"))
-
-    return var_min,var_max
-
-#---Normalize
-
-def normalize(head_min,head_max,var):
-        var_norm = (var - head_min)/(head_max-head_min)
-        return var_norm
-
-def inverse_norm(head_min,head_max,var):
-    var_norm = 1 - ((var - head_min)/(head_max-head_min))
-    return var_norm
-
-def ideal_norm(ideal_value,deviation,var):
-    var_norm = m.e**-(((var-ideal_value)**2)/(2*(deviation**2)))
-    return var_norm
+                process.communicate(commands, timeout = case_timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                entry["error"] = f"timed out after {case_timeout} s"
+                return airfoil_name, None, entry["error"]
+            finally:
+                entry["solve_time"] = time.perf_counter() - start
+
+        polar_file = os.path.join(scratch, f"{airfoil_name}.txt")
+        if not os.path.exists(polar_file):
+            entry["error"] = "no polar file written"
+            return airfoil_name, None, entry["error"]
+
+        start = time.perf_counter()
+        polar = load_polar(polar_file)
+        entry.update(parse_time = time.perf_counter() - start, points = len(polar), polar_bytes = os.path.getsize(polar_file))
+        if len(polar) == 0:
+            entry["error"] = "no converged points"
+            return airfoil_name, None, entry["error"]
+        return airfoil_name, polar, None
+    finally:
+        telemetry.record("case", **entry)
+        if not keep_scratch:
+            shutil.rmtree(scratch, ignore_errors = True)
+
+#---Solve Cases: runs the cases on a pool of workers
+#Yields (case index, result) as each case finishes so results are journaled right away
+#waiting() is called before each wait and every wait_interval seconds while no case finishes
+def solve_cases(cases, waiting = None, wait_interval = None):
+    if not cases:
+        return
+    xfoil = None
+    solve = run_case
+    if solver == "xfoil" and persistent_xfoil:
+        xfoil = XfoilPool(xfoil_command, sim_controls(), workers, cases_per_session, case_timeout, scratch_root)
+        solve = xfoil.run_case
+    try:
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            futures = {pool.submit(solve, case): i for i, case in enumerate(cases)}
+            running = set(futures)
+            while running:
+                if waiting is not None:
+                    waiting()
+                finished, running = wait(running, timeout = wait_interval, return_when = FIRST_COMPLETED)
+                for future in finished:
+                    yield futures[future], future.result()
+    finally:
+        if xfoil is not None:
+            xfoil.close()
+
+#---Evaluate Cases: resumes from the journal, reads cached polars and solves only what is left
+#Returns (airfoil, status, metrics or None, error) per case in the order given
+def evaluate_cases(cases):
+    controls = sim_controls()
+    keys = [polar_cache.polar_key(case[0], controls) for case in cases]
+
+    with SweepJournal(journal_file, commit_interval, commit_batch) as journal:
+        journal.add_cases(keys, [case[1] for case in cases], controls)
+        #Pending and running (interrupted) cases are unfinished, failed ones only rerun with retry_failed
+        finished = ("done",) if retry_failed else ("done", "failed")
+        todo = [i for i, status in enumerate(journal.statuses(keys)) if status not in finished]
+        print(f"Journaled cases: {len(cases) - len(todo)} of {len(cases)}")
+
+        #Cached polars only need scoring, the rest go to the solver
+        missing = []
+        for i in todo:
+            with telemetry.stage("cache_load"):
+                polar = polar_cache.load_polar(keys[i])
+            if polar is None:
+                missing.append(i)
+            else:
+                record_case(journal, keys[i], cases[i], polar, None)
+        print(f"Cached polars: {len(todo) - len(missing)} of {len(todo)}")
+        telemetry.count("cached_cases", len(todo) - len(missing))
+        telemetry.count("journaled_cases", len(cases) - len(todo))
+
+        journal.mark_running([keys[i] for i in missing])
+        #Finished cases are committed on the interval even while the rest are still running
+        for j, (name, polar, error) in solve_cases([cases[i] for i in missing], journal.commit_due, commit_interval):
+            i = missing[j]
+            if polar is not None:
+                with telemetry.stage("cache_store"):
+                    polar_cache.store_polar(keys[i], polar)
+            telemetry.count("solved_cases" if polar is not None else "failed_cases")
+            record_case(journal, keys[i], cases[i], polar, error)
+
+        return journal.results(keys)
+
+#---Surrogate Cases: lets surrogate_search choose the cases, returns them in evaluation order
+def surrogate_cases():
+    bounds = [(camber_min, camber_max), (camber_location_min, camber_location_max), (thickness_min, thickness_max)]
+
+    def evaluate(designs):
+        return [metrics for _, _, metrics, _ in evaluate_cases([design_case(*design) for design in designs])]
+
+    def score(rows):
+        table = {"Airfoil": numpy.arange(len(rows)).astype(str)}
+        for k, name in enumerate(metric_columns):
+            table[name] = numpy.array([row[k] for row in rows], dtype = float)
+        return total_score(normalize_table(table, ideal_tc, deviation_tc), weights)
+
+    designs, _ = surrogate_search.search(evaluate, score, bounds, not search_continuous,
+        search_initial, search_iterations, search_batch, search_seed)
+    return [design_case(*design) for design in designs]
+
+#---Sweep: grid or surrogate search, results are written in evaluation order so the csv is the
+#same for any worker count
+def airfoil_simulation():
+    cases = surrogate_cases() if search_mode == "surrogate" else naca_cases()
+    results = evaluate_cases(cases)
+
+    airfoil_name, final_data = None, None
+    rows = []
+    for (airfoil_code, name, t), (_, status, metrics, error) in zip(cases, results):
+        if metrics is None:
+            print(f"ERROR: {name}: {error}")
+            with telemetry.stage("config_write"), open("Sim_Configuration.txt","a") as config:
+                telemetry.count("config_bytes", config.write(f"{name}: ERROR {error}\n"))
+            continue
+
+        airfoil_name, final_data = name, metrics[:4] + [t] + metrics[5:]
+        if print_rows:
+            print(f"{airfoil_name}: {final_data}")
+        rows.append((airfoil_name, final_data))
+
+        with telemetry.stage("config_write"), open("Sim_Configuration.txt","a") as config:
+            telemetry.count("config_bytes", config.write(f"{airfoil_name}: {final_data}\n"))
+
+    #The surrogate search stops early when it runs out of candidates, the count is only known now
+    if search_mode == "surrogate":
+        with telemetry.stage("config_write"), open("Sim_Configuration.txt","a") as config:
+            telemetry.count("config_bytes", config.write(f"Airfoils Evaluated: {len(cases)}\n"))
+
+    #Store Data as csv
+    store_data(rows)
+    return airfoil_name,final_data
 
-#---Normalize
-def read_and_write_normalized_file():
-    with open(file_name,"r") as infile, open(file_name_for_normalized, "w", newline='') as outfile:
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames
-        writer = csv.DictWriter(outfile, fieldnames = fieldnames)
-
-        writer.writeheader()
-        for row in reader:
-            try:
-                row["Airfoil"] = row["Airfoil"]
-                row["Cl"] = normalize(cl_min, cl_max,float(row["Cl"]))
-                row["Cd"] = inverse_norm(cd_min, cd_max,float(row["Cd"]))
-                row["L/Dmax"] = normalize(L_Dmin, L_Dmax,float(row["L/Dmax"]))
-                row["Cm"] = inverse_norm(cm_min, cm_max, float(row["Cm"]))
-                row["t/c"] = ideal_norm(ideal_tc, deviation_tc,float(row["t/c"]))
-                row["AoA_margin"] = normalize(AoAmarg_min, AoAmarg_max, float(row["AoA_margin"]))
-
-                print(row)
-                writer.writerow(row)
-            except Exception as e:
-                print(f"ERROR: {e}")
-#--Score Calculate
+#---Record Case: scores a polar and journals the case as done or failed
+def record_case(journal, key, case, polar, error):
+    airfoil_code, airfoil_name, t = case
+    with telemetry.stage("metrics"):
+        final_data = None if polar is None else polar_metrics(polar, t)
+    with telemetry.stage("journal"):
+        if final_data is None:
+            journal.fail(key, error or "no converged points")
+        else:
+            journal.finish(key, final_data)
+
+#---Store Data: writes the whole csv in one pass
+@telemetry.timed("csv_write")
+def store_data(rows):
+    with open(file_name,"w") as f:
+        f.write(f"Airfoil,Cl,Cd,L/Dmax,Cm,t/c,AoA_margin\n")
+        for airfoil, parameters in rows:
+            f.write(f"{airfoil},{parameters[0]},{parameters[1]},{parameters[2]},{parameters[3]},{parameters[4]},{parameters[5]}\n")
+        telemetry.count("csv_bytes", f.tell())
 
 #Print Sim Controls and Save #==========================================================================================#
-if W_Total == 1:
-    print()
-else:
-    print("ERROR: W_Total is not equal to 1")
-    exit()
-
-with open("Sim_Configuration.txt","w") as f:
-    f.write(f"""
+#---Sim Configuration: the header of Sim_Configuration.txt, case results are appended to it
+@telemetry.timed("config_write")
+def write_sim_configuration():
+    with open("Sim_Configuration.txt","w") as f:
+        f.write(f"""
 ==============================================================================================
 Airfoil Optmizer Created By:Rexus Bryan L. Gan          
 ==============================================================================================
@@ -228,6 +395,12 @@ Sim Controls
     Mach No:               {mach_number}
     Ncrit:                 {ncrit}
     Itterations:           {number_itterations}
+    Alpha Sequence:        {alpha_start} to {alpha_end} step {alpha_step}
+    Alpha Mode:            {"fixed (adaptive is XFOIL only)" if alpha_mode == "adaptive" and solver == "panel" else alpha_mode}{f" (coarse step {coarse_step}, stop after {stall_points} falling points)" if alpha_mode == "adaptive" and solver != "panel" else ""}
+    Solver:                {solver}
+    Persistent XFOIL:      {persistent_xfoil} ({cases_per_session} cases per session)
+    Workers:               {workers}
+    Case Timeout:          {case_timeout} s
 -------------------------------------------------
  Objective Weights
     Cl :                   {cl_W*100}%            
@@ -245,7 +418,8 @@ Airfoil Configuration Range (NACA 4_digits [camber, camber_loc, thickness])
     camber_location_max :  {camber_location_max}
     thickness_min :        {thickness_min}
     thickness_max :        {thickness_max}
-    Total Airfoils:        {(camber_max-camber_min + 1)*(camber_location_max-camber_location_min + 1)*(thickness_max-thickness_min + 1 )}
+    Total Airfoils:        {(camber_max-camber_min + 1)*(camber_location_max-camber_location_min + 1)*(thickness_max-thickness_min + 1 ) if search_mode != "surrogate" else f"at most {search_initial + search_iterations*search_batch} (surrogate search)"}
+    Search Mode:           {search_mode}{" (continuous)" if search_continuous else ""}
 -------------------------------------------------
 Ideal Thickness: {ideal_tc}
 Deviation:       {deviation_tc}
@@ -255,43 +429,73 @@ Airfoil Data: [Airfoil_Name]:[Cl,Cd,L/Dmax,Cm,t/c,AoA_margin]
 ==============================================================================================
 """)
 
-with open("Sim_Configuration.txt","r") as f:
-    for line in f:
-        lines = line.strip()
-        print(lines)
-#========================================================================================#
-#File Generation and Process
-with open(file_name,"w") as f:
-    f.write(f"Airfoil,Cl,Cd,L/Dmax,Cm,t/c,AoA_margin\n")
-
-#Function Calls #====================================================================================#
-#Initiate simulation ; return those values as (airfoil_name: parameter lists); 
-#Create an optmized parameter summary of the entire simulation range
-airfoil,parameters = airfoil_simulation()
-##Find Min and max for normalization--------------------
-
-print(f"""
+#---Run Sweep: the whole script, sweep, score and print, returns the ranked table
+#Only this prints, importing the module runs nothing
+def run_sweep():
+    from tabulate import tabulate
+
+    if W_Total == 1:
+        print()
+    else:
+        print("ERROR: W_Total is not equal to 1")
+        return None
+
+    telemetry.records_file, telemetry.metrics_file, telemetry.profile = telemetry_file, metrics_file, profile
+    telemetry.start_run()
+    write_sim_configuration()
+    with open("Sim_Configuration.txt","r") as f:
+        for line in f:
+            lines = line.strip()
+            print(lines)
+    #========================================================================================#
+    #Function Calls #====================================================================================#
+    #Initiate simulation ; return those values as (airfoil_name: parameter lists); 
+    #Create an optmized parameter summary of the entire simulation range
+    with telemetry.stage("sweep"):
+        airfoil_name, _ = airfoil_simulation()
+    #Every case failed: the csv is only the header, there is nothing to score
+    if airfoil_name is None:
+        print("ERROR: no airfoil in the sweep converged, nothing to score")
+        telemetry.finish_run()
+        return None
+    ##Load the sweep once, find min and max, normalize, weigh and rank--------------------
+    with telemetry.stage("score"):
+        (col_min, col_max), scored = score_airfoils(file_name, file_name_for_normalized, file_name_for_scored, weights, ideal_tc, deviation_tc)
+
+    print(f"""
 ==============================================================================================
 Find Min and Max
 ==============================================================================================
  """)
-cl_min , cl_max = find_min_max("Cl")
-cd_min, cd_max = find_min_max("Cd")
-L_Dmin , L_Dmax = find_min_max("L/Dmax")
-cm_min , cm_max = find_min_max("Cm")
-AoAmarg_min, AoAmarg_max = find_min_max("AoA_margin")
-print(f"""
+    data = [[header, var_min, var_max] for header, var_min, var_max in zip(metric_columns, col_min, col_max)]
+    fieldname = ["Parameter","minimum value","maximum value"]
+    print(tabulate(data,headers = fieldname, floatfmt = ".4f", tablefmt = "fancy_grid"))
+
+    print(f"""
 ==============================================================================================
-Normalize Data
+Airfoil Scores
 ==============================================================================================
  """)
+    score_header = ["Rank", "Airfoil", *metric_columns, "Total Score"]
+    print(tabulate([[scored[name][i] for name in score_header] for i in range(min(10, len(scored["Rank"])))],
+        headers = score_header, floatfmt = ".4f", tablefmt = "fancy_grid"))
+    print(f"Normalized data: {file_name_for_normalized}")
+    print(f"Airfoil scores:  {file_name_for_scored}")
 
-#Normalize the Datas and make it a new File--------------------
-read_and_write_normalized_file()
-#Make a new file for the weight application and Summation and sort---------------------
+    print(f"""
+==============================================================================================
+Telemetry
+==============================================================================================
+ """)
+    telemetry.print_summary()
+    telemetry.finish_run()
 
-print(f"""
+    print(f"""
 ==============================================================================================
 Done
 ==============================================================================================
- """)
\ No newline at end of file
+ """)
+    return scored
+
+if __name__ == "__main__":
+    run_sweep()
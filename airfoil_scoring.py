@@ -0,0 +1,130 @@
+import csv
+import math as m
+import numpy
+
+#Airfoil Scoring
+#Loads the sweep csv once into NumPy columns, normalizes every column at once, applies the
+#objective weights and ranks the airfoils
+#Normalized_Data.csv keeps the normalized values, Airfoil_Scores.csv the weighted scores
+#with a Total Score and Rank per airfoil
+
+metric_columns = ("Cl", "Cd", "L/Dmax", "Cm", "t/c", "AoA_margin")
+
+#==============================================================================================#
+#Functions
+
+#---Normalize: work on scalars and NumPy arrays alike
+def normalize(head_min,head_max,var):
+        var_norm = (var - head_min)/(head_max-head_min)
+        return var_norm
+
+def inverse_norm(head_min,head_max,var):
+    var_norm = 1 - ((var - head_min)/(head_max-head_min))
+    return var_norm
+
+def ideal_norm(ideal_value,deviation,var):
+    var_norm = m.e**-(((var-ideal_value)**2)/(2*(deviation**2)))
+    return var_norm
+
+#---Load Metrics: the whole csv in one read as {"Airfoil": names, column: float array}
+def load_metrics(file_name):
+    with open(file_name, "r", newline = "") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for row in reader if len(row) == len(header)]
+
+    columns = list(zip(*rows)) if rows else [()]*len(header)
+    table = {"Airfoil": numpy.array(columns[header.index("Airfoil")], dtype = str)}
+    for name in metric_columns:
+        table[name] = numpy.array(columns[header.index(name)], dtype = float)
+    return table
+
+#---Min Max: every metric column at once, as (len(metric_columns),) arrays, NaN for an empty table
+def column_min_max(table):
+    values = numpy.column_stack([table[name] for name in metric_columns])
+    if len(values) == 0:
+        return numpy.full(len(metric_columns), numpy.nan), numpy.full(len(metric_columns), numpy.nan)
+    return values.min(axis = 0), values.max(axis = 0)
+
+#---Normalize Table: Cl, L/D and AoA margin higher is better, Cd and Cm lower is better,
+#t/c is scored by distance from the ideal thickness
+def normalize_table(table, ideal_tc, deviation_tc):
+    col_min, col_max = column_min_max(table)
+    bounds = dict(zip(metric_columns, zip(col_min, col_max)))
+    normalized = {"Airfoil": table["Airfoil"]}
+    with numpy.errstate(divide = "ignore", invalid = "ignore"):
+        normalized["Cl"] = normalize(*bounds["Cl"], table["Cl"])
+        normalized["Cd"] = inverse_norm(*bounds["Cd"], table["Cd"])
+        normalized["L/Dmax"] = normalize(*bounds["L/Dmax"], table["L/Dmax"])
+        normalized["Cm"] = inverse_norm(*bounds["Cm"], table["Cm"])
+        normalized["t/c"] = ideal_norm(ideal_tc, deviation_tc, table["t/c"])
+        normalized["AoA_margin"] = normalize(*bounds["AoA_margin"], table["AoA_margin"])
+
+    #A column where every airfoil has the same value does not separate them, they all score 1
+    for name in metric_columns:
+        normalized[name] = numpy.where(numpy.isfinite(normalized[name]), normalized[name], 1.0)
+    return normalized
+
+#---Total Score: weighted sum of the normalized columns, in table order
+def total_score(normalized, weights):
+    return sum(weights[name]*normalized[name] for name in metric_columns)
+
+#---Score Table: weighted scores, Total Score and Rank (1 = best), sorted by rank
+def score_table(normalized, weights):
+    scored = {"Airfoil": normalized["Airfoil"]}
+    for name in metric_columns:
+        scored[name] = weights[name]*normalized[name]
+    total = total_score(normalized, weights)
+
+    order = numpy.argsort(-total, kind = "stable")
+    scored = {name: values[order] for name, values in scored.items()}
+    scored["Total Score"] = total[order]
+    scored["Rank"] = numpy.arange(1, len(order) + 1)
+    return scored
+
+def write_table(file_name, table):
+    names = list(table)
+    with open(file_name, "w", newline = "") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for row in zip(*(table[name] for name in names)):
+            writer.writerow([value.item() if hasattr(value, "item") else value for value in row])
+
+#---Score Airfoils: the whole scoring stage, returns the min/max per column and the ranked table
+def score_airfoils(file_name, normalized_file, scored_file, weights, ideal_tc, deviation_tc):
+    table = load_metrics(file_name)
+    col_min, col_max = column_min_max(table)
+    normalized = normalize_table(table, ideal_tc, deviation_tc)
+    scored = score_table(normalized, weights)
+    write_table(normalized_file, normalized)
+    write_table(scored_file, scored)
+    return (col_min, col_max), scored
+
+#---Scored Airfoil: one row of Airfoil_Scores.csv as a dict, default when it is not there
+def scored_airfoil(airfoil_name, scored_file = "Airfoil_Scores.csv", default = None):
+    try:
+        with open(scored_file, "r", newline = "") as f:
+            for row in csv.DictReader(f):
+                if row["Airfoil"] == airfoil_name:
+                    score = {key: float(value) for key, value in row.items() if key != "Airfoil"}
+                    score["Rank"] = int(score["Rank"])
+                    return {"Airfoil": airfoil_name, **score}
+    except (OSError, KeyError, ValueError):
+        pass
+    return default
+
+#---Load Scored Table: Airfoil_Scores.csv as {column: array}, empty until a sweep has been scored
+def load_scored_table(scored_file = "Airfoil_Scores.csv"):
+    try:
+        with open(scored_file, "r", newline = "") as f:
+            rows = list(csv.DictReader(f))
+    except OSError:
+        return {}
+    if not rows:
+        return {}
+    table = {"Airfoil": numpy.array([row["Airfoil"] for row in rows], dtype = str)}
+    for name in rows[0]:
+        if name != "Airfoil":
+            table[name] = numpy.array([float(row[name]) for row in rows])
+    table["Rank"] = table["Rank"].astype(int)
+    return table
@@ -0,0 +1,93 @@
+import numpy as np
+
+#Atmosphere
+#The thrust_required.rho standard atmosphere (English units: ft, deg R, lb/ft^2, slug/ft^3)
+#for NumPy arrays of any shape, troposphere up to 36,000 ft and the isothermal layer up to
+#82,000 ft, NaN outside that
+#Every call returns temperature, pressure, density, speed of sound (ft/s) and dynamic
+#viscosity (slug/ft s, Sutherland's law), so Reynolds and Mach numbers follow from a flight
+#condition instead of being typed in
+#AtmosphereTable precomputes the same values on a dense altitude grid, with linear or cubic
+#(Hermite, one-sided slopes at the tropopause kink) interpolation
+#The closed form above is already vectorized and about as fast on large arrays, the linear
+#table is quicker on small arrays in tight loops (~30% on single points)
+
+t_0 = 519                       #deg R
+a = -0.003566                   #deg R/ft lapse rate
+rho_0 = 0.002378                #slug/ft^3
+p_0 = 2116.2                    #lb/ft^2
+tropopause = 36000
+ceiling = 82000
+gamma = 1.4
+R_air = 1716                    #ft lb/(slug deg R)
+mu_ref = 3.737e-7               #slug/(ft s) at T_ref
+T_ref = 518.67
+sutherland = 198.72             #deg R
+
+#==============================================================================================#
+#Functions
+
+#---Atmosphere: (temperature, pressure, density, speed_of_sound, viscosity) at each altitude
+def atmosphere(altitude):
+    h = np.asarray(altitude, dtype = float)
+    troposphere = h <= tropopause
+    inside = h <= ceiling
+
+    with np.errstate(invalid = "ignore"):
+        ratio = 1 + (a*h)/t_0
+        temperature = np.where(troposphere, t_0 + a*h, t_0 + a*tropopause)
+        pressure = np.where(troposphere, p_0*ratio**5.26, p_0*1.26*np.exp(-4.805e-5*h))
+        density = np.where(troposphere, rho_0*ratio**4.26, rho_0*1.68*np.exp(-4.805e-5*h))
+
+    temperature, pressure, density = (np.where(inside, value, np.nan) for value in (temperature, pressure, density))
+    speed_of_sound = np.sqrt(gamma*R_air*temperature)
+    viscosity = mu_ref*(temperature/T_ref)**1.5*(T_ref + sutherland)/(temperature + sutherland)
+    return temperature, pressure, density, speed_of_sound, viscosity
+
+#---Flight Numbers: Reynolds number on length and Mach number at altitude and velocity
+def flight_numbers(altitude, velocity, length, table = None):
+    _, _, density, speed_of_sound, viscosity = (table or atmosphere)(altitude)
+    return density*velocity*length/viscosity, velocity/speed_of_sound
+
+#==============================================================================================#
+#Lookup Table
+
+class AtmosphereTable:
+    def __init__(self, h_max = ceiling, step = 50.0, kind = "linear"):
+        if kind not in ("linear", "cubic"):
+            raise ValueError(f"kind must be linear or cubic, not {kind}")
+        self.kind = kind
+        self.step = step
+        self.h = np.arange(0.0, h_max + step/2, step)
+        self.values = atmosphere(self.h)
+        #Intervals start from the value just above each node (differs only at the tropopause)
+        self.values_above = atmosphere(np.where(self.h == tropopause, np.nextafter(tropopause, np.inf), self.h))
+        if kind == "cubic":
+            #Slopes from each side, so the interval ending at the tropopause only sees the
+            #troposphere and the one starting there only the isothermal layer
+            d = 1e-3*step
+            above, below = atmosphere(self.h + d), atmosphere(self.h - d)
+            self.slope_right = [(y_d - y)/d*step for y_d, y in zip(above, self.values_above)]
+            self.slope_left = [(y - y_d)/d*step for y_d, y in zip(below, self.values)]
+
+    #A point on a node is the end of the interval below it, so 36,000 ft is troposphere like rho
+    def __call__(self, altitude):
+        h = np.asarray(altitude, dtype = float)
+        position = (h.ravel() - self.h[0])*(1/self.step)
+        inside = (position >= 0) & (position <= len(self.h) - 1)
+        i = np.clip(np.ceil(position) - 1, 0, len(self.h) - 2).astype(np.intp)
+        i[~inside] = 0
+        s = position - i
+        j = i + 1
+
+        values = []
+        for k in range(5):
+            y0, y1 = self.values_above[k][i], self.values[k][j]
+            if self.kind == "linear":
+                value = y0 + (y1 - y0)*s
+            else:
+                m0, m1 = self.slope_right[k][i], self.slope_left[k][j]
+                value = y0 + s*(m0 + s*(3*(y1 - y0) - 2*m0 - m1 + s*(2*(y0 - y1) + m0 + m1)))
+            value[~inside] = np.nan
+            values.append(value.reshape(h.shape))
+        return tuple(values)
@@ -0,0 +1,547 @@
+import contextlib
+import io
+import json
+import math as m
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+
+#Benchmarks
+#Timing of every computational stage against a recorded baseline (benchmark_baseline.json):
+#microbenchmarks (atmosphere calls/s, sizing solves/s, drag solves/s, polar parse MB/s, ...)
+#and end to end airfoil sweeps at several grid sizes on fake_xfoil, so it runs without XFOIL
+#Every benchmark returns the numbers it computed, they are checked twice:
+#   reference  against an independent path that gives the same answer (the scalar loops the
+#              scripts used to run, the SymPy sized weights, a row by row polar parse, ...)
+#   baseline   against the values recorded with the baseline timings
+#so a speedup that changes an answer is flagged next to its timing
+#Run: python benchmarks.py [--record] [names...]
+#   --record    writes the results as the new baseline
+#   names       only the benchmarks whose names start with one of these
+
+baseline_file = "benchmark_baseline.json"
+slowdown_threshold = 1.25       #time per run over the baseline time above this is a slowdown
+repeats = 5                     #best of
+min_time = 0.2                  #s, short runs are looped until one repeat takes this long
+baseline_tolerance = 1e-9       #relative, values against the recorded baseline
+record_size = 1000              #arrays with more values are recorded as their sum and sum of squares
+sweep_repeats = 3
+sweep_sizes = {                 #(camber, camber location, thickness) ranges of the airfoil sweeps
+    "sweep_4":   ((2, 2), (4, 4), (12, 15)),
+    "sweep_36":  ((1, 3), (3, 5), (12, 15)),
+    "sweep_288": ((1, 6), (2, 7), (10, 17))
+}
+thrust_steps = (5, 0.5, 0.05)   #ft/s velocity steps of the thrust required sweeps
+fake_xfoil = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_xfoil.py")
+
+#==============================================================================================#
+#Helpers
+
+#---Module Settings: sets module globals for the block and puts the old values back after
+@contextlib.contextmanager
+def module_settings(module, **settings):
+    saved = {name: getattr(module, name) for name in settings}
+    for name, value in settings.items():
+        setattr(module, name, value)
+    try:
+        yield module
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+#---Working Directory: runs the block in a new temporary directory, removed after
+@contextlib.contextmanager
+def scratch_directory():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix = "benchmark_") as directory:
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(cwd)
+
+#---Relative Difference: largest relative difference over every shared value (NaN equals NaN)
+def relative_difference(values, reference):
+    worst = 0.0
+    for name in reference:
+        if name not in values:
+            continue
+        value, ref = np.asarray(values[name], dtype = float), np.asarray(reference[name], dtype = float)
+        if value.shape != ref.shape:
+            return m.inf
+        same_nan = np.isnan(value) & np.isnan(ref)
+        if np.any(np.isnan(value) != np.isnan(ref)):
+            return m.inf
+        scale = np.maximum(np.abs(ref), 1e-12)
+        worst = max(worst, float(np.max(np.where(same_nan, 0.0, np.abs(value - ref)/scale), initial = 0.0)))
+    return worst
+
+#---Measure: (best seconds per run, values of the last run), the first run is a warm up
+#(imports, compiled kernels, caches) and is not timed
+def measure(run, repeats = repeats, min_time = min_time):
+    values = run()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            values = run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 2**20:
+            break
+        loops = min(2**20, max(2*loops, int(loops*min_time/max(elapsed, 1e-9)) + 1))
+    best = elapsed/loops
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            values = run()
+        best = min(best, (time.perf_counter() - start)/loops)
+    return best, values
+
+#==============================================================================================#
+#Benchmarks
+#Each one returns {"run": callable giving the values, "work": units of work per run, "unit",
+#"reference": callable giving reference values or None, "tolerance": against the reference}
+
+#---Atmosphere: the closed form on a 100,000 altitude array, reference is the scalar
+#troposphere/isothermal formulas thrust_required.rho used per altitude
+def atmosphere_benchmark():
+    from atmosphere import atmosphere, t_0, a, p_0, rho_0, tropopause
+    altitudes = np.linspace(0, 82000, 100000)
+
+    def run():
+        temperature, pressure, density, _, _ = atmosphere(altitudes)
+        return {"temperature": temperature[::1000], "pressure": pressure[::1000], "density": density[::1000]}
+
+    def reference():
+        rows = []
+        for h in altitudes[::1000]:
+            if h <= tropopause:
+                ratio = 1 + (a*h)/t_0
+                rows.append((t_0 + a*h, p_0*ratio**5.26, rho_0*ratio**4.26))
+            else:
+                rows.append((t_0 + a*tropopause, p_0*1.26*m.exp(-4.805e-5*h), rho_0*1.68*m.exp(-4.805e-5*h)))
+        temperature, pressure, density = (np.array(column) for column in zip(*rows))
+        return {"temperature": temperature, "pressure": pressure, "density": density}
+
+    return {"run": run, "work": len(altitudes), "unit": "altitudes", "reference": reference, "tolerance": 1e-12}
+
+#---Atmosphere Table: single altitude calls of the linear lookup table against the closed form
+def atmosphere_table_benchmark():
+    from atmosphere import atmosphere, AtmosphereTable
+    table = AtmosphereTable()
+    altitude = np.array([15000.0])
+
+    def run():
+        _, _, density, speed_of_sound, viscosity = table(altitude)
+        return {"density": density, "speed_of_sound": speed_of_sound, "viscosity": viscosity}
+
+    def reference():
+        _, _, density, speed_of_sound, viscosity = atmosphere(altitude)
+        return {"density": density, "speed_of_sound": speed_of_sound, "viscosity": viscosity}
+
+    return {"run": run, "work": 1, "unit": "calls", "reference": reference, "tolerance": 1e-5}
+
+#---Weight Estimation: one main.weight_estimation solve (compiled SymPy model) against
+#sympy.solve of the weight system with the parameters plugged in, as main solved it before the
+#model was compiled (the light aircraft root, the smaller W_0)
+def weight_estimation_benchmark():
+    import sympy
+    import main
+
+    def run():
+        sol_dict, ratio = main.weight_estimation()
+        return {**sol_dict, **ratio}
+
+    def reference():
+        equations, unknowns, inputs = main.weight_system()
+        values = {symbol: main.parameters[str(symbol)] for symbol in inputs}
+        solutions = sympy.solve([eq.subs(values) for eq in equations], unknowns, dict = True)
+        sol = {str(symbol): float(value) for symbol, value in min(solutions, key = lambda s: s[unknowns[0]]).items()}
+        sol["L_D-maxCruise"] = float(main.cruise_lift_to_drag(main.parameters["aspect_ratio"], main.parameters["swet_sref"]))
+        sol["L_D-maxLoiter"] = sol["L_D-maxCruise"]*0.866
+        ratio = {"W_empty/W_0": sol["W_empty"]/sol["W_0"], "W_fuel/W_0": sol["W_fuel"]/sol["W_0"],
+                 "W_6/W_0": sol["W_6"]/sol["W_0"]}
+        for i in range(1, 7):
+            ratio[f"W_{i}/W_{i - 1}"] = sol[f"W_{i}"]/sol[f"W_{i - 1}"]
+        return {**sol, **ratio}
+
+    return {"run": run, "work": 1, "unit": "solves", "reference": reference, "tolerance": 1e-9}
+
+#---Batch Sizing: a 1000 x 1000 aspect ratio x range trade study (main.trade_study), corners
+#against main.weight_estimation
+def batch_sizing_benchmark():
+    import main
+    aspect_ratios, ranges = np.linspace(6, 10, 1000), np.linspace(1e6, 2e6, 1000)
+    corners = [(0, 0), (0, -1), (-1, 0), (-1, -1), (500, 500)]
+
+    def run():
+        sol_dict, _ = main.trade_study(aspect_ratio = aspect_ratios, R = ranges)
+        return {key: np.array([sol_dict[key][corner] for corner in corners]) for key in ("W_0", "W_empty", "W_fuel")}
+
+    def reference():
+        rows = [main.weight_estimation({**main.parameters, "aspect_ratio": aspect_ratios[i], "R": ranges[j]})[0]
+                for i, j in corners]
+        return {key: np.array([row[key] for row in rows]) for key in ("W_0", "W_empty", "W_fuel")}
+
+    return {"run": run, "work": aspect_ratios.size*ranges.size, "unit": "sizings", "reference": reference, "tolerance": 1e-9}
+
+#---Initial Drag: one initial_drag solve (compiled model) against the closed forms of its
+#equations (cd0 = c_fe Swet/Sref, K = 1/(4 cd0 (L/D)^2), e = 1/(pi AR K))
+def initial_drag_benchmark():
+    import main
+    import initial_drag
+    weight_parm, stations = main.weight_stage(), initial_drag.airfoil_stations()
+
+    def run():
+        return initial_drag.initial_drag(weight_parm, stations)
+
+    def reference():
+        c = initial_drag.drag_constants
+        AR, L_D = weight_parm["aspect_ratio"], weight_parm["L_D-maxCruise"]
+        cd0 = c["c_fe"]*weight_parm["swet_sref"]
+        K_clean = 1/(4*cd0*L_D**2)
+        cl_max = 0.9*(sum(station["Cl"] for station in stations)/3 + 0.9)
+        return {"cd0": cd0, "K_clean": K_clean, "e_clean": 1/(m.pi*AR*K_clean), "cl_max": cl_max,
+                "cd0_TO": cd0 + c["cd0_LG"] + c["cd0_HLD_TO"], "cd0_landing": cd0 + c["cd0_LG"] + c["cd0_flaps_L"],
+                "K_to": 1/(m.pi*c["eTo_flaps"]*AR), "K_landing": 1/(m.pi*c["eLanding_flaps"]*AR)}
+
+    return {"run": run, "work": 1, "unit": "solves", "reference": reference, "tolerance": 1e-12}
+
+#---Thrust Required: thrust_required_sweep at a velocity step, against the per velocity loop of
+#dynamic_pressure, c_l, c_di and c_d the script used to run
+def thrust_required_benchmark(time_step):
+    import thrust_required as tr
+
+    def run():
+        sweep = tr.thrust_required_sweep(tr.param, time_step = time_step)
+        return {key: sweep[key] for key in ("c_lift", "thrust_required", "V_md", "T_min", "V_mp", "P_min")}
+
+    def reference():
+        _, _, density = tr.rho(tr.param["altitude"])
+        S, W = tr.param["Wing Area"], tr.param["Gross Weight"]
+        c_lift, thrust = [], []
+        for velocity in np.arange(tr.start, tr.end, time_step):
+            q = tr.dynamic_pressure(density, velocity)
+            cl = tr.c_l(q, S, W)
+            c_lift.append(cl)
+            thrust.append(tr.c_d(tr.param["C_d0"], tr.c_di(tr.param["k"], cl))*q*S)
+        return {"c_lift": c_lift, "thrust_required": thrust}
+
+    n = len(np.arange(tr.start, tr.end, time_step))
+    return {"run": run, "work": n, "unit": "velocities", "reference": reference, "tolerance": 1e-12}
+
+#---Polar Text: a fake_xfoil PACC polar file, rows of alpha, CL, CD, CDp, CM, Top_Xtr, Bot_Xtr
+def polar_text(airfoil_code, alphas, reynolds_number, mach_number, ncrit):
+    import fake_xfoil
+    text = io.StringIO()
+    fake_xfoil.write_polar_header(text, airfoil_code, reynolds_number, mach_number, ncrit)
+    for alpha in alphas:
+        text.write("  %7.3f %8.4f %9.5f %9.5f %8.4f %8.4f %8.4f\n"
+                   % fake_xfoil.polar_point(airfoil_code, float(alpha), reynolds_number, mach_number, True))
+    return text.getvalue()
+
+#---Polar Parse: polar_parser.load_polar on a 100,000 row polar file, against a row by row parse
+def polar_parse_benchmark():
+    import polar_parser
+    directory = tempfile.mkdtemp(prefix = "benchmark_")
+    polar_file = os.path.join(directory, "NACA2412.txt")
+    with open(polar_file, "w") as f:
+        f.write(polar_text("2412", np.tile(np.arange(-5, 20, 0.25), 1000), 5153748, 0.3, 3))
+    size = os.path.getsize(polar_file)
+
+    def run():
+        return {"polar": polar_parser.load_polar(polar_file)}
+
+    def reference():
+        rows = []
+        with open(polar_file, "r") as f:
+            lines = f.readlines()
+        for line in lines[lines.index(next(line for line in lines if line.strip().startswith("------"))) + 1:]:
+            rows.append([float(token) for token in line.split()[:5]])
+        return {"polar": rows}
+
+    return {"run": run, "work": size/1e6, "unit": "MB", "reference": reference, "tolerance": 0.0,
+            "cleanup": lambda: (os.remove(polar_file), os.rmdir(directory))}
+
+#---Mission: 1000 simulated missions over a W_0 range, the cruise fraction against the
+#Breguet W_3/W_2 in main (same L/D, so it matches for every W_0)
+def mission_benchmark():
+    import main
+    import initial_drag
+    import thrust_required
+    import mission_simulator
+    weight, polar = main.weight_stage(), initial_drag.drag_stage()
+    W_0 = np.linspace(0.9, 1.1, 1000)*weight["W_0"]
+
+    def run():
+        flown = mission_simulator.fly_mission(W_0, thrust_required.param["Wing Area"], polar["cd0"], polar["K_clean"], main.parameters)
+        return {"W_3/W_2": flown["W_3/W_2"], "W_6/W_0": flown["W_6/W_0"][::100]}
+
+    def reference():
+        return {"W_3/W_2": np.full(W_0.shape, weight["W_3/W_2"])}
+
+    return {"run": run, "work": len(W_0), "unit": "missions", "reference": reference, "tolerance": 1e-6}
+
+#---Constraint Diagram: 1000 cd0 variants, against one scalar diagram per sampled variant
+def constraint_diagram_benchmark():
+    import constraint_diagram
+    polar, n_p = constraint_diagram.design_polar()
+    cd0 = np.linspace(0.8, 1.2, 1000)*polar["cd0"]
+    samples = slice(0, None, 111)
+
+    def run():
+        diagram = constraint_diagram.constraint_diagram({**polar, "cd0": cd0}, n_p, raster = False)
+        return {"design_wing_loading": diagram["design_wing_loading"][samples],
+                "design_power_loading": diagram["design_power_loading"][samples]}
+
+    def reference():
+        diagrams = [constraint_diagram.constraint_diagram({**polar, "cd0": value}, n_p, raster = False) for value in cd0[samples]]
+        return {name: np.array([float(diagram[name]) for diagram in diagrams])
+                for name in ("design_wing_loading", "design_power_loading")}
+
+    return {"run": run, "work": len(cd0), "unit": "diagrams", "reference": reference, "tolerance": 1e-12}
+
+#---Lifting Line: 1000 taper x twist wings, against one wing at a time for sampled wings
+def lifting_line_benchmark():
+    import main
+    import initial_drag
+    import wing_solver
+    code = initial_drag.selected_airfoil.replace("NACA", "")
+    sections = {station: wing_solver.thin_airfoil_section(code, cl) for station, cl in initial_drag.station_cl.items()}
+    taper, twist = np.meshgrid(np.linspace(0.3, 1.0, 40), np.linspace(-4, 0, 25), indexing = "ij")
+    taper, twist = taper.ravel(), twist.ravel()
+    AR = main.parameters["aspect_ratio"]
+    samples = slice(0, None, 97)
+
+    def run():
+        wing = wing_solver.lifting_line(AR, taper, twist, sections, 5.0)
+        return {name: wing[name][samples] for name in ("e", "CL_max", "CL_alpha")}
+
+    def reference():
+        wings = [wing_solver.lifting_line(AR, t, w, sections, 5.0) for t, w in zip(taper[samples], twist[samples])]
+        return {name: np.array([float(wing[name]) for wing in wings]) for name in ("e", "CL_max", "CL_alpha")}
+
+    return {"run": run, "work": len(taper), "unit": "wings", "reference": reference, "tolerance": 1e-9}
+
+#---Sizing Loop: one coupled weight/drag/airfoil sizing solve (no polar database), the memo is
+#cleared every run so each run does the whole solve
+def sizing_loop_benchmark():
+    import sizing_loop
+
+    def run():
+        for stage in sizing_loop.stages.values():
+            stage.memo.clear()
+        sized = sizing_loop.size_aircraft()
+        return {"W_0": sized["W_0"], "S": sized["S"], "W_fuel": sized["W_fuel"], "iterations": sized["iterations"]}
+
+    return {"run": run, "work": 1, "unit": "solves", "reference": None, "tolerance": 0.0}
+
+#---Row Metrics: the csv metrics of a polar file read row by row with the stall cut the sweep
+#used before polar_parser (up to cl max, through the stall, stop when cl rises again)
+def row_metrics(polar_file, t):
+    with open(polar_file, "r") as f:
+        lines = f.readlines()
+    data = []
+    stall_trigger = False
+    post_stall_error = False
+    for i in range(len(lines) - 1):
+        tokens_current = lines[i].strip().split()
+        tokens_next = lines[i+1].strip().split()
+        if len(tokens_current) == 7 and len(tokens_next) == 7:
+            try:
+                alpha, cl, cd, cdp, cm = (float(token) for token in tokens_current[:5])
+                next_cl = float(tokens_next[1])
+            except ValueError:
+                continue
+            if not stall_trigger and not post_stall_error:
+                data.append((alpha, cl, cd, cdp, cm, cl/cd))
+                if cl >= next_cl:
+                    stall_trigger = True
+            elif stall_trigger and not post_stall_error:
+                data.append((alpha, cl, cd, cdp, cm, cl/cd))
+                if cl < next_cl:
+                    post_stall_error = True
+            else:
+                break
+
+    cl_max = max(data, key = lambda x: x[1])
+    L_Dmax = max(data, key = lambda x: x[5])
+    return [cl_max[1], min(data, key = lambda x: x[2])[2], L_Dmax[5], min(data, key = lambda x: x[4])[4],
+            t, cl_max[0] - L_Dmax[0]]
+
+#---Airfoil Sweep: airfoil_optimization.run_sweep on fake_xfoil in an empty directory (no polar
+#cache or journal), the csv metrics against row_metrics of the same polars
+def sweep_benchmark(camber, camber_location, thickness):
+    import airfoil_optimization as sweep
+    settings = {"solver": "xfoil", "alpha_mode": "fixed", "search_mode": "grid", "persistent_xfoil": True,
+                "xfoil_command": [sys.executable, fake_xfoil],
+                "camber_min": camber[0], "camber_max": camber[1],
+                "camber_location_min": camber_location[0], "camber_location_max": camber_location[1],
+                "thickness_min": thickness[0], "thickness_max": thickness[1]}
+    with module_settings(sweep, **settings):
+        cases = sweep.naca_cases()
+
+    def run():
+        with module_settings(sweep, **settings), scratch_directory(), contextlib.redirect_stdout(io.StringIO()):
+            scored = sweep.run_sweep()
+            metrics = np.loadtxt(sweep.file_name, delimiter = ",", skiprows = 1, usecols = range(1, 7), ndmin = 2)
+        order = np.argsort(scored["Airfoil"])
+        return {"metrics": metrics, "total_score": np.asarray(scored["Total Score"], dtype = float)[order]}
+
+    def reference():
+        rows = []
+        with module_settings(sweep, **settings), scratch_directory():
+            for airfoil_code, airfoil_name, t in cases:
+                with open(f"{airfoil_name}.txt", "w") as f:
+                    f.write(polar_text(airfoil_code, sweep.alpha_sequence(), sweep.reynolds_number, sweep.mach_number, sweep.ncrit))
+                rows.append(row_metrics(f"{airfoil_name}.txt", t))
+        return {"metrics": rows}
+
+    return {"run": run, "work": len(cases), "unit": "airfoils", "reference": reference, "tolerance": 0.0,
+            "repeats": sweep_repeats, "min_time": 0.0}
+
+#---Benchmark Suite: {name: builder}, builders are only called for the benchmarks that run
+def benchmark_suite():
+    suite = {
+        "atmosphere": atmosphere_benchmark,
+        "atmosphere_table": atmosphere_table_benchmark,
+        "weight_estimation": weight_estimation_benchmark,
+        "batch_sizing": batch_sizing_benchmark,
+        "initial_drag": initial_drag_benchmark
+    }
+    for step in thrust_steps:
+        n = len(np.arange(0, 600, step))
+        suite[f"thrust_required_{n}"] = lambda step = step: thrust_required_benchmark(step)
+    suite.update({
+        "polar_parse": polar_parse_benchmark,
+        "mission": mission_benchmark,
+        "constraint_diagram": constraint_diagram_benchmark,
+        "lifting_line": lifting_line_benchmark,
+        "sizing_loop": sizing_loop_benchmark
+    })
+    for name, ranges in sweep_sizes.items():
+        suite[name] = lambda ranges = ranges: sweep_benchmark(*ranges)
+    return suite
+
+#==============================================================================================#
+#Run and Compare
+
+#---JSON Values: NumPy values as floats or nested lists for the baseline file, arrays over
+#record_size values only as "name[sum]" and "name[sum2]"
+def json_values(values):
+    recorded = {}
+    for name, value in values.items():
+        value = np.asarray(value)
+        if value.dtype.kind not in "biuf":
+            continue
+        value = value.astype(float)
+        if value.size > record_size:
+            recorded[f"{name}[sum]"] = float(np.sum(value))
+            recorded[f"{name}[sum2]"] = float(np.sum(value**2))
+        else:
+            recorded[name] = value.tolist()
+    return recorded
+
+#---Run Benchmarks: {name: {"seconds", "rate", "unit", "reference_difference", "values"}}
+#names limits the run to the benchmarks starting with one of them
+def run_benchmarks(names = None):
+    results = {}
+    for name, build in benchmark_suite().items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        spec = build()
+        try:
+            seconds, values = measure(spec["run"], spec.get("repeats", repeats), spec.get("min_time", min_time))
+            difference = None
+            if spec["reference"] is not None:
+                difference = relative_difference(values, spec["reference"]())
+        finally:
+            if "cleanup" in spec:
+                spec["cleanup"]()
+        results[name] = {
+            "seconds": seconds,
+            "rate": spec["work"]/seconds,
+            "unit": spec["unit"],
+            "tolerance": spec["tolerance"],
+            "reference_difference": difference,
+            "values": json_values(values)
+        }
+    return results
+
+#---Machine: what the timings were taken on
+def machine():
+    return {"platform": platform.platform(), "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version(), "numpy": np.__version__}
+
+#---Record Baseline: writes the results and machine to baseline_file
+def record_baseline(results, file_name = None):
+    file_name = baseline_file if file_name is None else file_name
+    with open(file_name, "w") as f:
+        json.dump({"machine": machine(), "results": results}, f, indent = 1)
+
+#---Load Baseline: the recorded baseline, None if there is none
+def load_baseline(file_name = None):
+    file_name = baseline_file if file_name is None else file_name
+    if not os.path.exists(file_name):
+        return None
+    with open(file_name, "r") as f:
+        return json.load(f)
+
+#---Compare: one row per benchmark (name, status, ratio, ...) and the list of problems
+#status is "slower" when the time per run is over slowdown_threshold x the baseline, "faster"
+#under 1/slowdown_threshold, "new" without a baseline entry
+def compare(results, baseline, threshold = None, tolerance = None):
+    threshold = slowdown_threshold if threshold is None else threshold
+    tolerance = baseline_tolerance if tolerance is None else tolerance
+    recorded = (baseline or {}).get("results", {})
+    rows, problems = [], []
+    for name, result in results.items():
+        base = recorded.get(name)
+        ratio, status = m.nan, "new"
+        if base is not None:
+            ratio = result["seconds"]/base["seconds"]
+            status = "slower" if ratio > threshold else "faster" if ratio < 1/threshold else "ok"
+            if status == "slower":
+                problems.append(f"{name} is {ratio:.2f}x slower than the baseline")
+            changed = relative_difference(result["values"], base["values"])
+            if changed > tolerance:
+                problems.append(f"{name} values differ from the baseline by {changed:.3e}")
+        difference = result["reference_difference"]
+        if difference is not None and difference > result["tolerance"]:
+            problems.append(f"{name} differs from its reference by {difference:.3e}")
+        rows.append([name, result["rate"], f"{result['unit']}/s",
+                     base["rate"] if base is not None else m.nan, ratio, status,
+                     "-" if difference is None else f"{difference:.1e}"])
+    return rows, problems
+
+#==============================================================================================#
+#Report: timings against the baseline, True when nothing got slower or changed
+def print_report(names = None, record = False):
+    from tabulate import tabulate
+
+    baseline = load_baseline()
+    results = run_benchmarks(names)
+    rows, problems = compare(results, baseline)
+    print(tabulate(rows, headers = ("Benchmark", "Rate", "Unit", "Baseline", "Time ratio", "Status", "Reference diff"),
+                   floatfmt = ".4g"))
+    if baseline is not None:
+        print(f"Baseline: {baseline['machine']['platform']}, Python {baseline['machine']['python']}, "
+              f"NumPy {baseline['machine']['numpy']}")
+    for problem in problems:
+        print(f"ERROR: {problem}")
+
+    if record or baseline is None:
+        if baseline is not None:
+            #Benchmarks that were not run keep their recorded entries
+            results = {**baseline["results"], **results}
+        record_baseline(results)
+        print(f"Baseline recorded: {baseline_file}")
+    return not problems
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    ok = print_report([name for name in arguments if name != "--record"] or None, "--record" in arguments)
+    sys.exit(0 if ok else 1)
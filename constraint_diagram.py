@@ -0,0 +1,165 @@
+import numpy as np
+from atmosphere import rho_0
+from thrust_required import rho
+from mission_simulator import power_lapse
+
+#Constraint Diagram
+#Sizing constraints over wing loading W/S (lb/ft^2) x power loading P/W (sea level shaft
+#ft lbf/s per lb of W_0, the mission_simulator power_loading, 550 = 1 hp/lb) with the
+#initial_drag polars and n_p from main.parameters:
+#   stall           W/S <= 0.5 rho_0 V_s^2 cl_max
+#   landing         W/S <= (S_L - S_a)*cl_max/80 (Raymer, field length in ft)
+#   takeoff         ground roll at cd0_TO + K_to cl_flapTO^2, lift off at 1.1 V_s (Gudmundsson)
+#   balked landing  climb gradient at 1.3 V_s on the landing polar
+#   climb           sea level rate of climb at the best rate of climb speed
+#   cruise          cruise speed at altitude and cruise throttle on the clean polar
+#   ceiling         service ceiling rate of climb
+#Every polar entry, n_p and requirement can be a NumPy array of parameter variants, the
+#curves broadcast as (variants..., wing loading) and the raster as (variants..., W/S, P/W)
+#The design point is the lowest power loading on the required envelope inside the wing
+#loading limits
+
+g = 32.174                      #ft/s^2
+
+requirements = {
+    "stall_speed"           :  103,    #ft/s (61 kt, FAR 23)
+    "landing_distance"      : 1500,    #ft over a 50 ft obstacle
+    "approach_allowance"    :  600,    #S_a, ft (general aviation)
+    "takeoff_ground_roll"   : 1000,    #ft
+    "runway_friction"       : 0.04,
+    "balked_landing_gradient": 0.033,
+    "climb_rate"            : 13.3,    #ft/s (800 ft/min) at sea level
+    "cruise_altitude"       : 15000,   #ft (thrust_required.param)
+    "cruise_speed"          : 220,     #ft/s
+    "cruise_throttle"       : 0.75,
+    "ceiling"               : 18000,   #ft
+    "ceiling_climb_rate"    : 1.67     #ft/s (100 ft/min)
+}
+power_constraints = ("takeoff", "balked_landing", "climb", "cruise", "ceiling")
+wing_loading_constraints = ("stall", "landing")
+
+#==============================================================================================#
+#Functions
+
+#---Variant: a polar or requirement value with a trailing axis for the wing loading grid
+def variant(value):
+    return np.asarray(value, dtype = float)[..., None]
+
+#---Climb Power: P/W for a rate of climb at the best rate of climb speed, density rho
+def climb_power(wing_loading, density, cd0, K, n_p, climb_rate):
+    V = np.sqrt(2*wing_loading/density*np.sqrt(K/(3*cd0)))
+    q = 0.5*density*V**2
+    return (climb_rate + V*(q*cd0/wing_loading + K*wing_loading/q))/n_p
+
+#---Constraint Curves: ({name: required P/W over wing_loading}, {name: largest W/S})
+def constraint_curves(wing_loading, polar, n_p, requirements = requirements):
+    WS = np.asarray(wing_loading, dtype = float)
+    p = {name: variant(value) for name, value in polar.items()}
+    r = {name: variant(value) for name, value in requirements.items()}
+    n_p = variant(n_p)
+
+    #Takeoff: ground roll with the takeoff polar, prop thrust at V_LOF/sqrt(2)
+    V_LOF = 1.1*np.sqrt(2*WS/(rho_0*p["cl_max"]))
+    q = 0.5*rho_0*(V_LOF/np.sqrt(2))**2
+    cd_TO = p["cd0_TO"] + p["K_to"]*p["cl_flapTO"]**2
+    T_W = (V_LOF**2/(2*g*r["takeoff_ground_roll"]) + q*cd_TO/WS
+           + r["runway_friction"]*(1 - q*p["cl_flapTO"]/WS))
+    takeoff = T_W*V_LOF/np.sqrt(2)/n_p
+
+    #Balked landing: climb gradient at 1.3 V_s with the landing polar
+    cl_approach = p["cl_max"]/1.3**2
+    V_approach = np.sqrt(2*WS/(rho_0*cl_approach))
+    D_W = (p["cd0_landing"] + p["K_landing"]*cl_approach**2)/cl_approach
+    balked_landing = (r["balked_landing_gradient"] + D_W)*V_approach/n_p
+
+    #Cruise at altitude, the sea level power is lapsed and throttled back
+    _, _, density = rho(r["cruise_altitude"])
+    q = 0.5*density*r["cruise_speed"]**2
+    cruise = (r["cruise_speed"]*(q*p["cd0"]/WS + p["K_clean"]*WS/q)
+              /(n_p*power_lapse(density)*r["cruise_throttle"]))
+
+    _, _, density_ceiling = rho(r["ceiling"])
+    curves = {
+        "takeoff": takeoff,
+        "balked_landing": balked_landing,
+        "climb": climb_power(WS, rho_0, p["cd0"], p["K_clean"], n_p, r["climb_rate"]),
+        "cruise": cruise,
+        "ceiling": climb_power(WS, density_ceiling, p["cd0"], p["K_clean"], n_p, r["ceiling_climb_rate"])
+                   /power_lapse(density_ceiling)
+    }
+    limits = {
+        "stall": 0.5*rho_0*r["stall_speed"][..., 0]**2*p["cl_max"][..., 0],
+        "landing": (r["landing_distance"][..., 0] - r["approach_allowance"][..., 0])*p["cl_max"][..., 0]/80
+    }
+    return curves, limits
+
+#---Constraint Diagram: curves, envelope, design point and (raster = True) the feasible region
+#polar holds cd0, K_clean, cd0_TO, K_to, cl_flapTO, cd0_landing, K_landing and cl_max
+def constraint_diagram(polar, n_p, requirements = requirements, wing_loading = np.linspace(5, 60, 221),
+                       power_loading = np.linspace(0, 110, 221), raster = True):
+    WS, PW = np.asarray(wing_loading, dtype = float), np.asarray(power_loading, dtype = float)
+    curves, limits = constraint_curves(WS, polar, n_p, requirements)
+
+    required = np.stack(np.broadcast_arrays(*(curves[name] for name in power_constraints)), axis = -1)
+    envelope = required.max(axis = -1)
+    max_WS = np.minimum(*np.broadcast_arrays(*(limits[name] for name in wing_loading_constraints)))
+    inside = WS <= max_WS[..., None]
+
+    #Design point: lowest required P/W among the wing loadings inside the limits
+    candidates = np.where(inside, envelope, np.inf)
+    i = np.argmin(candidates, axis = -1)[..., None]
+    found = np.isfinite(np.take_along_axis(candidates, i, axis = -1)[..., 0])
+    result = {
+        "wing_loading": WS,
+        "power_loading": PW,
+        "curves": curves,
+        "limits": limits,
+        "envelope": envelope,
+        "active": np.argmax(required, axis = -1),       #index into power_constraints
+        "max_wing_loading": max_WS,
+        "design_wing_loading": np.where(found, np.take_along_axis(np.broadcast_to(WS, candidates.shape), i, axis = -1)[..., 0], np.nan),
+        "design_power_loading": np.where(found, np.take_along_axis(candidates, i, axis = -1)[..., 0], np.nan)
+    }
+    if raster:
+        result["feasible"] = inside[..., None] & (PW >= envelope[..., None])
+    return result
+
+#---Design Polar: the initial_drag polars and n_p of the current design
+def design_polar():
+    import main
+    import initial_drag
+    solution = initial_drag.drag_stage()
+    keys = ("cd0", "K_clean", "cd0_TO", "K_to", "cl_flapTO", "cd0_landing", "K_landing", "cl_max")
+    return {key: solution[key] for key in keys}, main.parameters["n_p"]
+
+#==============================================================================================#
+#Report: design point and the constraint diagram plot
+def print_report():
+    import matplotlib.pyplot as plt
+
+    polar, n_p = design_polar()
+    diagram = constraint_diagram(polar, n_p)
+    WS, PW = diagram["wing_loading"], diagram["power_loading"]
+    print(f"Design point: W/S = {float(diagram['design_wing_loading']):.2f} lb/ft^2, "
+          f"P/W = {float(diagram['design_power_loading']):.2f} ft lbf/s/lb "
+          f"({float(diagram['design_power_loading'])/550:.4f} hp/lb)")
+    for name, limit in diagram["limits"].items():
+        print(f"{name} limit: W/S <= {float(limit):.2f} lb/ft^2")
+
+    plt.figure(figsize=(10,6))
+    plt.contourf(WS, PW, diagram["feasible"].T, levels = [0.5, 1], colors = ['lightgreen'], alpha = 0.5)
+    for name, curve in diagram["curves"].items():
+        plt.plot(WS, curve, label = name)
+    for name, limit in diagram["limits"].items():
+        plt.axvline(float(limit), linestyle = '--', label = name)
+    plt.scatter([diagram["design_wing_loading"]], [diagram["design_power_loading"]], color = 'red', zorder = 5, label = 'Design Point')
+    plt.ylim(PW[0], PW[-1])
+    plt.xlabel("Wing Loading W/S (lb/ft^2)")
+    plt.ylabel("Power Loading P/W (ft lbf/s/lb)")
+    plt.title("Constraint Diagram")
+    plt.grid(True)
+    plt.legend()
+    plt.show()
+
+if __name__ == "__main__":
+    print_report()
@@ -0,0 +1,195 @@
+import hashlib
+import pickle
+from collections import OrderedDict
+
+#Design Pipeline
+#The design stages as a small dependency graph: each stage declares the keys it consumes and
+#the keys it produces, a key is either a pipeline input or produced by exactly one stage
+#get(key) runs only the stages that key depends on, each stage keeps a memo of its outputs
+#keyed by a fingerprint of the values it consumed, so after set(aspect_ratio = 8) the weight
+#and drag stages rerun and the airfoil and thrust stages come straight from the memo
+#Stages with memo = False always run (cheap file reads), what they produce is still
+#fingerprinted by the stages downstream
+
+weight_keys = ("W_0", "W_1", "W_2", "W_3", "W_4", "W_5", "W_6", "W_crew", "W_empty", "W_fuel", "W_payload",
+               "L_D-maxCruise", "L_D-maxLoiter",
+               "W_empty/W_0", "W_fuel/W_0", "W_1/W_0", "W_2/W_1", "W_3/W_2", "W_4/W_3", "W_5/W_4", "W_6/W_5",
+               "Fuel_Density_AVGAS100LL_lb/gal", "Fuel_Volume_gal", "W_6/W_0")
+drag_keys = ("K_clean", "K_landing", "K_to", "c_fe", "cd0", "cd0_HLD_TO", "cd0_LG", "cd0_TO", "cd0_flaps_L",
+             "cd0_landing", "cl_c", "cl_flapTO", "cl_max", "cl_maxave", "cl_maxhld", "cl_rotation",
+             "eLanding_flaps", "eTo_flaps", "e_clean")
+thrust_inputs = ("altitude", "Wing Area", "Gross Weight", "C_d0", "k")
+thrust_keys = ("Density", "velocity", "c_lift", "induced", "parasitic", "thrust_required", "V_md", "T_min", "V_mp", "P_min")
+sweep_controls = ("panel", "reynolds_number", "mach_number", "number_itterations", "ncrit",
+                  "alpha_start", "alpha_end", "alpha_step", "alpha_mode", "solver", "search_mode",
+                  "camber_min", "camber_max", "camber_location_min", "camber_location_max",
+                  "thickness_min", "thickness_max", "ideal_tc", "deviation_tc")
+
+#==============================================================================================#
+#Pipeline
+
+class Stage:
+    def __init__(self, name, consumes, produces, function, memo = True):
+        self.name = name
+        self.consumes = tuple(consumes)
+        self.produces = tuple(produces)
+        self.function = function
+        self.memo = memo
+
+#---Fingerprint: sha256 of the consumed values (floats, strings, dicts, NumPy arrays)
+def fingerprint(values):
+    return hashlib.sha256(pickle.dumps(sorted(values.items(), key = lambda item: item[0]))).hexdigest()
+
+class DesignPipeline:
+    def __init__(self, stages, inputs, max_memo = 64):
+        self.inputs = dict(inputs)
+        self.stages = {stage.name: stage for stage in stages}
+        self.producer = {}
+        for stage in stages:
+            for key in stage.produces:
+                if key in self.producer or key in self.inputs:
+                    raise ValueError(f"{key} is produced by more than one source")
+                self.producer[key] = stage
+        for stage in stages:
+            for key in stage.consumes:
+                if key not in self.producer and key not in self.inputs:
+                    raise ValueError(f"stage {stage.name} consumes {key}, which nothing provides")
+        self.max_memo = max_memo
+        self.memo = {name: OrderedDict() for name in self.stages}
+        self.runs = {name: 0 for name in self.stages}
+
+    #---Set: changes inputs, nothing runs until a key is asked for
+    def set(self, **changes):
+        for key in changes:
+            if key not in self.inputs:
+                raise KeyError(f"{key} is not a pipeline input")
+        self.inputs.update(changes)
+
+    #---Get: within one call every stage runs (or is looked up) at most once
+    def get(self, key):
+        return self.value(key, (), {})
+
+    def values(self, *keys):
+        resolved = {}
+        return {key: self.value(key, (), resolved) for key in keys}
+
+    def value(self, key, visiting, resolved):
+        if key in self.inputs:
+            return self.inputs[key]
+        if key not in self.producer:
+            raise KeyError(f"{key} is not an input or a stage output")
+        stage = self.producer[key]
+        if stage.name not in resolved:
+            resolved[stage.name] = self.run_stage(stage, visiting, resolved)
+        return resolved[stage.name][key]
+
+    def run_stage(self, stage, visiting, resolved):
+        if stage.name in visiting:
+            raise ValueError(f"stage {stage.name} depends on itself")
+        values = {key: self.value(key, visiting + (stage.name,), resolved) for key in stage.consumes}
+        memo = self.memo[stage.name]
+        key = fingerprint(values)
+        if stage.memo and key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+
+        outputs = stage.function(values)
+        self.runs[stage.name] += 1
+        missing = [name for name in stage.produces if name not in outputs]
+        if missing:
+            raise ValueError(f"stage {stage.name} did not produce {', '.join(missing)}")
+        if stage.memo:
+            memo[key] = outputs
+            while len(memo) > self.max_memo:
+                memo.popitem(last = False)
+        return outputs
+
+    #---Downstream: names of the stages that change when key changes
+    def downstream(self, key):
+        changed, names = {key}, []
+        grew = True
+        while grew:
+            grew = False
+            for stage in self.stages.values():
+                if stage.name not in names and changed.intersection(stage.consumes):
+                    names.append(stage.name)
+                    changed.update(stage.produces)
+                    grew = True
+        return names
+
+#==============================================================================================#
+#Stages
+
+def weight_stage(values):
+    import main
+    sol_dict, ratio = main.weight_estimation(values)
+    return {**sol_dict, **ratio}
+
+def drag_stage(values):
+    import initial_drag
+    stations = tuple({'Cl': values[f"cl_{station}"]} for station in ("root", "mid", "tip"))
+    return initial_drag.initial_drag(weight_parm = values, stations = stations)
+
+def scores_file_stage(values):
+    from airfoil_scoring import load_scored_table
+    return {"airfoil_scores": load_scored_table(values["scored_file"])}
+
+def sweep_stage(values):
+    import airfoil_optimization
+    #The sweep controls are module globals, they are put back after the run so the next
+    #pipeline run (or a sweep outside the pipeline) starts from the module defaults
+    saved = {name: getattr(airfoil_optimization, name) for name in values}
+    for name, value in values.items():
+        setattr(airfoil_optimization, name, value)
+    try:
+        scored = airfoil_optimization.run_sweep()
+    finally:
+        for name, value in saved.items():
+            setattr(airfoil_optimization, name, value)
+    if scored is None:
+        raise ValueError("airfoil sweep did not run")
+    return {"airfoil_scores": scored}
+
+#---Stations: the selected airfoil's scores and the section Cl at root, mid and tip
+def stations_stage(values):
+    import initial_drag
+    table = values["airfoil_scores"]
+    rows = [i for i, name in enumerate(table.get("Airfoil", ())) if name == values["selected_airfoil"]]
+    if rows:
+        score = {name: column[rows[0]] for name, column in table.items()}
+    else:
+        score = dict(initial_drag.default_airfoil_score, Airfoil = values["selected_airfoil"])
+    station_cl = values["station_cl"]
+    return {"airfoil_score": score, "cl_root": station_cl["root"], "cl_mid": station_cl["mid"], "cl_tip": station_cl["tip"]}
+
+def thrust_stage(values):
+    import thrust_required
+    return thrust_required.thrust_required_sweep(values)
+
+#---Default Pipeline: weight sizing, airfoil scores, drag polar and thrust required with the
+#inputs the scripts use today
+#run_sweep = False reads the scores airfoil_optimization already wrote, True runs the sweep
+#(XFOIL or the panel solver) as a stage with its sim controls as inputs
+def default_pipeline(run_sweep = False):
+    import main
+    import initial_drag
+    import thrust_required
+
+    inputs = {**main.parameters,
+              **{key: thrust_required.param[key] for key in thrust_inputs},
+              "selected_airfoil": initial_drag.selected_airfoil,
+              "station_cl": dict(initial_drag.station_cl)}
+    stages = [
+        Stage("weight", main.parameters, weight_keys, weight_stage),
+        Stage("drag", ("L_D-maxCruise", "aspect_ratio", "swet_sref", "cl_root", "cl_mid", "cl_tip"), drag_keys, drag_stage),
+        Stage("stations", ("airfoil_scores", "selected_airfoil", "station_cl"), ("airfoil_score", "cl_root", "cl_mid", "cl_tip"), stations_stage),
+        Stage("thrust", thrust_inputs, thrust_keys, thrust_stage)
+    ]
+    if run_sweep:
+        import airfoil_optimization
+        inputs.update({name: getattr(airfoil_optimization, name) for name in sweep_controls})
+        stages.append(Stage("airfoil_sweep", sweep_controls, ("airfoil_scores",), sweep_stage))
+    else:
+        inputs["scored_file"] = "Airfoil_Scores.csv"
+        stages.append(Stage("airfoil_scores", ("scored_file",), ("airfoil_scores",), scores_file_stage, memo = False))
+    return DesignPipeline(stages, inputs)
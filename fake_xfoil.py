@@ -0,0 +1,183 @@
+import math as m
+import os
+import sys
+import time
+
+#Fake XFOIL
+#Scripted stand-in for xfoil.exe so sweeps can be run and timed on machines without it
+#Understands the subset of the XFOIL menus the sweep uses (NACA, LOAD, PPAR, OPER, VPAR, ITER,
+#VISC, RE, MACH, PACC, ASEQ, ALFA, INIT, QUIT) and writes PACC polar files in the XFOIL layout
+#ALFA prints the converged point the way XFOIL does at the end of its viscous iterations
+#LOADed files are identified by their name line (NACA<code>), the coordinates are not read
+#The polar is an analytic thin airfoil + parabolic drag model with a stall break, so the
+#output is deterministic for a given NACA code and flow condition
+#Run it as: xfoil_command = [sys.executable, os.path.abspath("fake_xfoil.py")]
+#FAKE_XFOIL_HANG / FAKE_XFOIL_CRASH: comma separated NACA codes that hang or crash in ASEQ or ALFA
+
+hang_codes = set(filter(None, os.environ.get("FAKE_XFOIL_HANG", "").split(",")))
+crash_codes = set(filter(None, os.environ.get("FAKE_XFOIL_CRASH", "").split(",")))
+
+#==============================================================================================#
+#Functions
+
+#---NACA Code: "2412" or a non-integer design "2.50_4.10_13.20", same convention as panel_solver
+def naca_parameters(airfoil_code):
+    if "_" in airfoil_code:
+        m, p, t = (float(value) for value in airfoil_code.split("_"))
+    else:
+        m, p, t = int(airfoil_code[0]), int(airfoil_code[1]), int(airfoil_code[2:])
+    return m/100, p/10, t/100
+
+#---Polar Point: alpha, CL, CD, CDp, CM, Top_Xtr, Bot_Xtr
+def polar_point(airfoil_code, alpha, reynolds_number, mach_number, viscous):
+    camber, camber_location, thickness = naca_parameters(airfoil_code)
+
+    alpha_0 = -100*camber
+    stall = 12 + 40*thickness + 50*camber
+    beta = m.sqrt(1 - mach_number**2)
+    if alpha <= stall:
+        cl = 0.11*(alpha - alpha_0)/beta
+    else:
+        cl = (0.11*(stall - alpha_0) - 0.06*(alpha - stall))/beta
+
+    cd, cdp = 0.0, 0.0
+    if viscous:
+        cd = (0.005 + 0.02*thickness)*(5e6/reynolds_number)**0.2 + 0.008*cl**2
+        if alpha > stall:
+            cd += 0.004*(alpha - stall)**2
+        cdp = 0.6*cd
+    cm = -0.025 - 0.25*camber - 0.01*camber_location
+    return alpha, cl, cd, cdp, cm, 0.5, 0.4
+
+def write_polar_header(f, airfoil_code, reynolds_number, mach_number, ncrit):
+    f.write(f"""
+       XFOIL         Version 6.99 (fake)
+
+ Calculated polar for: NACA {airfoil_code}
+
+ 1 1 Reynolds number fixed          Mach number fixed
+
+ xtrf =   1.000 (top)        1.000 (bottom)
+ Mach = {mach_number:7.3f}     Re = {reynolds_number/1e6:9.3f} e 6     Ncrit = {ncrit:7.3f}
+
+   alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr
+  ------ -------- --------- --------- -------- -------- --------
+""")
+
+def prompt(text):
+    sys.stdout.write(f"\n {text}  ")
+    sys.stdout.flush()
+
+def say(text):
+    sys.stdout.write(f" {text}\n")
+    sys.stdout.flush()
+
+#---Session: menu state machine fed one line at a time from stdin
+def main():
+    state = "top"
+    airfoil_code = None
+    reynolds_number, mach_number, ncrit = 0.0, 0.0, 9.0
+    viscous = False
+    polar_file = None
+
+    prompt("XFOIL   c>")
+    for raw in sys.stdin:
+        line = raw.strip()
+        tokens = line.split()
+        command = tokens[0].upper() if tokens else ""
+        args = tokens[1:]
+
+        if state == "top":
+            if command == "NACA":
+                airfoil_code = args[0]
+                say("Buffer airfoil set using 160 points")
+            elif command == "LOAD":
+                with open(args[0], "r") as coordinates:
+                    airfoil_code = coordinates.readline().strip()[len("NACA"):]
+                say(f"Labeled airfoil file.  Name:  NACA{airfoil_code}")
+            elif command == "PPAR":
+                state = "ppar"
+            elif command == "OPER":
+                state = "oper"
+            elif command == "QUIT":
+                break
+            elif command:
+                say(f"{command[:4]} command not recognized.  Type a \"?\" for command list")
+
+        elif state == "ppar":
+            if not command:
+                state = "top"
+
+        elif state == "vpar":
+            if command == "N":
+                ncrit = float(args[0])
+            elif not command:
+                state = "oper"
+
+        elif state == "visc_re":
+            reynolds_number = float(line)
+            state = "oper"
+
+        elif state == "pacc_file":
+            polar_file = open(line, "w")
+            write_polar_header(polar_file, airfoil_code, reynolds_number, mach_number, ncrit)
+            polar_file.flush()
+            state = "pacc_dump"
+
+        elif state == "pacc_dump":
+            state = "oper"
+
+        elif state == "oper":
+            if command == "VPAR":
+                state = "vpar"
+            elif command == "VISC":
+                viscous = not viscous
+                if viscous and args:
+                    reynolds_number = float(args[0])
+                elif viscous:
+                    state = "visc_re"
+            elif command == "RE":
+                reynolds_number = float(args[0])
+            elif command == "MACH":
+                mach_number = float(args[0])
+            elif command == "PACC":
+                if polar_file is None:
+                    state = "pacc_file"
+                else:
+                    polar_file.close()
+                    polar_file = None
+            elif command in ("ASEQ", "ALFA"):
+                if airfoil_code in crash_codes:
+                    sys.exit(1)
+                if airfoil_code in hang_codes:
+                    while True:
+                        time.sleep(60)
+                if command == "ALFA":
+                    alpha, cl, cd, cdp, cm = polar_point(airfoil_code, float(args[0]), reynolds_number, mach_number, viscous)[:5]
+                    say(f"      a = {alpha:7.3f}      CL = {cl:8.4f}")
+                    say(f"     Cm = {cm:8.4f}     CD = {cd:9.5f}   =>   CDf = {cd - cdp:9.5f}    CDp = {cdp:9.5f}")
+                    if polar_file is not None:
+                        polar_file.write("  %7.3f %8.4f %9.5f %9.5f %8.4f %8.4f %8.4f\n" % (alpha, cl, cd, cdp, cm, 0.5, 0.4))
+                        polar_file.flush()
+                else:
+                    alpha_start, alpha_end, alpha_step = (float(arg) for arg in args)
+                    n = int(round((alpha_end - alpha_start)/alpha_step)) + 1
+                    for i in range(n):
+                        point = polar_point(airfoil_code, alpha_start + i*alpha_step, reynolds_number, mach_number, viscous)
+                        if polar_file is not None:
+                            polar_file.write("  %7.3f %8.4f %9.5f %9.5f %8.4f %8.4f %8.4f\n" % point)
+                            polar_file.flush()
+            elif command == "INIT":
+                pass
+            elif not command:
+                state = "top"
+            else:
+                say(f"{command[:4]} command not recognized.  Type a \"?\" for command list")
+
+        prompt({"top": "XFOIL   c>", "oper": ".OPERv   c>"}.get(state, "c>"))
+
+    if polar_file is not None:
+        polar_file.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,20 @@
 import math as m
-import matplotlib.pyplot as plt
-from sympy import symbols,Eq,exp,solve
+from functools import lru_cache
+from sympy import symbols,Eq,exp
 import numpy as np
 from sympy import pi
-from tabulate import tabulate
-from main import weight_estimation_dict
+import main
+from airfoil_scoring import scored_airfoil
+import model_compiler
 
-#================================================================#
-weight_parm = weight_estimation_dict
 #================================================================#
 #Aifoils
-airfoil_root = {
-    'Airfoil': 'NACA3413', 
-    'Cl': 1.4, 
-    'Cd': 0.068, 
-    'L/Dmax': 0.11551777400717757, 
-    'Cm': 0.16, 
-    't/c': 0.16663377446214842, 
-    'AoA_margin': 0.17, 
-    'Total Score': 0.8402, 
-    'Rank': 1}
-
-airfoil_mid = {
-    'Airfoil': 'NACA3413', 
-    'Cl': 1.5, 
-    'Cd': 0.068, 
-    'L/Dmax': 0.11551777400717757, 
-    'Cm': 0.16, 
-    't/c': 0.16663377446214842, 
-    'AoA_margin': 0.17, 
-    'Total Score': 0.8402, 
-    'Rank': 1}
-
-airfoil_tip = {
-    'Airfoil': 'NACA3413', 
-    'Cl': 1.7, 
+#Scores come from Airfoil_Scores.csv written by airfoil_optimization.py, the values below are
+#only used until a sweep has been scored. Cl is the section Cl set for each station
+selected_airfoil = 'NACA3413'
+default_airfoil_score = {
+    'Airfoil': selected_airfoil, 
+    'Cl': 0.16, 
     'Cd': 0.068, 
     'L/Dmax': 0.11551777400717757, 
     'Cm': 0.16, 
@@ -42,33 +22,50 @@ airfoil_tip = {
     'AoA_margin': 0.17, 
     'Total Score': 0.8402, 
     'Rank': 1}
+station_cl = {'root': 1.4, 'mid': 1.5, 'tip': 1.7}
 
 #-----------------
 #Functions
-def initial_drag():
-    L_D = weight_parm["L_D-maxCruise"]
-    Aspect_Ratio = weight_parm["aspect_ratio"]
+
+#---Airfoil Stations: root, mid and tip dicts, the score file is read on first use
+@lru_cache(maxsize = None)
+def airfoil_stations():
+    airfoil_score = scored_airfoil(selected_airfoil, default = default_airfoil_score)
+    return tuple({**airfoil_score, 'Cl': station_cl[station]} for station in ('root', 'mid', 'tip'))
+
+#Estimated constants, inputs of the compiled model so they can be swept or sampled (monte_carlo)
+drag_constants = {
+    'c_fe': 0.0055,             #skin friction coefficient
+    'cd0_LG': 0.008,            #landing gear
+    'cd0_HLD_TO': 0.005,        #flaps at takeoff
+    'cd0_flaps_L': 0.06,        #flaps at landing
+    'eTo_flaps': 0.75,          #Oswald factors with flaps
+    'eLanding_flaps': 0.70}
+
+#---Drag System: (equations, unknowns, inputs), the inputs are L_D, aspect_ratio, swet_sref,
+#cl_root, cl_mid, cl_tip and the drag_constants
+def drag_system():
+    L_D, Aspect_Ratio, Swet_Sref = symbols(['L_D', 'aspect_ratio', 'swet_sref'], positive = True)
+    cl_root, cl_mid, cl_tip = symbols(['cl_root', 'cl_mid', 'cl_tip'], positive = True)
+    c_fe, cd0_LG, cd0_HLD_TO, cd0_flaps_L, eTo_flaps, eLanding_flaps = symbols(
+        ['c_fe', 'cd0_LG', 'cd0_HLD_TO', 'cd0_flaps_L', 'eTo_flaps', 'eLanding_flaps'], positive = True)
     
     #------------------------------------------
-    K_clean, K_to, K_landing,e_clean,eTo_flaps, eLanding_flaps= symbols(
-        ['K_clean', 'K_to', 'K_landing','e_clean', 'eTo_flaps', 'eLanding_flaps'])
+    K_clean, K_to, K_landing,e_clean = symbols(
+        ['K_clean', 'K_to', 'K_landing','e_clean'])
     
-    c_fe, cd0, cd0_LG, cd0_HLD_TO, cd0_TO,cd0_flaps_L, cd0_landing = symbols([
-        'c_fe', 'cd0', 'cd0_LG', 'cd0_HLD_TO', 'cd0_TO','cd0_flaps_L', 'cd0_landing'])
+    cd0, cd0_TO, cd0_landing = symbols([
+        'cd0', 'cd0_TO', 'cd0_landing'])
     
     cl_maxave, cl_maxhld, cl_max, cl_c, cl_flapTO, cl_rotation = symbols([
         'cl_maxave', 'cl_maxhld', 'cl_max', 'cl_c', 'cl_flapTO', 'cl_rotation'])  
 
     #Cd -------------------------------------------------
-    eq1  = Eq(c_fe, 0.0055)
-    eq2  = Eq(cd0,c_fe*(weight_parm["swet_sref"]))
-    eq3  = Eq(cd0_LG,0.008)
-    eq4  = Eq(cd0_HLD_TO, 0.005)
+    eq2  = Eq(cd0,c_fe*(Swet_Sref))
     eq5  = Eq(cd0_TO , cd0 + cd0_LG + cd0_HLD_TO)
-    eq6  = Eq(cd0_flaps_L, 0.06)
     eq7  = Eq(cd0_landing, cd0 + cd0_LG + cd0_flaps_L)
     #Cl -------------------------------------------------
-    eq8  = Eq(cl_maxave,np.average([airfoil_root['Cl'],airfoil_mid['Cl'],airfoil_tip['Cl']]))
+    eq8  = Eq(cl_maxave,(cl_root + cl_mid + cl_tip)/3)
     eq9  = Eq(cl_maxhld, 0.9)   #Utilize Plain Flap
     eq10 = Eq(cl_max, 0.9*(cl_maxave + cl_maxhld))
     eq11 = Eq(cl_c, 0.3)
@@ -77,18 +74,33 @@ def initial_drag():
     #k -------------------------------------------------
     eq14 = Eq(L_D,(1/(4*K_clean*cd0))**(1/2) )
     eq15 = Eq(K_clean,1/(pi*e_clean*Aspect_Ratio))
-    eq16 = Eq(eTo_flaps, 0.75)
-    eq17 = Eq(eLanding_flaps,0.70)
     eq18 = Eq(K_to,1/(pi*eTo_flaps*Aspect_Ratio))
     eq19 = Eq(K_landing,1/(pi*eLanding_flaps*Aspect_Ratio))
 
-    solution = solve([eq1,eq2,eq3, eq4, eq5, eq6, eq7, eq8, eq9, eq10, eq11, eq12, 
-                      eq13, eq14, eq15, eq16, eq17, eq18, eq19],[
-            K_clean, K_to, K_landing,e_clean,eTo_flaps, eLanding_flaps,
-             c_fe, cd0, cd0_LG, cd0_HLD_TO, cd0_TO,cd0_flaps_L, cd0_landing,
-               cl_maxave, cl_maxhld, cl_max, cl_c, cl_flapTO, cl_rotation], dict = True)[0]
+    return ([eq2, eq5, eq7, eq8, eq9, eq10, eq11, eq12, 
+                      eq13, eq14, eq15, eq18, eq19],[
+            K_clean, K_to, K_landing,e_clean,
+             cd0, cd0_TO, cd0_landing,
+               cl_maxave, cl_maxhld, cl_max, cl_c, cl_flapTO, cl_rotation],
+            [L_D, Aspect_Ratio, Swet_Sref, cl_root, cl_mid, cl_tip,
+             c_fe, cd0_LG, cd0_HLD_TO, cd0_flaps_L, eTo_flaps, eLanding_flaps])
+
+#---Drag Model: kernel(L_D, aspect_ratio, swet_sref, cl_root, cl_mid, cl_tip, **drag_constants)
+#The system is solved once and compiled (model_compiler), every input can be a NumPy array
+def drag_model():
+    return model_compiler.compile_model(*drag_system())
+
+#The values from the weight stage and the airfoil stations are plugged in after the solve
+#weight_parm and stations (root, mid, tip dicts) default to main.weight_stage and airfoil_stations
+def initial_drag(weight_parm = None, stations = None, constants = drag_constants):
+    weight_parm = main.weight_stage() if weight_parm is None else weight_parm
+    airfoil_root, airfoil_mid, airfoil_tip = airfoil_stations() if stations is None else stations
     
-    solution = {str(key): float(value.evalf()) for key, value in solution.items()}
+    solution = drag_model()(L_D = weight_parm["L_D-maxCruise"], aspect_ratio = weight_parm["aspect_ratio"],
+                      swet_sref = weight_parm["swet_sref"], cl_root = airfoil_root['Cl'],
+                      cl_mid = airfoil_mid['Cl'], cl_tip = airfoil_tip['Cl'], **constants)
+    solution = {key: float(value) for key, value in {**solution, **constants}.items()}
+    solution = dict(sorted(solution.items()))
 
     return solution
 
@@ -106,62 +118,84 @@ def list(parasitic_drag,k_constant):
     return cl_list,cd_list
 
 
+#---Drag Stage: initial_drag_parms, computed on first use and kept
+#Call drag_stage.cache_clear() after changing the inputs (main.weight_stage is cached too)
+@lru_cache(maxsize = None)
+def drag_stage():
+    return initial_drag()
+
+#Final Dictionary=============================================================#
+#initial_drag_parms (and the other names the script used to define) are computed when asked for
+def __getattr__(name):
+    if name in ("initial_drag_parms", "solution"):
+        return drag_stage()
+    if name == "weight_parm":
+        return main.weight_stage()
+    if name in ("airfoil_root", "airfoil_mid", "airfoil_tip"):
+        return airfoil_stations()[("airfoil_root", "airfoil_mid", "airfoil_tip").index(name)]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+#=============================================================================#
+
 #======================================================================
-solution= initial_drag()
+#Report: coefficients, drag polars and the plot
+def print_report():
+    import matplotlib.pyplot as plt
+    from tabulate import tabulate
 
-steady = f"Cd_clean = {solution['cd0']} + {solution['K_clean']}Cl^2"
-take_off = f"Cd_takeoff = {solution['cd0_TO']} + {solution['K_to']}Cl^2"
-landing = f"Cd_clean = {solution['cd0_landing']} + {solution['K_landing']}Cl^2"
+    solution= drag_stage()
 
-print(f"""
+    steady = f"Cd_clean = {solution['cd0']} + {solution['K_clean']}Cl^2"
+    take_off = f"Cd_takeoff = {solution['cd0_TO']} + {solution['K_to']}Cl^2"
+    landing = f"Cd_clean = {solution['cd0_landing']} + {solution['K_landing']}Cl^2"
+
+    print(f"""
 Coefficients of Cd,Cl and k values
 """)
-coeff_list = []
-for [key, val] in solution.items():
-    coeff_list.append([key,val])
-print(tabulate(coeff_list, headers = ("Parameters", "Value"),))
+    coeff_list = []
+    for [key, val] in solution.items():
+        coeff_list.append([key,val])
+    print(tabulate(coeff_list, headers = ("Parameters", "Value"),))
 
-print(f"""
+    print(f"""
 Drag Polars 
       """)
-print(steady)
-print(take_off)
-print(landing)
-
-cl_steady, cd_steady = list(solution['cd0'],solution['K_clean'])
-cl_takeoff , cd_takeoff = list(solution['cd0_TO'],solution['K_to'])
-cl_landing, cd_landing = list(solution['cd0_landing'],solution['K_landing'])
-
-#=====================================================================
-#Warnings
-if solution['eLanding_flaps'] < solution['eTo_flaps'] < solution['e_clean']:
-    print()
-else:
-    print("")
-    print("ERROR: Invalid Osswald Estimation")
-
-#=====================================================================
-#Plot
-plt.style.use('classic')
-plt.figure(figsize=(12, 8))
-plt.plot(cd_steady, cl_steady, label = "Cd_clean", marker ="o")
-plt.plot(cd_takeoff,cl_takeoff,label = "Cd_takeoff",marker = "o")
-plt.plot(cd_landing,cl_landing, label =  "Cd_landing", marker = "o")
-
-plt.grid(
-    which='major',          
-    color='gray',           
-    linestyle='--',         
-    linewidth=0.5,         
-    alpha=0.7              
-)
-
-plt.xlabel("Coefficient of Drag")
-plt.ylabel("Coefficient of Lift")
-plt.title("Drag Polar",fontdict={'family':'rockwell', 'weight': 'bold',}, fontsize = 20)
-plt.legend(loc = 'best')
-plt.show()
-
-#Final Dictionary=============================================================#
-initial_drag_parms = solution
-#=============================================================================#
\ No newline at end of file
+    print(steady)
+    print(take_off)
+    print(landing)
+
+    cl_steady, cd_steady = list(solution['cd0'],solution['K_clean'])
+    cl_takeoff , cd_takeoff = list(solution['cd0_TO'],solution['K_to'])
+    cl_landing, cd_landing = list(solution['cd0_landing'],solution['K_landing'])
+
+    #=====================================================================
+    #Warnings
+    if solution['eLanding_flaps'] < solution['eTo_flaps'] < solution['e_clean']:
+        print()
+    else:
+        print("")
+        print("ERROR: Invalid Osswald Estimation")
+
+    #=====================================================================
+    #Plot
+    plt.style.use('classic')
+    plt.figure(figsize=(12, 8))
+    plt.plot(cd_steady, cl_steady, label = "Cd_clean", marker ="o")
+    plt.plot(cd_takeoff,cl_takeoff,label = "Cd_takeoff",marker = "o")
+    plt.plot(cd_landing,cl_landing, label =  "Cd_landing", marker = "o")
+
+    plt.grid(
+        which='major',          
+        color='gray',           
+        linestyle='--',         
+        linewidth=0.5,         
+        alpha=0.7              
+    )
+
+    plt.xlabel("Coefficient of Drag")
+    plt.ylabel("Coefficient of Lift")
+    plt.title("Drag Polar",fontdict={'family':'rockwell', 'weight': 'bold',}, fontsize = 20)
+    plt.legend(loc = 'best')
+    plt.show()
+
+if __name__ == "__main__":
+    print_report()
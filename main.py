@@ -1,10 +1,10 @@
 #Aircraft Design Calculator
 #Weight Estimation
-import scipy as sc
 import math as m
-import matplotlib.pyplot as plt
-from sympy import symbols,Eq,exp,solve
-from tabulate import tabulate
+from functools import lru_cache
+from sympy import symbols,Eq,exp
+import weight_sizing
+import model_compiler
 
 #================================================================================================================#
 #Dictionary of Values
@@ -24,36 +24,33 @@ parameters = {
 #==================================================================================================================#
 #Calculation Functions
 
-def weight_estimation():
+#---Cruise L/D: Raymer wetted aspect ratio estimate, for numbers or symbols
+def cruise_lift_to_drag(Aspect_Ratio, Swet_Sref, K_LD = 10.5):
+    return K_LD*((Aspect_Ratio/(Swet_Sref))**(1/2))
+
+#---Weight System: (equations, unknowns, inputs), every entry of parameters is an input symbol
+def weight_system():
     #Requriements-----------------------------------------------------------#
-    R = parameters["R"]                                
-    E = parameters["E"]	                            
-    V_Emax = parameters["V_Emax"]                       
+    R, E, V_Emax = symbols('R E V_Emax', positive = True)
 
     #Emperical Data
-    n_p = parameters["n_p"]                             
-    c_cruise = parameters["sfc_cruise"]                                  
-    c_loiter = parameters["sfc_loiter"]                         
-    Aspect_Ratio = parameters["aspect_ratio"]
-    Swet_Sref = parameters["swet_sref"]
-    K_LD = 10.5
-    AVGAS100LL= 6.01
+    n_p, c_cruise, c_loiter = symbols('n_p sfc_cruise sfc_loiter', positive = True)
+    Aspect_Ratio, Swet_Sref = symbols('aspect_ratio swet_sref', positive = True)
 
     #Segment Assumptions
 
     #Mission Profile
-    crew = parameters["crew"]
-    payload = parameters["payload"]
+    crew, payload = symbols('crew payload', positive = True)
 
     #-----------------------------------------------------------------------#
 
     #Weight Estimation: Returns Empty WEight, and Fuel Weight
     #Define Symbols
     W_0, W_1, W_2, W_3, W_4, W_5, W_6 = symbols('W_0 W_1 W_2 W_3 W_4 W_5 W_6')
-    W_empty, W_fuel, W_payload, W_crew = symbols('W_empty W_fuel W_crew W_payload')
+    W_empty, W_fuel, W_crew, W_payload = symbols('W_empty W_fuel W_crew W_payload')
 
     #Lift Estimation
-    L_D = K_LD*((Aspect_Ratio/(Swet_Sref))**(1/2))
+    L_D = cruise_lift_to_drag(Aspect_Ratio, Swet_Sref)
 
     #Weight Summation Equation
     eq1 = Eq(W_0,W_crew + W_payload + W_empty + W_fuel)
@@ -75,18 +72,26 @@ def weight_estimation():
     eq11 = Eq(W_crew, crew)
     eq12 = Eq(W_payload, payload)
         
-    #Solve
-    solution = solve([
+    return ([
         eq1, eq2, eq3, eq4, eq5, eq6,
         eq7, eq8, eq9, eq10, eq11, eq12
-    ], [W_0, W_empty, W_fuel, W_crew, W_payload, W_1, W_2, W_3, W_4, W_5, W_6],dict = True )[0]
+    ], [W_0, W_empty, W_fuel, W_crew, W_payload, W_1, W_2, W_3, W_4, W_5, W_6],
+    [R, E, V_Emax, n_p, c_cruise, c_loiter, Aspect_Ratio, Swet_Sref, crew, payload])
+
+def weight_estimation(parameters = parameters):
+    #The system is solved once for any values and compiled to a NumPy kernel (model_compiler),
+    #parameters are plugged in after the solve
+    AVGAS100LL= 6.01
 
-    # second_solution = solution [1]
-    solution = {str(k): float(v.evalf()) for k, v in solution.items()}
+    #Solve (compiled once, then cached on disk)
+    kernel = model_compiler.compile_model(*weight_system())
+
+    # second_solution: compile_model(..., root = 1)
+    solution = {k: float(v) for k, v in kernel(**parameters).items()}
     # Disctionary for solution
     sol_dict = solution
-    sol_dict["L_D-maxCruise"] = L_D
-    sol_dict["L_D-maxLoiter"] = L_D*0.866
+    sol_dict["L_D-maxCruise"] = float(cruise_lift_to_drag(parameters["aspect_ratio"], parameters["swet_sref"]))
+    sol_dict["L_D-maxLoiter"] = sol_dict["L_D-maxCruise"]*0.866
     
     ratio = {
         "W_empty/W_0":sol_dict["W_empty"] / sol_dict["W_0"],
@@ -104,42 +109,72 @@ def weight_estimation():
 
 
     return sol_dict,ratio
-def trade_study():
+def trade_study(**sweeps):
     #This function is for trade study
     #It will be used to see how the weight changes with different parameters
-    print()
+    #Each keyword is a parameter name with an array of values, every combination is sized at once
+    #e.g. trade_study(aspect_ratio = numpy.linspace(6, 10, 100), R = numpy.linspace(1e6, 2e6, 100))
+    return weight_sizing.batch_weight_estimation(weight_sizing.parameter_grid(parameters, **sweeps))
+
+def sizing_check(sol_dict, ratio, tolerance = 1e-9):
+    #The batch engine has to agree with the SymPy solution for the baseline dictionary, on every key
+    batch_sol, batch_ratio = weight_sizing.batch_weight_estimation(parameters)
+    missing = [key for key in sol_dict if key not in batch_sol] + [key for key in ratio if key not in batch_ratio]
+    if missing:
+        print(f"ERROR: batch weight sizing does not give {', '.join(missing)}")
+    difference = max(weight_sizing.max_relative_difference(batch_sol, sol_dict),
+                     weight_sizing.max_relative_difference(batch_ratio, ratio))
+    if difference > tolerance:
+        print(f"ERROR: batch weight sizing differs from SymPy by {difference:.3e}")
+    return difference
+
+#---Weight Stage: weight_estimation_dict, computed on first use and kept
+#Call weight_stage.cache_clear() after changing parameters
+@lru_cache(maxsize = None)
+def weight_stage():
+    sol_dict,ratio= weight_estimation()
+    return {**sol_dict,**parameters,**ratio}
+
+#Final Dictionary===================================================================================================#
+#weight_estimation_dict is still importable, it is only computed when it is first asked for
+def __getattr__(name):
+    if name == "weight_estimation_dict":
+        return weight_stage()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+#===================================================================================================================#
 
 #===================================================================================================================#
 #Print Final Findings
-print("""
+def print_report():
+    from tabulate import tabulate
+
+    print("""
 Parameters
       """)
-parm_list=[]
-units = ["ft","s","","1/ft","1/ft","","","lb","lb"] 
-for [key,val],units in zip(parameters.items(),units):
-    parm_list.append([key,val,units])
-print(tabulate(parm_list, headers = ["Parameter","Value","Unit"]))
+    parm_list=[]
+    units = ["ft","s","","1/ft","1/ft","","","lb","lb"] 
+    for [key,val],units in zip(parameters.items(),units):
+        parm_list.append([key,val,units])
+    print(tabulate(parm_list, headers = ["Parameter","Value","Unit"]))
 
-print(f"""
+    print(f"""
 Weight Estimation
       """)
-weight_list = []
-weight_units = ["lb","lb","lb","lb","lb","lb","lb","lb","lb","lb","lb","",""]
-sol_dict,ratio= weight_estimation()
-for [key,val],weight_units in zip(sol_dict.items(),weight_units):
-    weight_list.append([key,val,weight_units])
-print(tabulate(weight_list, headers = ("Parameters","Values","Units")))
-
-print(f"""
+    weight_list = []
+    weight_units = ["lb","lb","lb","lb","lb","lb","lb","lb","lb","lb","lb","",""]
+    sol_dict,ratio= weight_estimation()
+    sizing_check(sol_dict,ratio)
+    for [key,val],weight_units in zip(sol_dict.items(),weight_units):
+        weight_list.append([key,val,weight_units])
+    print(tabulate(weight_list, headers = ("Parameters","Values","Units")))
+
+    print(f"""
 Weight Ratios
       """)
-ratio_list = []
-for key,val in ratio.items():
-    ratio_list.append([key,val])
-print(tabulate(ratio_list, headers = ("Parameters","Values")))
-
-
-#Final Dictionary===================================================================================================#
-weight_estimation_dict = {**sol_dict,**parameters,**ratio}
-#===================================================================================================================#
+    ratio_list = []
+    for key,val in ratio.items():
+        ratio_list.append([key,val])
+    print(tabulate(ratio_list, headers = ("Parameters","Values")))
 
+if __name__ == "__main__":
+    print_report()
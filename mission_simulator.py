@@ -0,0 +1,192 @@
+import numpy as np
+from atmosphere import rho_0
+from thrust_required import rho
+
+#Mission Simulator
+#Flies the main.weight_estimation mission segment by segment instead of using the historical
+#fractions (0.98, 0.97, 0.99, 0.997) and one Breguet L/D: warm up and takeoff, climb, cruise,
+#loiter, descent and landing, with the drag polar from initial_drag (cd0, K_clean), the
+#atmosphere from thrust_required.rho and n_p, sfc_cruise, sfc_loiter, R, E, V_Emax from
+#main.parameters
+#Fuel flow is sfc * shaft power, shaft power = thrust power/n_p (sfc in 1/ft as in main)
+#   warm up, takeoff, landing   time at a throttle setting of the installed power
+#   climb                       full throttle at V_mp, rate of climb from the excess power
+#   cruise                      R at the best range speed (V_md for the current weight) or a set speed
+#   loiter                      E at V_Emax (or a set speed), sfc_loiter
+#   descent                     V_md at a set sink rate, at least idle power
+#Cruise covers all of R like the Breguet equation in main, the climb and descent distances
+#are reported but not credited
+#Every input can be a NumPy array, they broadcast into a batch of missions and every segment
+#is integrated for the whole batch at once with an adaptive (Bogacki-Shampine 3(2)) step per
+#mission. Missions that drop below min_climb_rate before the cruise altitude come back as NaN
+
+mission = {
+    "altitude"          :   15000,     #cruise and loiter altitude, ft (thrust_required.param)
+    "power_loading"     :      44,     #installed shaft power per lb of W_0, ft lbf/s/lb (0.08 hp/lb)
+    "warmup_time"       :     600,     #s
+    "warmup_throttle"   :     0.2,
+    "takeoff_time"      :      60,     #s
+    "takeoff_throttle"  :     1.0,
+    "climb_throttle"    :     1.0,
+    "min_climb_rate"    :    1.67,     #ft/s (100 ft/min, service ceiling), below it the climb fails
+    "cruise_speed"      :    None,     #ft/s, None flies the best range speed
+    "loiter_speed"      :    None,     #ft/s, None flies V_Emax from main.parameters
+    "descent_rate"      :    8.33,     #ft/s (500 ft/min)
+    "idle_throttle"     :     0.1,
+    "landing_time"      :     600,     #approach, landing and taxi, s
+    "landing_throttle"  :    0.15
+}
+
+#==============================================================================================#
+#Functions
+
+#---Power Lapse: shaft power at altitude over sea level power (Gagg-Ferrar)
+def power_lapse(density):
+    sigma = density/rho_0
+    return sigma - (1 - sigma)/7.55
+
+#---Drag: parabolic polar at weight, speed and density
+def drag(weight, velocity, density, S, cd0, K):
+    q = 0.5*density*velocity**2
+    return q*S*cd0 + K*weight**2/(q*S)
+
+#---Integrate: W, t and x along s from 0 to span for every mission at once
+#rate(s, W) returns (dW/ds, dt/ds, dx/ds), each mission keeps its own step, a step is accepted
+#when the local error in W is below tolerance*W
+def integrate(rate, weight, span, tolerance = 1e-9, steps = 4, max_iterations = 10000):
+    weight, span = np.broadcast_arrays(np.asarray(weight, dtype = float), np.asarray(span, dtype = float))
+    W, span = weight.copy(), span.copy()
+    t, x, s = np.zeros_like(W), np.zeros_like(W), np.zeros_like(W)
+    h = span/steps
+    k1 = rate(s, W)
+    active = (span > 0) & np.isfinite(W)
+
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        h = np.where(active, np.minimum(h, span - s), 0.0)
+        k2 = rate(s + h/2, W + h/2*k1[0])
+        k3 = rate(s + 3*h/4, W + 3*h/4*k2[0])
+        new = [y + h*(2*a + 3*b + 4*c)/9 for y, a, b, c in zip((W, t, x), k1, k2, k3)]
+        k4 = rate(s + h, new[0])
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            error = np.abs(h*(-5*k1[0]/72 + k2[0]/12 + k3[0]/9 - k4[0]/8))
+            allowed = tolerance*np.abs(W)
+            accept = active & (error <= allowed)
+            factor = np.clip(0.9*(allowed/np.maximum(error, 1e-300))**(1/3), 0.2, 5.0)
+
+        W, t, x = (np.where(accept, y_new, y) for y, y_new in zip((W, t, x), new))
+        s = np.where(accept, s + h, s)
+        k1 = tuple(np.where(accept, d_new, d) for d, d_new in zip(k1, k4))
+        h = h*factor
+
+        failed = active & ~np.isfinite(new[0])
+        W = np.where(failed, np.nan, W)
+        active = active & ~failed & (s < span*(1 - 1e-12))
+    else:
+        print(f"ERROR: mission segment did not converge in {max_iterations} steps")
+    return W, t, x
+
+#---Fly Mission: segment weights, times and distances for a batch of missions
+#W_0 is the takeoff gross weight, S the wing area, cd0 and K the clean polar
+def fly_mission(W_0, S, cd0, K, parameters, mission = mission, tolerance = 1e-9):
+    speeds = {name: mission[name] for name in ("cruise_speed", "loiter_speed")}
+    inputs = {**{name: parameters[name] for name in ("R", "E", "V_Emax", "n_p", "sfc_cruise", "sfc_loiter")},
+              **{name: value for name, value in mission.items() if name not in speeds},
+              **{name: value for name, value in speeds.items() if value is not None},
+              "W_0": W_0, "S": S, "cd0": cd0, "K": K}
+    names = list(inputs)
+    p = dict(zip(names, np.broadcast_arrays(*(np.asarray(inputs[name], dtype = float) for name in names))))
+    S, cd0, K, n_p = p["S"], p["cd0"], p["K"], p["n_p"]
+
+    _, _, density_cruise = rho(p["altitude"])
+    P_installed = p["power_loading"]*p["W_0"]
+    V_loiter = p.get("loiter_speed", p["V_Emax"])
+
+    def shaft_power(throttle, density):
+        return throttle*P_installed*power_lapse(density)
+
+    #Warm up and takeoff at sea level
+    W_1 = (p["W_0"] - p["sfc_cruise"]*shaft_power(p["warmup_throttle"], rho_0)*p["warmup_time"]
+           - p["sfc_cruise"]*shaft_power(p["takeoff_throttle"], rho_0)*p["takeoff_time"])
+
+    #Climb: s is altitude gained
+    def climb(h, W):
+        _, _, density = rho(h)
+        V = np.sqrt(2*W/(density*S))*(K/(3*cd0))**0.25
+        P = shaft_power(p["climb_throttle"], density)
+        climb_rate = (n_p*P - drag(W, V, density, S, cd0, K)*V)/W
+        climb_rate = np.where(climb_rate >= p["min_climb_rate"], climb_rate, np.nan)
+        return -p["sfc_cruise"]*P/climb_rate, 1/climb_rate, V/climb_rate
+    W_2, t_climb, x_climb = integrate(climb, W_1, p["altitude"], tolerance)
+
+    #Cruise: s is distance
+    def cruise(x, W):
+        if "cruise_speed" in p:
+            V = p["cruise_speed"]
+        else:
+            V = np.sqrt(2*W/(density_cruise*S))*(K/cd0)**0.25
+        D = drag(W, V, density_cruise, S, cd0, K)
+        return -p["sfc_cruise"]*D/n_p, 1/V, np.ones_like(W)
+    W_3, t_cruise, x_cruise = integrate(cruise, W_2, p["R"], tolerance)
+
+    #Loiter: s is time
+    def loiter(t, W):
+        D = drag(W, V_loiter, density_cruise, S, cd0, K)
+        return -p["sfc_loiter"]*D*V_loiter/n_p, np.ones_like(W), V_loiter*np.ones_like(W)
+    W_4, t_loiter, x_loiter = integrate(loiter, W_3, p["E"], tolerance)
+
+    #Descent: s is altitude lost
+    def descent(h, W):
+        _, _, density = rho(p["altitude"] - h)
+        V = np.sqrt(2*W/(density*S))*(K/cd0)**0.25
+        thrust_power = drag(W, V, density, S, cd0, K)*V - W*p["descent_rate"]
+        P = np.maximum(thrust_power/n_p, shaft_power(p["idle_throttle"], density))
+        return -p["sfc_cruise"]*P/p["descent_rate"], 1/p["descent_rate"], V/p["descent_rate"]
+    W_5, t_descent, x_descent = integrate(descent, W_4, p["altitude"], tolerance)
+
+    #Landing and taxi at sea level
+    W_6 = W_5 - p["sfc_cruise"]*shaft_power(p["landing_throttle"], rho_0)*p["landing_time"]
+
+    weights = {"W_0": p["W_0"], "W_1": W_1, "W_2": W_2, "W_3": W_3, "W_4": W_4, "W_5": W_5, "W_6": W_6}
+    return {
+        **weights,
+        "W_1/W_0": W_1/p["W_0"],
+        "W_2/W_1": W_2/W_1,
+        "W_3/W_2": W_3/W_2,
+        "W_4/W_3": W_4/W_3,
+        "W_5/W_4": W_5/W_4,
+        "W_6/W_5": W_6/W_5,
+        "W_6/W_0": W_6/p["W_0"],
+        "time": {"warmup": p["warmup_time"], "takeoff": p["takeoff_time"], "climb": t_climb,
+                 "cruise": t_cruise, "loiter": t_loiter, "descent": t_descent, "landing": p["landing_time"]},
+        "distance": {"climb": x_climb, "cruise": x_cruise, "loiter": x_loiter, "descent": x_descent}
+    }
+
+#---Design Mission: the mission for the sized aircraft (main), its clean polar (initial_drag)
+#and the wing area in thrust_required.param
+def design_mission(mission = mission):
+    import main
+    import initial_drag
+    import thrust_required
+    weight, polar = main.weight_stage(), initial_drag.drag_stage()
+    return fly_mission(weight["W_0"], thrust_required.param["Wing Area"], polar["cd0"], polar["K_clean"],
+                       main.parameters, mission)
+
+#==============================================================================================#
+#Report: simulated segment fractions next to the fixed ones in main
+def print_report():
+    from tabulate import tabulate
+    import main
+
+    flown = design_mission()
+    weight = main.weight_stage()
+    keys = ("W_1/W_0", "W_2/W_1", "W_3/W_2", "W_4/W_3", "W_5/W_4", "W_6/W_5", "W_6/W_0")
+    print(tabulate([[key, weight[key], float(flown[key])] for key in keys],
+                   headers = ("Segment", "main", "Simulated"), floatfmt = ".5f"))
+    print()
+    print(tabulate([[segment, float(time)/60] for segment, time in flown["time"].items()],
+                   headers = ("Segment", "Time min"), floatfmt = ".1f"))
+
+if __name__ == "__main__":
+    print_report()
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import tempfile
+import sympy
+from sympy.printing.numpy import NumPyPrinter
+import telemetry
+
+#Model Compiler
+#Solves an equation set once with its inputs left as symbols and turns the solution into a
+#NumPy function, so evaluating the model is plain array arithmetic instead of a sympy.solve
+#The generated source is kept in model_cache/<hash>.py, the hash covers the equations, the
+#unknowns, the input symbols and the SymPy version, so changing any equation recompiles
+#Equations with one unknown left are solved one at a time first (cheap), whatever is still
+#coupled after that goes to sympy.solve in one call
+#Where the system has more than one solution, root picks it (0 = what sympy.solve lists first)
+#compile_derivatives differentiates the solved expressions before compiling, so one kernel call
+#returns the outputs with their exact gradients (and Hessians) with respect to every input
+
+cache_dir = "model_cache"
+kernels = {}                    #compiled models already loaded in this process
+
+#==============================================================================================#
+#Functions
+
+#---Model Key: sha256 of everything that changes the solution (extra: anything else the kernel depends on)
+def model_key(equations, unknowns, inputs, root, *extra):
+    text = "\n".join([sympy.__version__, str(root)]
+        + [sympy.srepr(eq) for eq in equations]
+        + [sympy.srepr(symbol) for symbol in unknowns]
+        + [sympy.srepr(symbol) for symbol in inputs]
+        + [str(value) for value in extra])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+#---Solve System: every unknown as an expression of the inputs
+def solve_system(equations, unknowns, root = 0):
+    remaining = [eq for eq in equations if eq is not sympy.true]
+    solved = {}
+
+    #Peel off equations with a single unknown left, substituting each answer back in
+    progress = True
+    while progress:
+        progress = False
+        for eq in remaining:
+            eq_unknowns = [u for u in unknowns if u not in solved and eq.has(u)]
+            if len(eq_unknowns) != 1:
+                continue
+            solutions = sympy.solve(eq, eq_unknowns[0], dict = True, simplify = False, rational = False)
+            if not solutions:
+                continue
+            solved[eq_unknowns[0]] = solutions[min(root, len(solutions) - 1)][eq_unknowns[0]]
+            remaining = [other.subs(solved) for other in remaining if other is not eq]
+            remaining = [other for other in remaining if other is not sympy.true]
+            progress = True
+            break
+
+    #The coupled block in one solve
+    left = [u for u in unknowns if u not in solved]
+    if left:
+        solutions = sympy.solve(remaining, left, dict = True, simplify = False, check = False, rational = False)
+        if not solutions:
+            raise ValueError("model has no solution")
+        solved.update(solutions[min(root, len(solutions) - 1)])
+
+    #Back substitute until every expression is in terms of the inputs only
+    for _ in range(len(unknowns)):
+        if not any(expr.has(*unknowns) for expr in solved.values()):
+            break
+        solved = {u: sympy.sympify(expr).subs(solved) for u, expr in solved.items()}
+    return {u: solved[u] for u in unknowns}
+
+#---Derivative Expressions: {name: expr, (name, x): d/dx, (name, x, y): d2/dxdy (y after x)}
+def derivative_expressions(solution, inputs, outputs, order):
+    expressions = {}
+    for u in outputs:
+        expressions[str(u)] = solution[u]
+        for i, x in enumerate(inputs):
+            first = sympy.diff(solution[u], x)
+            expressions[(str(u), str(x))] = first
+            if order > 1:
+                for y in inputs[i:]:
+                    expressions[(str(u), str(x), str(y))] = sympy.diff(first, y)
+    return expressions
+
+#---Kernel Source: a Python function of the inputs returning {unknown name: array}
+#Shared subexpressions are computed once (cse), every output is broadcast to the input shape
+#solution keys are symbols or already the names (strings, tuples) the kernel returns
+def kernel_source(solution, inputs):
+    names = sorted(solution, key = str)
+    keys = [u if isinstance(u, (str, tuple)) else str(u) for u in names]
+    replacements, reduced = sympy.cse([solution[u] for u in names], symbols = sympy.numbered_symbols("_t"))
+    printer = NumPyPrinter({"fully_qualified_modules": True, "inline": True, "allow_unknown_functions": False})
+    lines = ["import numpy", "", f"def kernel({', '.join(str(symbol) for symbol in inputs)}):"]
+    for symbol, expr in replacements:
+        lines.append(f"    {symbol} = {printer.doprint(expr)}")
+    outputs = ", ".join(printer.doprint(expr) for expr in reduced)
+    lines.append(f"    values = numpy.broadcast_arrays({outputs})")
+    lines.append(f"    return dict(zip({keys!r}, values))")
+    return "\n".join(lines) + "\n"
+
+def load_kernel(source, file_name):
+    namespace = {}
+    exec(compile(source, file_name, "exec"), namespace)
+    return namespace["kernel"]
+
+#---Cached Kernel: the kernel for key from memory, model_cache or build() (the source)
+def cached_kernel(key, build):
+    if key in kernels:
+        return kernels[key]
+
+    file_name = os.path.join(cache_dir, f"{key}.py")
+    try:
+        with open(file_name, "r") as f:
+            source = f.read()
+    except OSError:
+        with telemetry.stage("sympy_solve"):
+            source = build()
+        telemetry.count("kernels_compiled")
+        os.makedirs(cache_dir, exist_ok = True)
+        fd, temp_name = tempfile.mkstemp(suffix = ".tmp", dir = cache_dir)
+        with os.fdopen(fd, "w") as f:
+            f.write(source)
+        os.replace(temp_name, file_name)
+
+    with telemetry.stage("kernel_load"):
+        kernels[key] = load_kernel(source, file_name)
+    return kernels[key]
+
+#---Compile Model: kernel(**inputs) -> {unknown name: array}, compiled once per equation set
+def compile_model(equations, unknowns, inputs, root = 0):
+    return cached_kernel(model_key(equations, unknowns, inputs, root),
+                         lambda: kernel_source(solve_system(equations, unknowns, root), inputs))
+
+#---Compile Derivatives: kernel(**inputs) -> {name: value, (name, x): gradient entry,
+#(name, x, y): Hessian entry with y at or after x in inputs} for the unknowns named in outputs
+#order = 1 for gradients, 2 adds the Hessians
+def compile_derivatives(equations, unknowns, inputs, outputs, order = 1, root = 0):
+    if order not in (1, 2):
+        raise ValueError(f"order must be 1 or 2, not {order}")
+    by_name = {str(u): u for u in unknowns}
+    missing = [name for name in outputs if name not in by_name]
+    if missing:
+        raise ValueError(f"{', '.join(missing)} not in the unknowns")
+
+    def build():
+        solution = solve_system(equations, unknowns, root)
+        return kernel_source(derivative_expressions(solution, inputs, [by_name[name] for name in outputs], order), inputs)
+    return cached_kernel(model_key(equations, unknowns, inputs, root, "derivatives", order, *outputs), build)
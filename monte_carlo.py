@@ -0,0 +1,181 @@
+import math as m
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import main
+import initial_drag
+import weight_sizing
+
+#Monte Carlo
+#Uncertainty in the sizing and drag inputs pushed through the batched weight sizing
+#(weight_sizing) and the compiled drag model (initial_drag.drag_model)
+#Inputs are sampled from distributions, {name: (kind, *arguments)} where kind is any
+#numpy.random.Generator method ("normal", "uniform", "triangular", "lognormal", ...), names
+#are main.parameters entries, K_LD or initial_drag.drag_constants entries
+#Samples are drawn and evaluated in chunks, each chunk only leaves StreamingStats behind (count,
+#mean, variance, min, max and a quantile sketch), so 10^6+ samples never sit in memory at once
+#Chunk i is always seeded with the i-th child of SeedSequence(seed), the results do not depend
+#on the number of workers and the chunks are merged in order
+
+distributions = {
+    "sfc_cruise"    : ("normal", 2.20e-7, 0.15*2.20e-7),
+    "sfc_loiter"    : ("normal", 2.26e-7, 0.15*2.26e-7),
+    "n_p"           : ("triangular", 0.78, 0.85, 0.88),
+    "swet_sref"     : ("triangular", 4.0, 4.5, 5.5),
+    "K_LD"          : ("uniform", 9.5, 11.5),
+    "c_fe"          : ("triangular", 0.0045, 0.0055, 0.0070),
+    "cd0_LG"        : ("triangular", 0.006, 0.008, 0.012),
+    "eTo_flaps"     : ("uniform", 0.70, 0.80),
+    "eLanding_flaps": ("uniform", 0.65, 0.75)
+}
+outputs = ("W_0", "W_empty", "W_fuel", "Fuel_Volume_gal", "L_D-maxCruise", "cd0", "K_clean", "e_clean", "cd0_TO", "cd0_landing")
+
+#==============================================================================================#
+#Streaming Statistics
+
+class StreamingStats:
+    #Quantiles come from a log bucket sketch (DDSketch), every quantile is within
+    #relative_accuracy of the exact one, the sketch grows with log(max/min) not with the count
+    def __init__(self, relative_accuracy = 0.001):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy)/(1 - relative_accuracy)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = m.inf
+        self.maximum = -m.inf
+        self.invalid = 0                #NaN and inf samples, left out of everything else
+        self.zeros = 0
+        self.positive = {}              #bucket index: count
+        self.negative = {}
+
+    def update(self, values):
+        values = np.asarray(values, dtype = float).ravel()
+        finite = values[np.isfinite(values)]
+        self.invalid += len(values) - len(finite)
+        if len(finite) == 0:
+            return
+        chunk = StreamingStats(self.relative_accuracy)
+        chunk.count = len(finite)
+        chunk.mean = float(finite.mean())
+        chunk.m2 = float(((finite - chunk.mean)**2).sum())
+        chunk.minimum, chunk.maximum = float(finite.min()), float(finite.max())
+        chunk.zeros = int((finite == 0).sum())
+        for bins, side in ((chunk.positive, finite[finite > 0]), (chunk.negative, -finite[finite < 0])):
+            keys, counts = np.unique(np.ceil(np.log(side)/m.log(self.gamma)).astype(np.int64), return_counts = True)
+            bins.update(zip(keys.tolist(), counts.tolist()))
+        self.merge(chunk)
+
+    #---Merge: combine with the statistics of another chunk (Chan's parallel variance)
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("sketches with different relative accuracy cannot be merged")
+        self.invalid += other.invalid
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta*other.count/count
+        self.m2 += other.m2 + delta**2*self.count*other.count/count
+        self.count = count
+        self.minimum, self.maximum = min(self.minimum, other.minimum), max(self.maximum, other.maximum)
+        self.zeros += other.zeros
+        for bins, other_bins in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, n in other_bins.items():
+                bins[key] = bins.get(key, 0) + n
+        return self
+
+    def variance(self):
+        return self.m2/(self.count - 1) if self.count > 1 else m.nan
+
+    def std(self):
+        return m.sqrt(self.variance())
+
+    #---Quantile: q in [0, 1], the bucket holding rank q*(count - 1)
+    def quantile(self, q):
+        if self.count == 0:
+            return m.nan
+        rank = q*(self.count - 1)
+        buckets = ([(-self.value(key), n) for key, n in sorted(self.negative.items(), reverse = True)]
+                   + [(0.0, self.zeros)]
+                   + [(self.value(key), n) for key, n in sorted(self.positive.items())])
+        seen = 0
+        for value, n in buckets:
+            seen += n
+            if seen > rank:
+                return min(max(value, self.minimum), self.maximum)
+        return self.maximum
+
+    def value(self, key):
+        return 2*self.gamma**key/(self.gamma + 1)
+
+#==============================================================================================#
+#Functions
+
+#---Sample: n draws of every distribution
+def sample(distributions, n, rng):
+    return {name: getattr(rng, kind)(*arguments, size = n) for name, (kind, *arguments) in distributions.items()}
+
+#---Evaluate: weight sizing and drag for arrays of samples, anything not sampled is the baseline
+def evaluate(samples):
+    parameters = {**main.parameters, **{name: value for name, value in samples.items() if name in weight_sizing.parameter_names or name == "K_LD"}}
+    constants = {**initial_drag.drag_constants, **{name: value for name, value in samples.items() if name in initial_drag.drag_constants}}
+    sol_dict, ratio = weight_sizing.batch_weight_estimation(parameters)
+    station_cl = initial_drag.station_cl
+    drag = initial_drag.drag_model()(L_D = sol_dict["L_D-maxCruise"], aspect_ratio = parameters["aspect_ratio"],
+                                     swet_sref = parameters["swet_sref"], cl_root = station_cl["root"],
+                                     cl_mid = station_cl["mid"], cl_tip = station_cl["tip"], **constants)
+    return {**sol_dict, **ratio, **drag}
+
+#---Run Chunk: one chunk from its own seed, only the statistics come back
+def run_chunk(task):
+    seed, n, distributions, outputs, relative_accuracy = task
+    values = evaluate(sample(distributions, n, np.random.default_rng(seed)))
+    stats = {}
+    for name in outputs:
+        stats[name] = StreamingStats(relative_accuracy)
+        stats[name].update(values[name])
+    return stats
+
+#---Monte Carlo: {output: StreamingStats} over n_samples
+#workers = 1 runs in this process, None uses every CPU
+def monte_carlo(n_samples = 10**6, distributions = distributions, outputs = outputs, chunk_size = 100000,
+                workers = None, seed = 0, relative_accuracy = 0.001):
+    known = set(main.parameters) | set(initial_drag.drag_constants) | {"K_LD"}
+    unknown = [name for name in distributions if name not in known]
+    if unknown:
+        raise ValueError(f"no model input named {', '.join(unknown)}")
+
+    sizes = [chunk_size]*(n_samples//chunk_size) + ([n_samples % chunk_size] if n_samples % chunk_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(seed, n, distributions, outputs, relative_accuracy) for seed, n in zip(seeds, sizes)]
+    initial_drag.drag_model()                   #compiled (or cached on disk) before the workers start
+
+    stats = {name: StreamingStats(relative_accuracy) for name in outputs}
+    def collect(chunks):
+        for chunk in chunks:
+            for name in outputs:
+                stats[name].merge(chunk[name])
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers == 1 or len(tasks) == 1:
+        collect(map(run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers = min(workers, len(tasks))) as pool:
+            collect(pool.map(run_chunk, tasks))
+    return stats
+
+#==============================================================================================#
+#Report: W_0 bands and drag coefficients for the default distributions
+def print_report(n_samples = 10**6):
+    from tabulate import tabulate
+
+    stats = monte_carlo(n_samples)
+    rows = []
+    for name, s in stats.items():
+        rows.append([name, s.mean, s.std(), s.quantile(0.05), s.quantile(0.5), s.quantile(0.95), s.invalid])
+    print(f"Monte Carlo, {n_samples} samples")
+    print(tabulate(rows, headers = ("Output", "Mean", "Std", "5%", "50%", "95%", "Invalid")))
+
+if __name__ == "__main__":
+    print_report()
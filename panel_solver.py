@@ -0,0 +1,273 @@
+import numpy
+
+#Panel Solver
+#In-process replacement for xfoil.exe: NACA 4-digit geometry, a Hess-Smith panel method
+#(constant source strength per panel plus one vortex strength for the whole airfoil) and
+#an optional integral boundary layer for drag
+#The influence matrix does not depend on angle of attack, it is factored once for a
+#freestream along x and one along y and every alpha is a superposition of the two
+#Boundary layer: Thwaites laminar, Michel transition, Head turbulent, Squire-Young drag,
+#lift and separated pressure drag are corrected with the Kirchhoff separation model
+#Transition uses Michel's criterion, so the XFOIL ncrit setting has no effect here
+
+#Boundary Layer Controls------------------------------------------------------
+bl_stations = 120               #stations per surface the boundary layer is marched on
+H_separation = 1.8              #Head's method separation shape factor (1.8 to 2.4 in the literature)
+H_transition = 1.4              #turbulent shape factor just after transition
+
+#==============================================================================================#
+#Functions
+
+#---NACA 4-digit Geometry
+#m, p, t are fractions of chord (NACA 2412 -> 0.02, 0.4, 0.12) so they can be non-integer
+#Points run from the trailing edge along the lower surface to the leading edge and back
+#along the upper surface, with cosine spacing and the standard open trailing edge
+def naca4_coordinates(m, p, t, panel = 300):
+    n = max(int(panel) // 2, 8)
+    beta = numpy.linspace(0, numpy.pi, n + 1)
+    x = 0.5*(1 - numpy.cos(beta))
+
+    yt = 5*t*(0.2969*numpy.sqrt(x) - 0.1260*x - 0.3516*x**2 + 0.2843*x**3 - 0.1015*x**4)
+    yc = numpy.zeros_like(x)
+    dyc = numpy.zeros_like(x)
+    if m > 0 and 0 < p < 1:
+        front = x < p
+        yc = numpy.where(front, m/p**2*(2*p*x - x**2), m/(1 - p)**2*((1 - 2*p) + 2*p*x - x**2))
+        dyc = numpy.where(front, 2*m/p**2*(p - x), 2*m/(1 - p)**2*(p - x))
+    theta = numpy.arctan(dyc)
+
+    x_upper, y_upper = x - yt*numpy.sin(theta), yc + yt*numpy.cos(theta)
+    x_lower, y_lower = x + yt*numpy.sin(theta), yc - yt*numpy.cos(theta)
+    X = numpy.concatenate([x_lower[::-1], x_upper[1:]])
+    Y = numpy.concatenate([y_lower[::-1], y_upper[1:]])
+    return X, Y
+
+#---NACA Code: "2412" or a non-integer design "2.50_4.10_13.20" (camber %, location /10, thickness %)
+def naca_parameters(airfoil_code):
+    if "_" in airfoil_code:
+        m, p, t = (float(value) for value in airfoil_code.split("_"))
+    else:
+        m, p, t = int(airfoil_code[0]), int(airfoil_code[1]), int(airfoil_code[2:])
+    return m/100, p/10, t/100
+
+def design_code(m, p, t):
+    if all(float(value).is_integer() for value in (m, p, t)):
+        return f"{int(m)}{int(p)}{int(t):02d}"
+    return f"{m:.2f}_{p:.2f}_{t:.2f}"
+
+def naca_code_coordinates(airfoil_code, panel = 300):
+    return naca4_coordinates(*naca_parameters(airfoil_code), panel)
+
+#---Write Coordinates: labeled XFOIL coordinate file (name line, then upper TE -> LE -> lower TE)
+def write_coordinates(coordinate_file, airfoil_code, panel = 300):
+    X, Y = naca_code_coordinates(airfoil_code, panel)
+    with open(coordinate_file, "w") as f:
+        f.write(f"NACA{airfoil_code}\n")
+        for x, y in zip(X[::-1], Y[::-1]):
+            f.write(f" {x:.6f}  {y:.6f}\n")
+
+#---Influence: velocity at every control point from a unit source / unit clockwise vortex on every panel
+def influence(X, Y):
+    xs, ys = X[:-1], Y[:-1]
+    length = numpy.hypot(numpy.diff(X), numpy.diff(Y))
+    theta = numpy.arctan2(numpy.diff(Y), numpy.diff(X))
+    xc, yc = 0.5*(X[:-1] + X[1:]), 0.5*(Y[:-1] + Y[1:])
+
+    #Control point i in the local frame of panel j
+    dx = xc[:, None] - xs[None, :]
+    dy = yc[:, None] - ys[None, :]
+    cos_j, sin_j = numpy.cos(theta)[None, :], numpy.sin(theta)[None, :]
+    x_local = dx*cos_j + dy*sin_j
+    y_local = -dx*sin_j + dy*cos_j
+
+    r1 = x_local**2 + y_local**2
+    r2 = (x_local - length[None, :])**2 + y_local**2
+    beta = numpy.arctan2(y_local, x_local - length[None, :]) - numpy.arctan2(y_local, x_local)
+    log_r = numpy.zeros_like(r1)
+    off = ~numpy.eye(len(xc), dtype = bool)
+    log_r[off] = 0.5*numpy.log(r1[off]/r2[off])
+    numpy.fill_diagonal(beta, numpy.pi)
+
+    #Source: (log, beta)/2pi in the panel frame, the clockwise vortex is that rotated by -90 deg
+    u_local, v_local = log_r/(2*numpy.pi), beta/(2*numpy.pi)
+    source_u = u_local*cos_j - v_local*sin_j
+    source_v = u_local*sin_j + v_local*cos_j
+    vortex_u = v_local*cos_j + u_local*sin_j
+    vortex_v = v_local*sin_j - u_local*cos_j
+
+    return source_u, source_v, vortex_u, vortex_v, theta, length, xc, yc
+
+#---Surface Velocity: tangential velocity at the control points for every alpha
+#One factorization: the two unit freestreams are solved together and superposed per alpha
+def surface_velocity(X, Y, alphas):
+    source_u, source_v, vortex_u, vortex_v, theta, length, xc, yc = influence(X, Y)
+    n = len(theta)
+    normal = numpy.stack([-numpy.sin(theta), numpy.cos(theta)])
+    tangent = numpy.stack([numpy.cos(theta), numpy.sin(theta)])
+
+    #Normal and tangential velocity at i from panel j
+    source_n = source_u*normal[0][:, None] + source_v*normal[1][:, None]
+    source_t = source_u*tangent[0][:, None] + source_v*tangent[1][:, None]
+    vortex_n = (vortex_u*normal[0][:, None] + vortex_v*normal[1][:, None]).sum(axis = 1)
+    vortex_t = (vortex_u*tangent[0][:, None] + vortex_v*tangent[1][:, None]).sum(axis = 1)
+
+    #Flow tangency on every panel plus the Kutta condition on the two trailing edge panels
+    A = numpy.zeros((n + 1, n + 1))
+    A[:n, :n] = source_n
+    A[:n, n] = vortex_n
+    A[n, :n] = source_t[0] + source_t[-1]
+    A[n, n] = vortex_t[0] + vortex_t[-1]
+
+    freestream = numpy.eye(2)
+    b = numpy.zeros((n + 1, 2))
+    b[:n] = -(normal.T @ freestream)
+    b[n] = -(tangent[:, 0] + tangent[:, -1]) @ freestream
+    strengths = numpy.linalg.solve(A, b)
+
+    V_t = tangent.T @ freestream + source_t @ strengths[:n] + vortex_t[:, None]*strengths[n]
+    alpha = numpy.radians(numpy.asarray(alphas, dtype = float))
+    V_t = numpy.cos(alpha)[:, None]*V_t[:, 0] + numpy.sin(alpha)[:, None]*V_t[:, 1]
+    return V_t, normal, length, xc, yc
+
+#---Pressure Forces: cl and quarter chord cm from the panel pressures
+def pressure_forces(V_t, normal, length, xc, yc, alphas):
+    cp = 1 - V_t**2
+    F_x = -(cp*normal[0]*length).sum(axis = 1)
+    F_y = -(cp*normal[1]*length).sum(axis = 1)
+    alpha = numpy.radians(numpy.asarray(alphas, dtype = float))
+    cl = F_y*numpy.cos(alpha) - F_x*numpy.sin(alpha)
+    cm = -(cp*length*((xc - 0.25)*(-normal[1]) + yc*normal[0])).sum(axis = 1)
+    return cl, cm
+
+#---Surface Stations: splits the surface at the stagnation point and resamples each side
+#Returns arc length, edge velocity and x/c on bl_stations stations for the upper and lower side
+def surface_stations(V_t, length, xc):
+    s_panel = numpy.cumsum(length) - 0.5*length
+    s_total = length.sum()
+    eta = 1 - numpy.cos(0.5*numpy.pi*numpy.linspace(0, 1, bl_stations))
+    sides = {"upper": [], "lower": []}
+
+    for V in V_t:
+        k = int(numpy.argmax(V >= 0))
+        k = min(max(k, 1), len(V) - 1)
+        s_stag = numpy.interp(0, [V[k - 1], V[k]], [s_panel[k - 1], s_panel[k]])
+
+        s_upper = s_stag + (s_total - s_stag)*eta
+        s_lower = s_stag - s_stag*eta
+        sides["upper"].append((
+            s_upper - s_stag,
+            numpy.interp(s_upper, s_panel, V),
+            numpy.interp(s_upper, s_panel, xc)))
+        sides["lower"].append((
+            s_stag - s_lower,
+            -numpy.interp(s_lower, s_panel, V),
+            numpy.interp(s_lower, s_panel, xc)))
+
+    return {side: tuple(numpy.array(values) for values in zip(*stations)) for side, stations in sides.items()}
+
+def head_H1(H):
+    return numpy.where(H <= 1.6,
+        3.3 + 0.8234*numpy.maximum(H - 1.1, 1e-6)**-1.287,
+        3.3 + 1.5501*numpy.maximum(H - 0.6778, 1e-6)**-3.064)
+
+def head_H(H1):
+    H1 = numpy.maximum(H1, 3.3 + 1e-6)
+    return numpy.where(H1 >= 5.3, 1.1 + 0.86*(H1 - 3.3)**-0.777, 0.6778 + 1.1536*(H1 - 3.3)**-0.326)
+
+#---Boundary Layer: one surface, marched for every alpha at once
+#Returns momentum thickness, shape factor and edge velocity at the trailing edge (or at
+#separation), the separation x/c (1 when attached) and the skin friction drag of the side
+def boundary_layer(s, U_e, x, reynolds_number):
+    n_alpha, n_station = s.shape
+    U_e = numpy.maximum(U_e, 1e-6)
+    ds = numpy.diff(s, axis = 1)
+    dU_ds = numpy.gradient(U_e, axis = 1)/numpy.maximum(numpy.gradient(s, axis = 1), 1e-12)
+
+    #Thwaites, integrated along the whole side in one go
+    U5 = U_e**5
+    integral = numpy.concatenate([numpy.zeros((n_alpha, 1)), numpy.cumsum(0.5*(U5[:, 1:] + U5[:, :-1])*ds, axis = 1)], axis = 1)
+    theta_lam = numpy.sqrt(0.45/reynolds_number*integral/U_e**6)
+    #Stagnation point value (Hiemenz flow)
+    theta_lam[:, 0] = numpy.sqrt(0.075/(reynolds_number*numpy.maximum(dU_ds[:, 0], 1e-6)))
+    lam = theta_lam**2*dU_ds*reynolds_number
+    Re_theta = reynolds_number*U_e*theta_lam
+    Re_x = numpy.maximum(reynolds_number*U_e*s, 1.0)
+
+    #Michel transition or laminar separation, whichever comes first
+    michel = Re_theta > 1.174*(1 + 22400/Re_x)*Re_x**0.46
+    laminar_separation = lam < -0.09
+    trip = (michel | laminar_separation)
+    trip[:, 0] = False
+    trip[:, -1] = True
+    transition = numpy.argmax(trip, axis = 1)
+
+    cf_lam = 2*numpy.maximum(lam + 0.09, 0)**0.62/numpy.maximum(Re_theta, 1e-6)
+    rows = numpy.arange(n_alpha)
+    theta = theta_lam[rows, transition].copy()
+    H = numpy.full(n_alpha, H_transition)
+    separation = numpy.full(n_alpha, n_station - 1)
+    attached = numpy.ones(n_alpha, dtype = bool)
+    index = numpy.arange(n_station)
+    friction = (0.5*(cf_lam[:, 1:]*U_e[:, 1:]**2 + cf_lam[:, :-1]*U_e[:, :-1]**2)*ds*(index[None, 1:] <= transition[:, None])).sum(axis = 1)
+
+    #Head, marched station by station from the transition point
+    for j in range(1, n_station):
+        active = attached & (j > transition)
+        if not active.any():
+            continue
+        U_prev, U_j = U_e[:, j - 1], U_e[:, j]
+        step = ds[:, j - 1]
+        Re_t = numpy.maximum(reynolds_number*U_prev*theta, 1.0)
+        cf = 0.246*10**(-0.678*H)*Re_t**-0.268
+        H1 = head_H1(H)
+        dtheta = cf/2 - (H + 2)*theta/U_prev*dU_ds[:, j - 1]
+        dY = U_prev*0.0306*numpy.maximum(H1 - 3, 1e-6)**-0.6169
+        theta_new = numpy.maximum(theta + dtheta*step, 1e-9)
+        H_new = head_H((U_prev*theta*H1 + dY*step)/(U_j*theta_new))
+
+        #Squire-Young takes the last attached state, so theta and H stop before separation
+        separated = active & (H_new > H_separation)
+        marching = active & ~separated
+        friction = friction + numpy.where(active, cf*U_prev**2*step, 0)
+        theta = numpy.where(marching, theta_new, theta)
+        H = numpy.where(marching, H_new, H)
+        separation = numpy.where(separated, j - 1, separation)
+        attached = attached & ~separated
+
+    U_end = U_e[rows, separation]
+    x_separation = numpy.where(attached, 1.0, x[rows, separation])
+    return theta, H, U_end, x_separation, friction
+
+#---Polar: (N, 5) array of alpha, cl, cd, cdp, cm like a PACC file
+#Inviscid when reynolds_number is None (cd and cdp are 0)
+def airfoil_polar(X, Y, alphas, reynolds_number = None, mach_number = 0.0):
+    alphas = numpy.asarray(alphas, dtype = float)
+    V_t, normal, length, xc, yc = surface_velocity(X, Y, alphas)
+    cl, cm = pressure_forces(V_t, normal, length, xc, yc, alphas)
+    cd = numpy.zeros_like(cl)
+    cdp = numpy.zeros_like(cl)
+
+    if reynolds_number is not None:
+        stations = surface_stations(V_t, length, xc)
+        upper = boundary_layer(*stations["upper"], reynolds_number)
+        lower = boundary_layer(*stations["lower"], reynolds_number)
+
+        #Squire-Young on each side
+        cd = sum(2*theta*U_end**((H + 5)/2) for theta, H, U_end, _, _ in (upper, lower))
+        cd_friction = upper[4] + lower[4]
+
+        #Kirchhoff: lift falls and pressure drag rises as separation moves forward
+        f = numpy.where(cl >= 0, upper[3], lower[3])
+        cl_attached = cl
+        cl = cl_attached*((1 + numpy.sqrt(f))/2)**2
+        cm = cm*((1 + numpy.sqrt(f))/2)**2
+        cd = cd + numpy.abs(cl_attached*numpy.sin(numpy.radians(alphas)))*((1 - numpy.sqrt(f))/2)**2
+        cdp = numpy.maximum(cd - cd_friction, 0)
+
+    #Prandtl-Glauert
+    beta = numpy.sqrt(1 - mach_number**2)
+    return numpy.column_stack([alphas, cl/beta, cd, cdp, cm/beta])
+
+def naca_polar(airfoil_code, alphas, panel = 300, reynolds_number = None, mach_number = 0.0):
+    X, Y = naca_code_coordinates(airfoil_code, panel)
+    return airfoil_polar(X, Y, alphas, reynolds_number, mach_number)
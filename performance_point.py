@@ -0,0 +1,77 @@
+import numpy as np
+
+#Performance Point
+#Optimum speeds per flight condition without a velocity sweep, every argument can be a
+#NumPy array and they broadcast, so thousands of conditions are one call
+#Parabolic polar Cd = cd0 + K*Cl^2 (the initial_drag polars) in closed form:
+#   V_md = sqrt(2W/(rho S))*(K/cd0)^(1/4)   minimum drag: max L/D, prop max range, jet max endurance
+#   V_mp = V_md/3^(1/4)                     minimum power: prop max endurance
+#   V_jr = V_md*3^(1/4)                     jet max range (max V/D)
+#Any other polar cd(cl) goes through a vectorized golden section search on log V
+
+#==============================================================================================#
+#Functions
+
+#---Optimum Speeds: closed form for the parabolic polar
+def optimum_speeds(weight, S, density, cd0, K):
+    weight, S, density, cd0, K = np.broadcast_arrays(*(np.asarray(value, dtype = float) for value in (weight, S, density, cd0, K)))
+    V_md = np.sqrt(2*weight/(density*S))*(K/cd0)**0.25
+    V_mp = V_md*3**-0.25
+    D_min = 2*weight*np.sqrt(K*cd0)
+    #At V_mp induced drag is three times parasitic: D = 4*cd0*q*S
+    D_mp = 4*cd0*0.5*density*V_mp**2*S
+    return {
+        "V_md": V_md,
+        "D_min": D_min,
+        "L_D_max": 1/(2*np.sqrt(K*cd0)),
+        "CL_md": np.sqrt(cd0/K),
+        "V_mp": V_mp,
+        "P_min": D_mp*V_mp,
+        "CL_mp": np.sqrt(3*cd0/K),
+        "V_max_range_prop": V_md,
+        "V_max_endurance_prop": V_mp,
+        "V_max_range_jet": V_md*3**0.25,
+        "V_max_endurance_jet": V_md
+    }
+
+#---Drag Polar Speeds: optimum speeds for one of the initial_drag polars ("clean", "to", "landing")
+def drag_polar_speeds(solution, weight, S, density, configuration = "clean"):
+    cd0, K = {
+        "clean": ("cd0", "K_clean"),
+        "to": ("cd0_TO", "K_to"),
+        "landing": ("cd0_landing", "K_landing")
+    }[configuration]
+    return optimum_speeds(weight, S, density, solution[cd0], solution[K])
+
+#---Golden Section: minimizes f over [low, high] for every element at once (f is vectorized)
+def golden_section(f, low, high, iterations = 60):
+    ratio = (np.sqrt(5) - 1)/2
+    low, high = np.broadcast_arrays(np.asarray(low, dtype = float), np.asarray(high, dtype = float))
+    low, high = low.copy(), high.copy()
+    x1 = high - ratio*(high - low)
+    x2 = low + ratio*(high - low)
+    f1, f2 = f(x1), f(x2)
+    for _ in range(iterations):
+        left = f1 < f2
+        high = np.where(left, x2, high)
+        low = np.where(left, low, x1)
+        x2_new = np.where(left, x1, low + ratio*(high - low))
+        x1_new = np.where(left, high - ratio*(high - low), x2)
+        f_new = f(np.where(left, x1_new, x2_new))
+        f1, f2 = np.where(left, f_new, f2), np.where(left, f1, f_new)
+        x1, x2 = x1_new, x2_new
+    return (low + high)/2
+
+#---Polar Optimum Speeds: V_md and V_mp for any vectorized cd(cl), searched in [V_low, V_high]
+#The optimum has to be inside the bracket, the answer is clamped to it otherwise
+def polar_optimum_speeds(weight, S, density, cd_of_cl, V_low = 30.0, V_high = 1500.0, iterations = 60):
+    weight, S, density = np.broadcast_arrays(*(np.asarray(value, dtype = float) for value in (weight, S, density)))
+
+    def drag(V):
+        q = 0.5*density*V**2
+        return q*S*cd_of_cl(weight/(q*S))
+
+    log_low, log_high = np.full(weight.shape, np.log(V_low)), np.full(weight.shape, np.log(V_high))
+    V_md = np.exp(golden_section(lambda x: drag(np.exp(x)), log_low, log_high, iterations))
+    V_mp = np.exp(golden_section(lambda x: drag(np.exp(x))*np.exp(x), log_low, log_high, iterations))
+    return {"V_md": V_md, "D_min": drag(V_md), "V_mp": V_mp, "P_min": drag(V_mp)*V_mp}
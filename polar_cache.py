@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import numpy
+
+#Polar Cache
+#Parsed XFOIL polars are kept on disk so a case that was already run with the same
+#sim controls is read back instead of being solved again
+#Files are named by a hash of the airfoil code and every sim control, the least
+#recently used files are removed once the cache grows past max_cache_bytes
+#The cache size is a running total, the directory is only listed on the first store and
+#when the total goes over max_cache_bytes, eviction then goes down to evict_fraction of it so
+#the next stores fit without listing it again
+
+#Cache Controls---------------------------------------------------------------
+cache_dir = "polar_cache"
+max_cache_bytes = 200 * 1024**2
+evict_fraction = 0.9                    #eviction frees the cache down to this fraction of max_cache_bytes
+columns = ("alpha", "cl", "cd", "cdp", "cm")
+
+cache_bytes = {}                        #cache directory: total size of its polars, listed on the first store
+
+#==============================================================================================#
+#Functions
+
+#---Key: hash of the airfoil code and the sim controls
+def polar_key(airfoil_code, controls):
+    text = json.dumps({"airfoil": airfoil_code, **controls}, sort_keys = True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def polar_path(key):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+#---Load: returns the polar as an (N, 5) array of alpha, cl, cd, cdp, cm or None on a miss
+def load_polar(key):
+    path = polar_path(key)
+    try:
+        with numpy.load(path) as f:
+            polar = numpy.column_stack([f[name] for name in columns])
+    except (OSError, KeyError, ValueError):
+        return None
+
+    #Touch the file so eviction sees it as recently used
+    os.utime(path)
+    return polar
+
+#---Store: written to a temp file first so a crash never leaves half a polar behind
+def store_polar(key, polar):
+    os.makedirs(cache_dir, exist_ok = True)
+    if cache_dir not in cache_bytes:
+        cache_bytes[cache_dir] = directory_size()
+    polar = numpy.asarray(polar, dtype = float).reshape(-1, len(columns))
+    path = polar_path(key)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        numpy.savez_compressed(f, **{name: polar[:, i] for i, name in enumerate(columns)})
+        size = f.tell()
+    try:
+        replaced = os.path.getsize(path)
+    except OSError:
+        replaced = 0
+    os.replace(temp_path, path)
+    cache_bytes[cache_dir] += size - replaced
+    if cache_bytes[cache_dir] > max_cache_bytes:
+        evict()
+
+def directory_size():
+    return sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.name.endswith(".npz"))
+
+#---Evict: removes least recently used polars until the cache fits in evict_fraction*max_cache_bytes
+def evict():
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npz"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= evict_fraction*max_cache_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    cache_bytes[cache_dir] = total
@@ -0,0 +1,175 @@
+import json
+import os
+import numpy
+import polar_cache
+
+#Polar Database
+#Section polars for every (airfoil, Reynolds number, Mach number, alpha) on one grid, built by
+#running the airfoil_optimization sweep machinery (XFOIL or the panel solver, polar_cache,
+#worker pool) once per flow condition
+#Stored as one .npy per coefficient, float32 arrays of shape (airfoils, Re, Mach, alpha), plus
+#index.json with the axes, so the arrays open memory mapped and a lookup only reads the pages
+#it needs
+#Lookups interpolate linearly in alpha, Mach and log(Re) for whole arrays of conditions at
+#once, anything outside the grid (or past the converged part of a polar) comes back NaN
+
+coefficients = ("cl", "cd", "cm")
+database_dir = "polar_database"
+
+#==============================================================================================#
+#Build
+
+#---Resample: a solver polar (alpha, cl, cd, cdp, cm rows) on the database alpha grid
+def resample(polar, alphas):
+    values = numpy.full((len(coefficients), len(alphas)), numpy.nan)
+    if polar is None or len(polar) == 0:
+        return values
+    polar = polar[numpy.argsort(polar[:, 0])]
+    inside = (alphas >= polar[0, 0]) & (alphas <= polar[-1, 0])
+    for i, column in enumerate((1, 2, 4)):
+        values[i, inside] = numpy.interp(alphas[inside], polar[:, 0], polar[:, column])
+    return values
+
+#---Write Array: .npy written under a temp name first so a reader never sees half an array
+def write_array(file_name, array):
+    temp_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_name, "wb") as f:
+        numpy.save(f, array)
+    os.replace(temp_name, file_name)
+
+#---Build Database: solves every case at every (Re, Mach), polars already in polar_cache are reused
+#cases are airfoil_optimization cases (code, name, t), the alphas default to its alpha sequence
+def build_database(reynolds_numbers, mach_numbers, cases = None, alphas = None, directory = database_dir):
+    import airfoil_optimization as sweep
+
+    cases = sweep.naca_cases() if cases is None else cases
+    alphas = sweep.alpha_sequence() if alphas is None else numpy.asarray(alphas, dtype = float)
+    #Whole Reynolds numbers stay ints, so the cache keys (and XFOIL's VISC line) are the ones the
+    #sweep uses for the same condition and its cached polars are reused
+    reynolds_numbers = sorted(int(Re) if float(Re).is_integer() else float(Re) for Re in reynolds_numbers)
+    mach_numbers = sorted(float(M) for M in mach_numbers)
+    data = numpy.full((len(coefficients), len(cases), len(reynolds_numbers), len(mach_numbers), len(alphas)),
+                      numpy.nan, dtype = numpy.float32)
+
+    #sim_controls and the solvers read the flow condition from the module, one condition at a time
+    saved = sweep.reynolds_number, sweep.mach_number
+    try:
+        for j, Re in enumerate(reynolds_numbers):
+            for k, M in enumerate(mach_numbers):
+                sweep.reynolds_number, sweep.mach_number = Re, M
+                controls = sweep.sim_controls()
+                keys = [polar_cache.polar_key(case[0], controls) for case in cases]
+                polars = [polar_cache.load_polar(key) for key in keys]
+                missing = [i for i, polar in enumerate(polars) if polar is None]
+                for n, (name, polar, error) in sweep.solve_cases([cases[i] for i in missing]):
+                    i = missing[n]
+                    if polar is None:
+                        print(f"ERROR: {name} at Re {Re:.0f}, Mach {M}: {error}")
+                        continue
+                    polar_cache.store_polar(keys[i], polar)
+                    polars[i] = polar
+                for i, polar in enumerate(polars):
+                    data[:, i, j, k] = resample(polar, alphas)
+                print(f"Re {Re:.0f}, Mach {M}: {len(cases) - len(missing)} cached, {len(missing)} solved")
+    finally:
+        sweep.reynolds_number, sweep.mach_number = saved
+
+    os.makedirs(directory, exist_ok = True)
+    for name, array in zip(coefficients, data):
+        write_array(os.path.join(directory, f"{name}.npy"), array)
+    index = {"airfoils": [case[1] for case in cases],
+             "reynolds_numbers": reynolds_numbers,
+             "mach_numbers": mach_numbers,
+             "alphas": alphas.tolist(),
+             "controls": {key: value for key, value in sweep.sim_controls().items() if key not in ("reynolds_number", "mach_number")}}
+    index_file = os.path.join(directory, "index.json")
+    with open(f"{index_file}.{os.getpid()}.tmp", "w") as f:
+        json.dump(index, f, indent = 1)
+    os.replace(f"{index_file}.{os.getpid()}.tmp", index_file)
+    return PolarDatabase(directory)
+
+#==============================================================================================#
+#Lookup
+
+#---Axis Weights: lower grid index and the weight of the upper one for every value
+#Values outside the axis are flagged, a one point axis only matches its own value
+def axis_weights(axis, values):
+    values = numpy.asarray(values, dtype = float)
+    if len(axis) == 1:
+        return numpy.zeros(values.shape, dtype = numpy.intp), numpy.zeros(values.shape), values != axis[0]
+    i = numpy.clip(numpy.searchsorted(axis, values, side = "right") - 1, 0, len(axis) - 2)
+    weight = (values - axis[i])/(axis[i + 1] - axis[i])
+    outside = ~((values >= axis[0]) & (values <= axis[-1]))
+    return i, weight, outside
+
+class PolarDatabase:
+    def __init__(self, directory = database_dir, mmap_mode = "r"):
+        with open(os.path.join(directory, "index.json"), "r") as f:
+            index = json.load(f)
+        self.airfoils = index["airfoils"]
+        self.airfoil_index = {name: i for i, name in enumerate(self.airfoils)}
+        self.reynolds_numbers = numpy.array(index["reynolds_numbers"])
+        self.log_reynolds = numpy.log(self.reynolds_numbers)
+        self.mach_numbers = numpy.array(index["mach_numbers"])
+        self.alphas = numpy.array(index["alphas"])
+        self.controls = index["controls"]
+        self.data = {name: numpy.load(os.path.join(directory, f"{name}.npy"), mmap_mode = mmap_mode) for name in coefficients}
+        #Plain flat views of the same (mapped) memory for the gathers
+        self.flat = {name: numpy.asarray(data).reshape(-1) for name, data in self.data.items()}
+
+    #---Airfoil Rows: names (or row numbers) to database rows
+    def airfoil_rows(self, airfoil):
+        try:
+            if isinstance(airfoil, str):
+                return self.airfoil_index[airfoil]
+            airfoil = numpy.asarray(airfoil)
+            if airfoil.dtype.kind in "iu":
+                return airfoil.astype(numpy.intp)
+            return numpy.array([self.airfoil_index[name] for name in airfoil.ravel()], dtype = numpy.intp).reshape(airfoil.shape)
+        except KeyError as e:
+            raise KeyError(f"{e.args[0]} is not in the polar database") from None
+
+    #---Lookup: {"cl", "cd", "cm"} at every broadcast (airfoil, Reynolds, Mach, alpha)
+    def lookup(self, airfoil, reynolds_number, mach_number, alpha, names = coefficients):
+        rows, reynolds_number, mach_number, alpha = numpy.broadcast_arrays(
+            self.airfoil_rows(airfoil), numpy.asarray(reynolds_number, dtype = float),
+            numpy.asarray(mach_number, dtype = float), numpy.asarray(alpha, dtype = float))
+        with numpy.errstate(divide = "ignore", invalid = "ignore"):
+            j, w_j, out_j = axis_weights(self.log_reynolds, numpy.log(reynolds_number))
+        k, w_k, out_k = axis_weights(self.mach_numbers, mach_number)
+        a, w_a, out_a = axis_weights(self.alphas, alpha)
+        outside = out_j | out_k | out_a
+
+        #Trilinear: flat index and weight of the 8 corners around each condition, corners
+        #with no weight are left out so a NaN next to a grid point does not spread
+        _, n_j, n_k, n_a = self.data[names[0]].shape
+        corners = []
+        for dj, weight_j in ((0, 1 - w_j), (1, w_j)):
+            for dk, weight_k in ((0, 1 - w_k), (1, w_k)):
+                for da, weight_a in ((0, 1 - w_a), (1, w_a)):
+                    weight = weight_j*weight_k*weight_a
+                    index = ((rows*n_j + numpy.minimum(j + dj, n_j - 1))*n_k
+                             + numpy.minimum(k + dk, n_k - 1))*n_a + numpy.minimum(a + da, n_a - 1)
+                    corners.append((index, weight, weight != 0))
+
+        result = {}
+        for name in names:
+            flat = self.flat[name]
+            value = numpy.zeros(rows.shape)
+            for index, weight, used in corners:
+                value += numpy.where(used, weight*flat[index], 0.0)
+            value[outside] = numpy.nan
+            result[name] = value
+        return result
+
+    #---Cl Max: highest converged cl over alpha, interpolated in Mach and log(Re)
+    def cl_max(self, airfoil, reynolds_number, mach_number):
+        cl = self.lookup(numpy.asarray(self.airfoil_rows(airfoil))[..., None], numpy.asarray(reynolds_number)[..., None],
+                         numpy.asarray(mach_number)[..., None], self.alphas, names = ("cl",))["cl"]
+        return numpy.fmax.reduce(cl, axis = -1)
+
+#---Station Cl: initial_drag.station_cl from the database, the section cl max at each station's
+#Reynolds and Mach number (reynolds_numbers and mach_numbers: {"root": .., "mid": .., "tip": ..})
+def station_cl(database, airfoil, reynolds_numbers, mach_numbers):
+    return {station: float(database.cl_max(airfoil, reynolds_numbers[station], mach_numbers[station]))
+            for station in ("root", "mid", "tip")}
@@ -0,0 +1,122 @@
+import numpy
+
+#Polar Parser
+#Reads XFOIL PACC polar files into NumPy arrays and extracts the airfoil performance
+#parameters with array operations instead of a per-row loop
+#A polar is an (N, 5) array of alpha, cl, cd, cdp, cm, a batch of polars is stacked
+#into an (F, R, 5) array padded with NaN rows
+
+polar_columns = ("alpha", "cl", "cd", "cdp", "cm")
+metric_columns = ("Cl", "Cd", "L/Dmax", "Cm", "t/c", "AoA_margin")
+
+#==============================================================================================#
+#Functions
+
+#---Load Polar: header aware, the data block starts after the dashed line under the column names
+def load_polar(polar_file):
+    with open(polar_file, "r") as f:
+        lines = f.read().splitlines()
+
+    n_columns = 7
+    start = 0
+    for i, line in enumerate(lines):
+        tokens = line.split()
+        if tokens and all(set(token) == {"-"} for token in tokens):
+            n_columns = len(tokens)
+            start = i + 1
+            break
+
+    body = lines[start:]
+    try:
+        values = numpy.array(" ".join(body).split(), dtype = float)
+        polar = values.reshape(-1, n_columns)[:, :5]
+    except ValueError:
+        #A garbled row (e.g. "*******" from a diverged point), keep only the clean rows
+        rows = []
+        for line in body:
+            tokens = line.split()
+            if len(tokens) == n_columns:
+                try:
+                    rows.append([float(token) for token in tokens[:5]])
+                except ValueError:
+                    continue
+        polar = numpy.array(rows, dtype = float).reshape(-1, 5)
+
+    return numpy.ascontiguousarray(polar)
+
+#---Load Polars: a batch of polar files as one NaN padded (F, R, 5) array
+def load_polars(polar_files):
+    return stack_polars([load_polar(polar_file) for polar_file in polar_files])
+
+def stack_polars(polars):
+    n_rows = max((len(polar) for polar in polars), default = 0)
+    stacked = numpy.full((len(polars), n_rows, 5), numpy.nan)
+    for i, polar in enumerate(polars):
+        stacked[i, :len(polar)] = polar
+    return stacked
+
+#---Stall Index: first row where cl stops increasing, -1 if cl never falls
+def stall_index(cl):
+    falling = numpy.diff(cl) <= 0
+    return int(numpy.argmax(falling)) if falling.any() else -1
+
+#---Kept Rows: how many leading rows of each polar survive the stall and post stall cut
+#Rows are kept through stall until cl starts rising again, the last row of a polar has
+#no next point to compare against and is never kept
+def kept_rows(stacked):
+    cl = stacked[:, :, 1]
+    n_rows = numpy.sum(~numpy.isnan(stacked[:, :, 0]), axis = 1)
+    d_cl = numpy.diff(cl, axis = 1)
+    index = numpy.arange(d_cl.shape[1])
+    valid = index[None, :] < (n_rows[:, None] - 1)
+
+    falling = (d_cl <= 0) & valid
+    has_stall = falling.any(axis = 1)
+    stall = numpy.argmax(falling, axis = 1)
+
+    rising = (d_cl > 0) & valid & (index[None, :] > stall[:, None])
+    has_post_stall = has_stall & rising.any(axis = 1)
+    post_stall = numpy.argmax(rising, axis = 1)
+
+    return numpy.where(has_post_stall, post_stall + 1, numpy.maximum(n_rows - 1, 0))
+
+#---Batch Metrics: performance parameters for every polar in a stacked batch
+#Returns an (F, 6) array in metric_columns order, rows with no kept points are NaN
+def batch_metrics(stacked, t):
+    stacked = numpy.asarray(stacked, dtype = float)
+    n_polars = stacked.shape[0]
+    t = numpy.broadcast_to(numpy.asarray(t, dtype = float), (n_polars,))
+    metrics = numpy.full((n_polars, len(metric_columns)), numpy.nan)
+    #A polar needs two rows to compare before anything is kept
+    if stacked.shape[1] < 2:
+        return metrics
+
+    keep = numpy.arange(stacked.shape[1])[None, :] < kept_rows(stacked)[:, None]
+    alpha, cl, cd, cm = stacked[:, :, 0], stacked[:, :, 1], stacked[:, :, 2], stacked[:, :, 4]
+    with numpy.errstate(divide = "ignore", invalid = "ignore"):
+        L_D = cl/cd
+
+    rows = numpy.arange(n_polars)
+    i_cl_max = numpy.argmax(numpy.where(keep, cl, -numpy.inf), axis = 1)
+    i_cd_min = numpy.argmin(numpy.where(keep, cd, numpy.inf), axis = 1)
+    i_L_Dmax = numpy.argmax(numpy.where(keep, L_D, -numpy.inf), axis = 1)
+    i_cm_min = numpy.argmin(numpy.where(keep, cm, numpy.inf), axis = 1)
+
+    metrics[:, 0] = cl[rows, i_cl_max]                                  # maximum Cl
+    metrics[:, 1] = cd[rows, i_cd_min]                                  # minimum Cd
+    metrics[:, 2] = L_D[rows, i_L_Dmax]                                 # maximum L/D
+    metrics[:, 3] = cm[rows, i_cm_min]                                  # minimum Cm
+    metrics[:, 4] = t                                                   # thickness
+    metrics[:, 5] = alpha[rows, i_cl_max] - alpha[rows, i_L_Dmax]       # AoA margin
+    metrics[~keep.any(axis = 1)] = numpy.nan
+    return metrics
+
+#---Polar Metrics: performance parameters of one polar as a list, None if nothing was kept
+def polar_metrics(polar, t):
+    polar = numpy.asarray(polar, dtype = float).reshape(-1, 5)
+    metrics = batch_metrics(polar[None, :, :], t)[0]
+    if numpy.isnan(metrics[0]):
+        return None
+    final_data = [float(value) for value in metrics]
+    final_data[4] = t
+    return final_data
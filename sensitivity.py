@@ -0,0 +1,77 @@
+import numpy as np
+from sympy import Eq
+import main
+import initial_drag
+import model_compiler
+
+#Sensitivity
+#Exact partial derivatives of the sizing and drag outputs with respect to every entry of
+#main.parameters, initial_drag.drag_constants and the station Cl (cl_root, cl_mid, cl_tip)
+#The weight and drag systems are joined into one (the drag L_D is the cruise L/D of the weight
+#model), solved once, differentiated symbolically and compiled (model_compiler), so the whole
+#gradient comes from one kernel call instead of 2N perturbed solves
+#Inputs can be NumPy arrays, every value and derivative then comes back with their shape
+
+outputs = ("W_0", "W_empty", "W_fuel", "cd0", "K_clean", "e_clean", "cl_max")
+
+#==============================================================================================#
+#Functions
+
+#---Design System: weight and drag equations in one system, L_D is an unknown
+def design_system():
+    w_equations, w_unknowns, w_inputs = main.weight_system()
+    d_equations, d_unknowns, d_inputs = initial_drag.drag_system()
+    by_name = {str(symbol): symbol for symbol in w_inputs}
+    L_D = d_inputs[0]
+    lift_to_drag = Eq(L_D, main.cruise_lift_to_drag(by_name["aspect_ratio"], by_name["swet_sref"]))
+    return (w_equations + d_equations + [lift_to_drag],
+            w_unknowns + d_unknowns + [L_D],
+            w_inputs + [symbol for symbol in d_inputs[1:] if symbol not in w_inputs])
+
+#---Design Inputs: the input values for design_system
+def design_inputs(parameters = main.parameters, constants = initial_drag.drag_constants, station_cl = initial_drag.station_cl):
+    return {**parameters, **constants, **{f"cl_{station}": cl for station, cl in station_cl.items()}}
+
+#---Sensitivities: {"value": {output: y}, "gradient": {output: {input: dy/dx}},
+#"hessian": {output: {(x, y): d2y/dxdy}}} (hessian only for order = 2, both (x, y) and (y, x) are filled)
+def sensitivities(outputs = outputs, order = 1, parameters = main.parameters, constants = initial_drag.drag_constants,
+                  station_cl = initial_drag.station_cl):
+    equations, unknowns, inputs = design_system()
+    kernel = model_compiler.compile_derivatives(equations, unknowns, inputs, outputs, order)
+    values = kernel(**design_inputs(parameters, constants, station_cl))
+    names = [str(symbol) for symbol in inputs]
+
+    result = {"value": {name: values[name] for name in outputs},
+              "gradient": {name: {x: values[(name, x)] for x in names} for name in outputs}}
+    if order > 1:
+        result["hessian"] = {}
+        for name in outputs:
+            hessian = {}
+            for i, x in enumerate(names):
+                for y in names[i:]:
+                    hessian[(x, y)] = hessian[(y, x)] = values[(name, x, y)]
+            result["hessian"][name] = hessian
+    return result
+
+#---Elasticities: d ln(output)/d ln(input), the % change of an output per % change of an input
+def elasticities(result, parameters = main.parameters, constants = initial_drag.drag_constants,
+                 station_cl = initial_drag.station_cl):
+    inputs = design_inputs(parameters, constants, station_cl)
+    return {name: {x: np.asarray(gradient)*inputs[x]/result["value"][name] for x, gradient in gradients.items()}
+            for name, gradients in result["gradient"].items()}
+
+#==============================================================================================#
+#Report: W_0 gradient and elasticities at the baseline design
+def print_report(output = "W_0"):
+    from tabulate import tabulate
+
+    result = sensitivities()
+    elasticity = elasticities(result)
+    inputs = design_inputs()
+    rows = [[x, inputs[x], float(gradient), float(elasticity[output][x])] for x, gradient in result["gradient"][output].items()]
+    rows.sort(key = lambda row: -abs(row[3]))
+    print(f"{output} = {float(result['value'][output]):.4f}")
+    print(tabulate(rows, headers = ("Input", "Value", f"d{output}/dx", "Elasticity")))
+
+if __name__ == "__main__":
+    print_report()
@@ -0,0 +1,266 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
+import main
+import initial_drag
+import weight_sizing
+import wing_solver
+import constraint_diagram
+import mission_simulator
+from atmosphere import flight_numbers
+from design_pipeline import fingerprint
+import telemetry
+
+#Sizing Loop
+#Closes the loop main -> initial_drag -> thrust_required leaves open: the gross weight W_0 and
+#the wing area S are iterated to a fixed point
+#   chords from S, aspect ratio and taper -> station Reynolds and Mach numbers at cruise
+#   -> airfoil selection and section data (polar database, or thin airfoil sections with the
+#      initial_drag station cl max without one)
+#   -> lifting line span efficiency and CLmax (wing_solver)
+#   -> polar: cd0 = c_fe*Swet/Sref, Oswald e from the span efficiency and cd0 (Kroo),
+#      flapped polars from initial_drag.drag_model with that L/D
+#   -> design wing and power loading (constraint_diagram)
+#   -> fuel fraction from flying the mission at W_0, S and that power loading (mission_simulator)
+#   -> W_0 (weight_sizing.gross_weight) and S = W_0/(W/S)
+#The iteration is accelerated with Anderson mixing, every stage is memoized on its inputs
+#rounded to memo_digits significant digits (the max_memo most recent per stage), so later
+#iterations and neighbouring design points reuse what did not change. size_designs runs
+#independent design points on a process pool (each worker keeps its own memo)
+#Stage misses and iterations are timed in telemetry (<stage>_stage, sizing_iteration)
+#The result carries thrust_param for thrust_required_sweep in place of its hard coded one
+
+memo_digits = 10
+max_memo = 256                          #entries kept per stage, the least recently used go first
+
+#==============================================================================================#
+#Memo
+
+def rounded(value, digits):
+    if isinstance(value, dict):
+        return {key: rounded(item, digits) for key, item in value.items()}
+    if isinstance(value, (float, np.floating)):
+        return float(f"{float(value):.{digits}g}")
+    return value
+
+class StageMemo:
+    def __init__(self, function, max_memo = None):
+        self.function = function
+        self.max_memo = max_memo
+        self.memo = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, **values):
+        key = fingerprint(rounded(values, memo_digits))
+        if key in self.memo:
+            self.hits += 1
+            self.memo.move_to_end(key)
+            return self.memo[key]
+
+        self.misses += 1
+        with telemetry.stage(self.function.__name__):
+            output = self.function(**values)
+        self.memo[key] = output
+        while len(self.memo) > (self.max_memo if self.max_memo is not None else max_memo):
+            self.memo.popitem(last = False)
+        return output
+
+@lru_cache(maxsize = None)
+def open_database(directory):
+    from polar_database import PolarDatabase
+    return PolarDatabase(directory)
+
+#==============================================================================================#
+#Stages
+
+#---Airfoil: best (cl/cd)max at the mid span condition, the initial_drag airfoil without a database
+def airfoil_stage(database_dir, reynolds_number, mach_number):
+    if database_dir is None:
+        return initial_drag.selected_airfoil
+    database = open_database(database_dir)
+    polar = database.lookup(np.arange(len(database.airfoils))[:, None], reynolds_number, mach_number,
+                            database.alphas, names = ("cl", "cd"))
+    L_D = np.fmax.reduce(polar["cl"]/polar["cd"], axis = -1)
+    return database.airfoils[int(np.nanargmax(L_D))]
+
+#---Sections: root, mid and tip section data for wing_solver
+def sections_stage(database_dir, airfoil, reynolds_numbers, mach_number, station_cl):
+    if database_dir is None:
+        code = airfoil.replace("NACA", "")
+        return {station: wing_solver.thin_airfoil_section(code, station_cl[station]) for station in wing_solver.stations}
+    database = open_database(database_dir)
+    return {station: wing_solver.database_section(database, airfoil, reynolds_numbers[station], mach_number)
+            for station in wing_solver.stations}
+
+def wing_stage(aspect_ratio, taper, twist, sections):
+    wing = wing_solver.lifting_line(aspect_ratio, taper, twist, sections)
+    return {"e_span": float(wing["e"]), "CL_max": float(wing["CL_max"])}
+
+#---Polar: clean polar from the wing, flapped polars and takeoff/landing cl from initial_drag
+def polar_stage(aspect_ratio, swet_sref, e_span, CL_max, station_cl, constants):
+    cd0 = constants["c_fe"]*swet_sref
+    e = 1/(1/e_span + 0.38*cd0*np.pi*aspect_ratio)                         #Kroo
+    L_D = 0.5/np.sqrt(cd0/(np.pi*e*aspect_ratio))
+    polar = initial_drag.drag_model()(L_D = L_D, aspect_ratio = aspect_ratio, swet_sref = swet_sref,
+                                      cl_root = station_cl["root"], cl_mid = station_cl["mid"],
+                                      cl_tip = station_cl["tip"], **constants)
+    polar = {key: float(value) for key, value in polar.items()}
+    polar["cl_max"] = CL_max + 0.9*polar["cl_maxhld"]                       #flap increment as in initial_drag
+    polar["L_D"] = float(L_D)
+    return polar
+
+def constraint_stage(polar, n_p, requirements):
+    keys = ("cd0", "K_clean", "cd0_TO", "K_to", "cl_flapTO", "cd0_landing", "K_landing", "cl_max")
+    diagram = constraint_diagram.constraint_diagram({key: polar[key] for key in keys}, n_p, requirements, raster = False)
+    return float(diagram["design_wing_loading"]), float(diagram["design_power_loading"])
+
+def mission_stage(W_0, S, cd0, K, parameters, mission):
+    flown = mission_simulator.fly_mission(W_0, S, cd0, K, parameters, mission)
+    return {key: float(value) for key, value in flown.items() if key.startswith("W_")}
+
+stages = {name: StageMemo(function) for name, function in (
+    ("airfoil", airfoil_stage), ("sections", sections_stage), ("wing", wing_stage), ("polar", polar_stage),
+    ("constraints", constraint_stage), ("mission", mission_stage))}
+
+#---Memo Stats: {stage: (hits, misses)} in this process
+def memo_stats():
+    return {name: (stage.hits, stage.misses) for name, stage in stages.items()}
+
+#==============================================================================================#
+#Loop
+
+#---Anderson: fixed point of G from x0, the residual is G(x) - x relative to x0
+#Returns (x, iterations, residual history, converged)
+def anderson(G, x0, tolerance = 1e-8, max_iterations = 50, depth = 3):
+    scale = np.abs(np.asarray(x0, dtype = float))
+    y = np.asarray(x0, dtype = float)/scale
+    dY, dF = [], []
+    history = []
+    y_previous = f_previous = None
+    for k in range(max_iterations):
+        g = np.asarray(G(y*scale), dtype = float)/scale
+        f = g - y
+        residual = float(np.max(np.abs(f)))
+        history.append(residual)
+        if not np.all(np.isfinite(g)):
+            return y*scale, k + 1, history, False
+        if residual < tolerance:
+            return g*scale, k + 1, history, True
+
+        if y_previous is not None:
+            dY.append(y - y_previous)
+            dF.append(f - f_previous)
+            dY, dF = dY[-depth:], dF[-depth:]
+        y_previous, f_previous = y, f
+        if dF and depth:
+            gamma = np.linalg.lstsq(np.column_stack(dF), f, rcond = None)[0]
+            y = y + f - (np.column_stack(dY) + np.column_stack(dF)) @ gamma
+        else:
+            y = g
+    return y*scale, max_iterations, history, False
+
+#---Size Aircraft: the converged design for one set of inputs
+#parameters, requirements and mission default to main, constraint_diagram and
+#mission_simulator, database_dir points at a polar_database (None: thin airfoil sections)
+def size_aircraft(parameters = main.parameters, requirements = constraint_diagram.requirements,
+                  mission = mission_simulator.mission, taper = 0.5, twist = 0.0, database_dir = None,
+                  constants = initial_drag.drag_constants, station_cl = initial_drag.station_cl,
+                  tolerance = 1e-8, max_iterations = 50, depth = 3):
+    AR = parameters["aspect_ratio"]
+    state = {}
+
+    @telemetry.timed("sizing_iteration")
+    def G(x):
+        W_0, S = x
+        span = np.sqrt(AR*S)
+        c_root = 2*S/(span*(1 + taper))
+        chords = {"root": c_root, "mid": c_root*(1 + taper)/2, "tip": c_root*taper}
+        reynolds_numbers, mach_numbers = {}, {}
+        for station, chord in chords.items():
+            Re, M = flight_numbers(requirements["cruise_altitude"], requirements["cruise_speed"], chord)
+            reynolds_numbers[station], mach_numbers[station] = float(Re), float(M)
+
+        #Without a database the sections do not depend on the flow condition, left out of the memo key
+        condition = (reynolds_numbers, mach_numbers["mid"]) if database_dir is not None else (None, None)
+        airfoil = stages["airfoil"](database_dir = database_dir,
+                                    reynolds_number = condition[0]["mid"] if condition[0] is not None else None,
+                                    mach_number = condition[1])
+        sections = stages["sections"](database_dir = database_dir, airfoil = airfoil, reynolds_numbers = condition[0],
+                                      mach_number = condition[1], station_cl = dict(station_cl))
+        wing = stages["wing"](aspect_ratio = AR, taper = taper, twist = twist, sections = sections)
+        polar = stages["polar"](aspect_ratio = AR, swet_sref = parameters["swet_sref"], e_span = wing["e_span"],
+                                CL_max = wing["CL_max"], station_cl = dict(station_cl), constants = dict(constants))
+        wing_loading, power_loading = stages["constraints"](polar = polar, n_p = parameters["n_p"], requirements = dict(requirements))
+        flown = stages["mission"](W_0 = W_0, S = S, cd0 = polar["cd0"], K = polar["K_clean"], parameters = dict(parameters),
+                                  mission = {**mission, "power_loading": power_loading})
+        fuel_fraction = weight_sizing.fuel_reserve*(1 - flown["W_6"]/flown["W_0"])
+        W_0_new = float(weight_sizing.gross_weight(fuel_fraction, parameters["crew"] + parameters["payload"]))
+
+        state.update(airfoil = airfoil, reynolds_numbers = reynolds_numbers, mach_numbers = mach_numbers, wing = wing,
+                     polar = polar, wing_loading = wing_loading, power_loading = power_loading, flown = flown,
+                     fuel_fraction = fuel_fraction)
+        return [W_0_new, W_0_new/wing_loading]
+
+    W_start = float(weight_sizing.batch_weight_estimation(parameters)[0]["W_0"])
+    x, iterations, history, converged = anderson(G, [W_start, W_start/25.0], tolerance, max_iterations, depth)
+    if not converged:
+        print(f"ERROR: sizing loop did not converge in {iterations} iterations (residual {history[-1]:.3e})")
+    W_0, S = float(x[0]), float(x[1])
+    return {
+        **state,
+        "W_0": W_0,
+        "S": S,
+        "W_fuel": state["fuel_fraction"]*W_0,
+        "iterations": iterations,
+        "residuals": history,
+        "converged": converged,
+        "thrust_param": {"altitude": requirements["cruise_altitude"], "Wing Area": S, "Gross Weight": W_0,
+                         "C_d0": state["polar"]["cd0"], "k": state["polar"]["K_clean"]}
+    }
+
+def size_point(arguments):
+    return size_aircraft(**arguments)
+
+#---Size Designs: size_aircraft for every dict of arguments in points, on a process pool
+#workers = 1 runs in this process, None uses every CPU, results are in the order of points
+def size_designs(points, workers = None):
+    points = list(points)
+    workers = os.cpu_count() if workers is None else workers
+    initial_drag.drag_model()                   #compiled (or cached on disk) before the workers start
+    if workers == 1 or len(points) < 2:
+        return [size_point(point) for point in points]
+    with ProcessPoolExecutor(max_workers = min(workers, len(points))) as pool:
+        return list(pool.map(size_point, points))
+
+#==============================================================================================#
+#Report: the converged design next to the one way chain
+def print_report():
+    from tabulate import tabulate
+    import thrust_required
+
+    telemetry.start_run()
+    design = size_aircraft()
+    weight = main.weight_stage()
+    sweep = thrust_required.thrust_required_sweep(design["thrust_param"])
+    print(f"Converged in {design['iterations']} iterations, residuals {', '.join(f'{r:.1e}' for r in design['residuals'])}")
+    print(tabulate([
+        ["W_0 (lb)", design["W_0"], weight["W_0"]],
+        ["W_fuel (lb)", design["W_fuel"], weight["W_fuel"]],
+        ["L/D max", design["polar"]["L_D"], weight["L_D-maxCruise"]],
+        ["Wing Area (ft^2)", design["S"], thrust_required.param["Wing Area"]],
+        ["Gross Weight for thrust (lb)", design["W_0"], thrust_required.param["Gross Weight"]],
+        ["C_d0", design["polar"]["cd0"], thrust_required.param["C_d0"]],
+        ["k", design["polar"]["K_clean"], thrust_required.param["k"]]],
+        headers = ("", "Sizing loop", "Current scripts")))
+    print(f"Airfoil {design['airfoil']}, W/S {design['wing_loading']:.2f} lb/ft^2, P/W {design['power_loading']/550:.4f} hp/lb")
+    print(f"Minimum thrust required {sweep['T_min']:.2f} lbf at {sweep['V_md']:.1f} ft/s")
+    print(f"Stage memo (hits, misses): {memo_stats()}")
+    print()
+    telemetry.print_summary()
+    telemetry.finish_run()
+
+if __name__ == "__main__":
+    print_report()
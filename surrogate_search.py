@@ -0,0 +1,153 @@
+import math as m
+import numpy
+
+#Surrogate Search
+#Adaptive alternative to running every NACA code in a grid: a Gaussian process is fit to the
+#scores of the cases evaluated so far and the next batch is the set of designs with the most
+#expected improvement over the best score
+#A batch is picked one design at a time, each pick is added to the fit with its predicted
+#score ("kriging believer") so the batch spreads out and can run on parallel workers
+#Designs are (camber %, camber location /10, thickness %), either on the integer NACA grid
+#or continuous inside the bounds
+
+erf = numpy.vectorize(m.erf)
+
+#==============================================================================================#
+#Gaussian Process
+
+class GaussianProcess:
+    def __init__(self, bounds, length_scales = (0.1, 0.2, 0.3, 0.5, 0.8), noise = 1e-6, max_noise = 1e-2):
+        self.bounds = numpy.asarray(bounds, dtype = float)
+        self.length_scales = length_scales
+        self.noise = noise
+        self.max_noise = max_noise
+
+    #Designs are scaled to the unit cube so one length scale fits every variable
+    def scale(self, X):
+        low, high = self.bounds[:, 0], self.bounds[:, 1]
+        return (numpy.asarray(X, dtype = float) - low)/numpy.where(high > low, high - low, 1.0)
+
+    def kernel(self, A, B, length_scale):
+        d2 = ((A[:, None, :] - B[None, :, :])**2).sum(axis = 2)
+        return numpy.exp(-0.5*d2/length_scale**2)
+
+    #---Fit: length scale picked by the log marginal likelihood
+    #Near duplicate designs make the kernel matrix singular, the diagonal jitter is raised tenfold
+    #until a Cholesky factor exists, up to max_noise
+    def fit(self, X, y, length_scale = None):
+        self.X = self.scale(X)
+        y = numpy.asarray(y, dtype = float)
+        if not numpy.all(numpy.isfinite(y)):
+            raise ValueError("GaussianProcess.fit: the scores contain NaN or inf")
+        self.y_mean = y.mean()
+        self.y_std = y.std() if y.std() > 0 else 1.0
+        self.y = (y - self.y_mean)/self.y_std
+
+        best = None
+        noise = self.noise
+        while best is None and noise <= self.max_noise:
+            for ls in ([length_scale] if length_scale is not None else self.length_scales):
+                K = self.kernel(self.X, self.X, ls) + noise*numpy.eye(len(self.X))
+                try:
+                    L = numpy.linalg.cholesky(K)
+                except numpy.linalg.LinAlgError:
+                    continue
+                alpha = numpy.linalg.solve(L.T, numpy.linalg.solve(L, self.y))
+                log_likelihood = -0.5*self.y @ alpha - numpy.log(numpy.diag(L)).sum()
+                if best is None or log_likelihood > best[0]:
+                    best = (log_likelihood, ls, L, alpha)
+            noise *= 10
+
+        if best is None:
+            raise ValueError(f"GaussianProcess.fit: the kernel matrix of {len(self.X)} designs is not "
+                             f"positive definite for any length scale, even with {self.max_noise} jitter")
+        _, self.length_scale, self.L, self.alpha = best
+        return self
+
+    def predict(self, X):
+        Xs = self.scale(X)
+        K_s = self.kernel(Xs, self.X, self.length_scale)
+        mean = K_s @ self.alpha
+        v = numpy.linalg.solve(self.L, K_s.T)
+        var = numpy.maximum(1 - (v**2).sum(axis = 0), 1e-12)
+        return self.y_mean + self.y_std*mean, self.y_std*numpy.sqrt(var)
+
+#==============================================================================================#
+#Functions
+
+#---Expected Improvement of each candidate over the best score (higher scores are better)
+def expected_improvement(mean, std, best, xi = 0.01):
+    improvement = mean - best - xi
+    z = improvement/std
+    cdf = 0.5*(1 + erf(z/m.sqrt(2)))
+    pdf = numpy.exp(-0.5*z**2)/m.sqrt(2*m.pi)
+    return improvement*cdf + std*pdf
+
+#---Candidates: every unevaluated grid point, or random designs plus perturbations of the best
+def candidates(bounds, integer, evaluated, best, rng, n_random = 2000):
+    bounds = numpy.asarray(bounds, dtype = float)
+    if integer:
+        axes = [numpy.arange(low, high + 1) for low, high in bounds]
+        grid = numpy.stack(numpy.meshgrid(*axes, indexing = "ij"), axis = -1).reshape(-1, len(bounds))
+        seen = {tuple(x) for x in numpy.asarray(evaluated, dtype = float)}
+        return numpy.array([x for x in grid if tuple(x) not in seen]).reshape(-1, len(bounds))
+
+    low, high = bounds[:, 0], bounds[:, 1]
+    random = low + (high - low)*rng.random((n_random, len(bounds)))
+    local = best + 0.05*(high - low)*rng.standard_normal((n_random//4, len(bounds)))
+    return numpy.round(numpy.clip(numpy.vstack([random, local]), low, high), 2)
+
+#---Initial Design: Latin hypercube inside the bounds
+def initial_design(bounds, n, integer, rng):
+    bounds = numpy.asarray(bounds, dtype = float)
+    low, high = bounds[:, 0], bounds[:, 1]
+    strata = numpy.stack([rng.permutation(n) for _ in range(len(bounds))], axis = 1)
+    X = low + (high - low)*(strata + rng.random((n, len(bounds))))/n
+    X = numpy.round(X) if integer else numpy.round(X, 2)
+    return numpy.unique(X, axis = 0)
+
+#---Propose Batch: batch_size designs by expected improvement, kriging believer in between
+def propose_batch(gp, X, y, pool, batch_size):
+    X, y = list(X), list(y)
+    pool = numpy.asarray(pool, dtype = float)
+    batch = []
+    for _ in range(min(batch_size, len(pool))):
+        mean, std = gp.predict(pool)
+        ei = expected_improvement(mean, std, max(y))
+        pick = int(numpy.argmax(ei))
+        batch.append(pool[pick])
+        X.append(pool[pick])
+        y.append(mean[pick])
+        pool = numpy.delete(pool, pick, axis = 0)
+        gp.fit(X, y, gp.length_scale)
+    return numpy.array(batch)
+
+#---Search: evaluate(designs) -> metrics rows (None for a failed case), score(metrics rows) -> scores
+#Returns every evaluated design with its metrics, in evaluation order
+def search(evaluate, score, bounds, integer = True, n_initial = 8, n_iterations = 6, batch_size = 4, seed = 0):
+    rng = numpy.random.default_rng(seed)
+    designs, metrics = [], []
+
+    def run(batch):
+        for design, row in zip(batch, evaluate(batch)):
+            designs.append(numpy.asarray(design, dtype = float))
+            metrics.append(row)
+
+    run(initial_design(bounds, n_initial, integer, rng))
+    for _ in range(n_iterations):
+        ok = [i for i, row in enumerate(metrics) if row is not None]
+        if len(ok) < 2:
+            break
+        #Scores are relative to the cases evaluated so far, so they are refit every iteration
+        y = numpy.asarray(score([metrics[i] for i in ok]), dtype = float)
+        X = [designs[i] for i in ok]
+        gp = GaussianProcess(bounds).fit(X, y)
+        pool = candidates(bounds, integer, designs, X[int(numpy.argmax(y))], rng)
+        if not integer:
+            seen = {tuple(x) for x in designs}
+            pool = numpy.array([x for x in pool if tuple(x) not in seen]).reshape(-1, len(bounds))
+        if len(pool) == 0:
+            break
+        run(propose_batch(gp, X, y, pool, batch_size))
+
+    return designs, metrics
@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import time
+
+#Sweep Journal
+#Durable record of every case in a sweep (SQLite in WAL mode) so an interrupted sweep
+#picks up where it stopped instead of starting over
+#Each case is keyed like the polar cache (airfoil code + sim controls) and moves through
+#pending -> running -> done / failed, done cases keep their performance parameters
+#Writes are buffered and committed every commit_interval seconds or commit_batch records,
+#each commit is fsync'd (synchronous = FULL)
+#commit_due() commits buffered writes once commit_interval has passed, the sweep also calls it
+#while it waits for cases, so finished cases are on disk while another one hangs
+
+metric_names = ("cl", "cd", "l_d", "cm", "t_c", "aoa_margin")
+query_chunk = 500                       #keys per IN (...) query, under SQLite's bound variable limit
+
+#==============================================================================================#
+#Journal
+
+class SweepJournal:
+    def __init__(self, journal_file = "sweep_journal.db", commit_interval = 5.0, commit_batch = 50):
+        self.commit_interval = commit_interval
+        self.commit_batch = commit_batch
+        self.db = sqlite3.connect(journal_file)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = FULL")
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS cases (
+                key TEXT PRIMARY KEY,
+                airfoil TEXT NOT NULL,
+                controls TEXT NOT NULL,
+                status TEXT NOT NULL,
+                {", ".join(f"{name} REAL" for name in metric_names)},
+                error TEXT,
+                updated REAL
+            )""")
+        self.db.commit()
+        self.pending_writes = 0
+        self.last_commit = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    #---Commit: flushes buffered writes to disk
+    def commit(self):
+        self.db.commit()
+        self.pending_writes = 0
+        self.last_commit = time.monotonic()
+
+    def maybe_commit(self):
+        self.pending_writes += 1
+        if self.pending_writes >= self.commit_batch:
+            self.commit()
+        else:
+            self.commit_due()
+
+    #---Commit Due: commits buffered writes once commit_interval has passed since the last commit
+    def commit_due(self):
+        if self.pending_writes and time.monotonic() - self.last_commit >= self.commit_interval:
+            self.commit()
+
+    #---Add Cases: registers cases as pending, cases already in the journal keep their status
+    def add_cases(self, keys, airfoil_names, controls):
+        controls = json.dumps(controls, sort_keys = True)
+        self.db.executemany(
+            "INSERT OR IGNORE INTO cases (key, airfoil, controls, status, updated) VALUES (?, ?, ?, 'pending', ?)",
+            [(key, name, controls, time.time()) for key, name in zip(keys, airfoil_names)])
+        self.commit()
+
+    def statuses(self, keys):
+        status = {}
+        for i in range(0, len(keys), query_chunk):
+            chunk = keys[i:i + query_chunk]
+            status.update(self.db.execute(f"SELECT key, status FROM cases WHERE key IN ({','.join('?'*len(chunk))})", chunk))
+        return [status.get(key, "pending") for key in keys]
+
+    def mark_running(self, keys):
+        self.db.executemany("UPDATE cases SET status = 'running', updated = ? WHERE key = ?",
+            [(time.time(), key) for key in keys])
+        self.commit()
+
+    def finish(self, key, metrics):
+        self.db.execute(
+            f"UPDATE cases SET status = 'done', error = NULL, updated = ?, {', '.join(f'{name} = ?' for name in metric_names)} WHERE key = ?",
+            (time.time(), *[float(value) for value in metrics], key))
+        self.maybe_commit()
+
+    def fail(self, key, error):
+        self.db.execute("UPDATE cases SET status = 'failed', error = ?, updated = ? WHERE key = ?",
+            (error, time.time(), key))
+        self.maybe_commit()
+
+    #---Results: (airfoil, status, metrics or None, error) for each key, in the order given
+    def results(self, keys):
+        self.commit()
+        rows = {}
+        for i in range(0, len(keys), query_chunk):
+            chunk = keys[i:i + query_chunk]
+            query = (f"SELECT key, airfoil, status, {', '.join(metric_names)}, error FROM cases "
+                     f"WHERE key IN ({','.join('?'*len(chunk))})")
+            for key, *row in self.db.execute(query, chunk):
+                rows[key] = row
+        results = []
+        for key in keys:
+            if key not in rows:
+                results.append((None, "pending", None, None))
+                continue
+            airfoil, status, *values, error = rows[key]
+            metrics = values if status == "done" else None
+            results.append((airfoil, status, metrics, error))
+        return results
@@ -0,0 +1,267 @@
+import contextlib
+import functools
+import json
+import math as m
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+#Telemetry
+#Where the time goes in the sweep and sizing pipeline, collected per process (thread safe):
+#   stage(name)             context manager, the wall time of the block goes to the stage
+#   timed(name)             the same as a decorator
+#   record(kind, **fields)  one structured record (a solved case, an XFOIL session start, a file
+#                           write), kept in memory and written as a JSON line to records_file
+#   count(name, value)      a counter
+#Stage times are summed over threads, with parallel workers they can add up to more than the
+#wall time of the run
+#print_summary() prints the stage table, the counters and a histogram of the per case solve
+#times, prometheus() gives the counters and stage histograms in the Prometheus text format
+#With profile = True start_run() also starts a sampling profiler (a thread reading every
+#thread's stack each profile_interval), finish_run() prints the hottest functions and writes the
+#collapsed stacks (flame graph input, "a;b;c count" per line) to profile_file
+
+enabled = True
+records_file = None                     #JSON lines, None keeps the records in memory only
+metrics_file = None                     #Prometheus text format, written by finish_run()
+profile = False
+profile_interval = 0.005                #s between profiler samples
+profile_file = "profile_stacks.txt"
+histogram_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+lock = threading.Lock()
+stage_times = defaultdict(list)         #stage name: [seconds per call]
+counters = Counter()
+records = []
+output = None                           #open records_file
+sampler = None                          #running profiler
+
+#==============================================================================================#
+#Collection
+
+#---Reset: forgets every stage time, counter and record
+def reset():
+    with lock:
+        stage_times.clear()
+        counters.clear()
+        records.clear()
+
+#---Stage: adds the wall time of the block to the stage, also when the block raises
+@contextlib.contextmanager
+def stage(name):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with lock:
+            stage_times[name].append(elapsed)
+
+#---Timed: stage(name) around every call of the decorated function
+def timed(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value = 1):
+    if enabled:
+        with lock:
+            counters[name] += value
+
+#---Record: {"kind", "time" (unix s), **fields}, fields have to be JSON values
+def record(kind, **fields):
+    if not enabled:
+        return
+    entry = {"kind": kind, "time": time.time(), **fields}
+    with lock:
+        records.append(entry)
+        counters[f"{kind}_records"] += 1
+        if output is not None:
+            output.write(json.dumps(entry) + "\n")
+
+#---Run: reset, open records_file (appended) and start the profiler when profile is set
+def start_run():
+    global output, sampler
+    reset()
+    if records_file is not None and output is None:
+        output = open(records_file, "a")
+    if profile and sampler is None:
+        sampler = Sampler(profile_interval)
+        sampler.start()
+
+#---Finish: stops the profiler, closes records_file and writes metrics_file
+def finish_run():
+    global output, sampler
+    if sampler is not None:
+        sampler.stop()
+        print_profile(sampler)
+        sampler = None
+    with lock:
+        if output is not None:
+            output.close()
+            output = None
+    if metrics_file is not None:
+        with open(metrics_file, "w") as f:
+            f.write(prometheus())
+
+#==============================================================================================#
+#Summaries
+
+#---Percentile: q (0 to 100) of a list of numbers, linear between the sorted values
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return m.nan
+    position = (len(values) - 1)*q/100
+    i = int(position)
+    j = min(i + 1, len(values) - 1)
+    return values[i] + (values[j] - values[i])*(position - i)
+
+#---Histogram: count of values at or under each bucket bound, the last entry is everything over
+def histogram(values, buckets = histogram_buckets):
+    counts = [0]*(len(buckets) + 1)
+    for value in values:
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+#---Summary: {stage: {"calls", "total", "mean", "p50", "p95", "max"}}
+def stage_summary():
+    with lock:
+        times = {name: list(values) for name, values in stage_times.items()}
+    return {name: {"calls": len(values), "total": sum(values), "mean": sum(values)/len(values),
+                   "p50": percentile(values, 50), "p95": percentile(values, 95), "max": max(values)}
+            for name, values in times.items() if values}
+
+#---Case Times: one field (e.g. "solve_time") of every "case" record that has it
+def case_times(field = "solve_time", kind = "case"):
+    with lock:
+        return [entry[field] for entry in records if entry["kind"] == kind and entry.get(field) is not None]
+
+#---Prometheus: counters as <prefix>_<name>_total, stages as <prefix>_stage_seconds histograms
+def prometheus(prefix = "aircraft"):
+    lines = []
+    with lock:
+        counter_items = sorted(counters.items())
+        times = {name: list(values) for name, values in sorted(stage_times.items())}
+    for name, value in counter_items:
+        metric = f"{prefix}_{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    if times:
+        metric = f"{prefix}_stage_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for name, values in times.items():
+            cumulative = 0
+            for bound, n in zip(histogram_buckets, histogram(values)):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {len(values)}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {sum(values)}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {len(values)}')
+    return "\n".join(lines) + "\n"
+
+#---Print Summary: stage table, counters and the per case solve time histogram
+def print_summary(field = "solve_time", width = 40):
+    from tabulate import tabulate
+
+    stages = stage_summary()
+    if stages:
+        rows = [[name, s["calls"], s["total"], s["mean"]*1e3, s["p50"]*1e3, s["p95"]*1e3, s["max"]*1e3]
+                for name, s in sorted(stages.items(), key = lambda item: -item[1]["total"])]
+        print(tabulate(rows, headers = ("Stage", "Calls", "Total s", "Mean ms", "p50 ms", "p95 ms", "Max ms"), floatfmt = ".3f"))
+    with lock:
+        counter_items = sorted(counters.items())
+    if counter_items:
+        print()
+        print(tabulate(counter_items, headers = ("Counter", "Value")))
+
+    values = case_times(field)
+    if values:
+        counts = histogram(values)
+        labels = [f"<= {bound} s" for bound in histogram_buckets] + [f"> {histogram_buckets[-1]} s"]
+        #Only the buckets from the first to the last one used
+        used = [i for i, n in enumerate(counts) if n]
+        scale = width/max(counts)
+        print()
+        print(f"Case {field.replace('_', ' ')}: {len(values)} cases, p50 {percentile(values, 50)*1e3:.1f} ms, "
+              f"p95 {percentile(values, 95)*1e3:.1f} ms, max {max(values)*1e3:.1f} ms")
+        label_width = max(len(labels[i]) for i in used)
+        for i in range(used[0], used[-1] + 1):
+            print(f"{labels[i]:>{label_width}} {counts[i]:6d} {'#'*int(round(counts[i]*scale))}")
+
+#==============================================================================================#
+#Sampling Profiler
+
+class Sampler:
+    def __init__(self, interval = profile_interval):
+        self.interval = interval
+        self.stacks = Counter()         #(outermost ... innermost frame) tuples
+        self.samples = 0
+        self.running = threading.Event()
+        self.thread = threading.Thread(target = self.sample, daemon = True)
+
+    def start(self):
+        self.running.set()
+        self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        self.thread.join()
+
+    #---Sample: every thread's stack except the sampler's own, each interval
+    def sample(self):
+        own = threading.get_ident()
+        while self.running.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    #---Top: [(function, self samples, total samples)] by self samples
+    def top(self, n = 15):
+        own, total = Counter(), Counter()
+        for stack, samples in self.stacks.items():
+            own[stack[-1]] += samples
+            for function in set(stack):
+                total[function] += samples
+        return [(function, samples, total[function]) for function, samples in own.most_common(n)]
+
+    #---Collapsed Stacks: "outer;...;inner samples" lines, the input of flamegraph.pl and speedscope
+    def write_collapsed(self, file_name):
+        with open(file_name, "w") as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(f"{';'.join(stack)} {samples}\n")
+
+#---Print Profile: hottest functions by samples where they were running, collapsed stacks to profile_file
+def print_profile(sampler, n = 15):
+    from tabulate import tabulate
+
+    if sampler.samples == 0:
+        return
+    rows = [[function, own/sampler.samples*100, total/sampler.samples*100] for function, own, total in sampler.top(n)]
+    print()
+    #Wall clock over every thread: workers blocked on XFOIL output show up in read_output and wait
+    print(f"Profile: {sampler.samples} samples every {sampler.interval*1e3:.1f} ms (all threads, wall clock)")
+    print(tabulate(rows, headers = ("Function", "Self %", "Total %"), floatfmt = ".1f"))
+    sampler.write_collapsed(profile_file)
+    print(f"Collapsed stacks: {profile_file}")
@@ -0,0 +1,76 @@
+import os
+import sys
+import numpy
+import pytest
+import fake_xfoil
+import airfoil_optimization
+from adaptive_alpha import adaptive_sweep, fine_grid
+from polar_parser import polar_metrics
+
+#Adaptive Alpha
+#The adaptive sweep against the fixed one with the same alpha_step: same cl max, L/D max and
+#AoA margin from fewer points, stopped at stall; through a fake_xfoil session and for the panel
+#solver, which always runs the fixed sequence
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def fake_points(airfoil_code, calls):
+    def solve_points(alphas, init):
+        calls.append(list(alphas))
+        return [fake_xfoil.polar_point(airfoil_code, alpha, 5153748, 0.3, True)[:5] for alpha in alphas]
+    return solve_points
+
+def test_fine_grid():
+    assert fine_grid(0, 20, 0.5, 3.2, 4.6) == [3.5, 4.0, 4.5]
+    assert fine_grid(0, 20, 0.5, -2, 1) == [0.0, 0.5, 1.0]
+    assert fine_grid(0, 20, 0.5, 19.2, 25) == [19.5, 20.0]
+
+@pytest.mark.parametrize("airfoil_code", ["0012", "2412", "4415"])
+def test_same_metrics_as_fixed_sweep(airfoil_code):
+    calls = []
+    polar = adaptive_sweep(fake_points(airfoil_code, calls), 0, 30, 0.5, 2.0, 2)
+    fixed = numpy.array(fake_points(airfoil_code, [])(numpy.arange(0, 30.25, 0.5), True))
+
+    assert len(polar) < len(fixed)
+    assert numpy.all(numpy.diff(polar[:, 0]) > 0)
+    adaptive_metrics, fixed_metrics = polar_metrics(polar, 0.12), polar_metrics(fixed, 0.12)
+    for i in (0, 2, 5):                                                  #cl max, L/D max, AoA margin
+        assert adaptive_metrics[i] == pytest.approx(fixed_metrics[i], rel = 1e-12)
+    #The march stops after stall_points falling points, at most stall_points coarse steps past cl max
+    alpha_cl_max = polar[numpy.argmax(polar[:, 1]), 0]
+    assert max(max(alphas) for alphas in calls) <= alpha_cl_max + 2*2.0 < 30
+
+def test_nothing_converged():
+    polar = adaptive_sweep(lambda alphas, init: [], 0, 20, 0.5)
+    assert polar.shape == (0, 5)
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, value in {"xfoil_command": [sys.executable, os.path.join(root, "fake_xfoil.py")],
+                        "persistent_xfoil": False, "alpha_start": 0, "alpha_end": 20, "alpha_step": 0.5}.items():
+        monkeypatch.setattr(airfoil_optimization, name, value)
+    return airfoil_optimization
+
+def test_xfoil_session_adaptive_case(sweep, monkeypatch):
+    case = sweep.design_case(2, 4, 12)
+    monkeypatch.setattr(sweep, "solver", "xfoil")
+    monkeypatch.setattr(sweep, "alpha_mode", "fixed")
+    _, fixed, error = sweep.run_case(case)
+    assert error is None
+    monkeypatch.setattr(sweep, "alpha_mode", "adaptive")
+    assert sweep.sim_controls()["adaptive"] == [sweep.coarse_step, sweep.stall_points]
+    _, adaptive, error = sweep.run_case(case)
+    assert error is None
+    assert len(adaptive) < len(fixed)
+    assert polar_metrics(adaptive, 12)[0] == pytest.approx(polar_metrics(fixed, 12)[0], rel = 1e-4)
+
+def test_panel_runs_fixed_sequence(sweep, monkeypatch):
+    monkeypatch.setattr(sweep, "solver", "panel")
+    monkeypatch.setattr(sweep, "alpha_mode", "adaptive")
+    assert "adaptive" not in sweep.sim_controls()
+    _, polar, _ = sweep.run_case(sweep.design_case(2, 4, 12))
+    assert numpy.array_equal(polar[:, 0], sweep.alpha_sequence())
+    sweep.write_sim_configuration()
+    with open("Sim_Configuration.txt") as f:
+        assert "fixed (adaptive is XFOIL only)" in f.read()
@@ -0,0 +1,52 @@
+import math as m
+import numpy
+import pytest
+import atmosphere
+from atmosphere import AtmosphereTable
+
+#Atmosphere
+#The array atmosphere against the scalar thrust_required.rho it replaced, sea level values, NaN
+#outside the model, and the lookup tables against the closed form
+
+#---Old Rho: the scalar standard atmosphere from thrust_required before it was vectorized
+def old_rho(altitude):
+    t_0, a, rho_0, p_0 = 519, -0.003566, 0.002378, 2116.2
+    if altitude <= 36000:
+        return (t_0 + altitude*a, p_0*((1 + (a*altitude)/t_0)**5.26), rho_0*((1 + (a*altitude)/t_0)**4.26))
+    return (t_0 + 36000*a, p_0*(1.26/(m.e**((4.805*10**-5)*altitude))), rho_0*(1.68/(m.e**((4.805*10**-5)*altitude))))
+
+def test_matches_scalar_atmosphere():
+    altitudes = numpy.array([0, 5000, 20000, 36000, 36001, 50000, 82000])
+    temperature, pressure, density, _, _ = atmosphere.atmosphere(altitudes)
+    for i, h in enumerate(altitudes):
+        assert (temperature[i], pressure[i], density[i]) == pytest.approx(old_rho(float(h)), rel = 1e-12)
+
+def test_sea_level_and_shapes():
+    temperature, pressure, density, speed_of_sound, viscosity = atmosphere.atmosphere(0)
+    assert density == pytest.approx(0.002378)
+    assert speed_of_sound == pytest.approx(1116, rel = 2e-3)
+    assert viscosity == pytest.approx(3.737e-7, rel = 1e-2)
+    values = atmosphere.atmosphere(numpy.zeros((3, 4)))
+    assert all(value.shape == (3, 4) for value in values)
+
+def test_outside_the_model_is_nan():
+    values = atmosphere.atmosphere([90000, 82000])
+    assert all(numpy.isnan(value[0]) and numpy.isfinite(value[1]) for value in values)
+
+def test_flight_numbers():
+    Re, M = atmosphere.flight_numbers(0, 200, 5)
+    assert Re == pytest.approx(0.002378*200*5/atmosphere.atmosphere(0)[4])
+    assert M == pytest.approx(200/atmosphere.atmosphere(0)[3])
+    Re, M = atmosphere.flight_numbers(numpy.array([0, 10000]), 200, numpy.array([[4], [6]]))
+    assert Re.shape == (2, 2) and M.shape == (2,)
+    assert Re[0, 0] > Re[0, 1] and M[0] < M[1]
+
+@pytest.mark.parametrize("kind, tolerance", [("linear", 1e-5), ("cubic", 1e-8)])
+def test_table_against_closed_form(kind, tolerance):
+    table = AtmosphereTable(kind = kind)
+    altitudes = numpy.concatenate([numpy.random.default_rng(0).uniform(0, 82000, 2000), [0, 36000, 36000.5, 82000]])
+    for value, exact in zip(table(altitudes), atmosphere.atmosphere(altitudes)):
+        assert value == pytest.approx(exact, rel = tolerance)
+    assert all(numpy.isnan(value[0]) for value in table([82100.0]))
+    with pytest.raises(ValueError):
+        AtmosphereTable(kind = "quadratic")
@@ -0,0 +1,49 @@
+import numpy
+import pytest
+import sympy
+import main
+import model_compiler
+
+#Model Compiler
+#The compiled NumPy kernel of the weight system against sympy.solve with the numbers plugged in
+
+@pytest.fixture(autouse = True)
+def empty_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_compiler, "cache_dir", str(tmp_path / "model_cache"))
+    monkeypatch.setattr(model_compiler, "kernels", {})
+
+def sympy_solution(parameters):
+    equations, unknowns, inputs = main.weight_system()
+    values = {symbol: parameters[str(symbol)] for symbol in inputs}
+    solutions = sympy.solve([eq.subs(values) for eq in equations], unknowns, dict = True)
+    #root 0 of the kernel is the light aircraft, the other root is the heavy one
+    return {str(symbol): float(value) for symbol, value in min(solutions, key = lambda s: s[unknowns[0]]).items()}
+
+@pytest.mark.parametrize("changes", [{}, {"aspect_ratio": 10.0, "R": 2.0e6}, {"crew": 180, "payload": 400}])
+def test_weight_kernel_matches_sympy(changes):
+    parameters = {**main.parameters, **changes}
+    kernel = model_compiler.compile_model(*main.weight_system())
+    solution = kernel(**parameters)
+    expected = sympy_solution(parameters)
+    assert set(solution) == set(expected)
+    for name, value in expected.items():
+        assert float(solution[name]) == pytest.approx(value, rel = 1e-9), name
+
+#One kernel call over arrays gives what one call per point gives
+def test_weight_kernel_broadcasts():
+    kernel = model_compiler.compile_model(*main.weight_system())
+    aspect_ratio = numpy.linspace(6, 10, 5)
+    batch = kernel(**{**main.parameters, "aspect_ratio": aspect_ratio})
+    for i, value in enumerate(aspect_ratio):
+        single = kernel(**{**main.parameters, "aspect_ratio": value})
+        for name in single:
+            assert batch[name][i] == pytest.approx(float(single[name]), rel = 1e-12)
+
+#The kernel is written to model_cache and loaded from there by a fresh process
+def test_kernel_cache(tmp_path):
+    system = main.weight_system()
+    first = model_compiler.compile_model(*system)(**main.parameters)
+    model_compiler.kernels.clear()
+    second = model_compiler.compile_model(*system)(**main.parameters)
+    assert len(list((tmp_path / "model_cache").glob("*.py"))) == 1
+    assert {name: float(value) for name, value in first.items()} == {name: float(value) for name, value in second.items()}
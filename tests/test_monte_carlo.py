@@ -0,0 +1,70 @@
+import numpy
+import pytest
+import main
+import monte_carlo
+from monte_carlo import StreamingStats
+
+#Monte Carlo
+#Streaming statistics against NumPy on the whole sample, merging chunks, the quantile sketch
+#accuracy, and runs that do not depend on the chunking or the worker count
+
+def test_stats_match_numpy():
+    values = numpy.random.default_rng(0).normal(1500, 120, 50000)
+    stats = StreamingStats()
+    for chunk in numpy.array_split(values, 7):
+        stats.update(chunk)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel = 1e-12)
+    assert stats.std() == pytest.approx(values.std(ddof = 1), rel = 1e-10)
+    assert (stats.minimum, stats.maximum) == (values.min(), values.max())
+    for q in (0.01, 0.05, 0.5, 0.95, 0.99):
+        exact = numpy.quantile(values, q, method = "lower")
+        assert stats.quantile(q) == pytest.approx(exact, rel = 2*stats.relative_accuracy)
+
+def test_negative_zero_and_invalid_values():
+    values = numpy.array([-3.0, -1.0, 0.0, 0.0, 2.0, 5.0, numpy.nan, numpy.inf])
+    stats = StreamingStats()
+    stats.update(values)
+    assert (stats.count, stats.invalid, stats.zeros) == (6, 2, 2)
+    assert stats.quantile(0) == pytest.approx(-3, rel = 2e-3)
+    assert stats.quantile(0.5) == 0.0
+    assert stats.quantile(1) == pytest.approx(5, rel = 2e-3)
+
+def test_merge_is_the_same_as_one_update():
+    rng = numpy.random.default_rng(1)
+    a, b = rng.lognormal(0, 1, 1000), rng.lognormal(1, 0.5, 3000)
+    merged = StreamingStats()
+    merged.update(a)
+    other = StreamingStats()
+    other.update(b)
+    merged.merge(other)
+    whole = StreamingStats()
+    whole.update(numpy.concatenate([a, b]))
+    assert merged.mean == pytest.approx(whole.mean, rel = 1e-12)
+    assert merged.variance() == pytest.approx(whole.variance(), rel = 1e-10)
+    assert merged.positive == whole.positive
+    with pytest.raises(ValueError):
+        merged.merge(StreamingStats(0.01))
+
+#No uncertainty left: every sample is the baseline design
+def test_fixed_inputs_give_the_baseline():
+    stats = monte_carlo.monte_carlo(1000, {"n_p": ("uniform", main.parameters["n_p"], main.parameters["n_p"])},
+                                    ("W_0",), chunk_size = 400, workers = 1)
+    W_0 = main.weight_estimation()[0]["W_0"]
+    assert stats["W_0"].count == 1000
+    assert stats["W_0"].mean == pytest.approx(W_0, rel = 1e-12)
+    assert stats["W_0"].std() == pytest.approx(0, abs = 1e-6)
+
+def test_seeded_and_independent_of_workers():
+    runs = [monte_carlo.monte_carlo(3000, chunk_size = 1000, workers = workers, seed = 7) for workers in (1, 2)]
+    for name in monte_carlo.outputs:
+        assert runs[0][name].count == runs[1][name].count == 3000
+        assert runs[0][name].mean == runs[1][name].mean
+        assert runs[0][name].quantile(0.95) == runs[1][name].quantile(0.95)
+    #The input uncertainty spreads W_0 around the baseline design
+    assert runs[0]["W_0"].std() > 0
+    assert runs[0]["W_0"].minimum < main.weight_estimation()[0]["W_0"] < runs[0]["W_0"].maximum
+
+def test_unknown_input():
+    with pytest.raises(ValueError):
+        monte_carlo.monte_carlo(10, {"wing_span": ("normal", 30, 1)})
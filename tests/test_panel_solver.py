@@ -0,0 +1,52 @@
+import math as m
+import numpy
+import pytest
+import panel_solver
+
+#Panel Solver
+#Thin airfoil theory limits of the inviscid panel method, the boundary layer drag and stall and
+#the Prandtl-Glauert correction
+
+def test_symmetric_airfoil():
+    polar = panel_solver.naca_polar("0012", [-4, 0, 4])
+    assert polar[1, 1] == pytest.approx(0, abs = 1e-12)
+    assert polar[0, 1] == pytest.approx(-polar[2, 1], rel = 1e-9)
+    assert polar[:, 2] == pytest.approx(0)
+
+#Lift slope a little over 2 pi (thickness adds to it), zero lift angle near thin airfoil theory
+def test_cambered_lift_curve():
+    polar = panel_solver.naca_polar("2412", [0, 2, 4])
+    slope = (polar[2, 1] - polar[0, 1])/m.radians(4)
+    assert 2*m.pi < slope < 1.15*2*m.pi
+    alpha_L0 = -polar[0, 1]/slope
+    assert m.degrees(alpha_L0) == pytest.approx(-2.08, abs = 0.3)
+
+#One call for many alphas gives the same rows as one call per alpha
+def test_alphas_are_independent():
+    alphas = [0, 3, 6]
+    together = panel_solver.naca_polar("4415", alphas, 200, 3e6)
+    for i, alpha in enumerate(alphas):
+        assert panel_solver.naca_polar("4415", [alpha], 200, 3e6)[0] == pytest.approx(together[i], rel = 1e-9)
+
+def test_viscous_drag_and_stall():
+    polar = panel_solver.naca_polar("2412", numpy.arange(0, 20, 1.0), 300, 3e6)
+    cl, cd = polar[:, 1], polar[:, 2]
+    assert numpy.all(cd > 0)
+    assert numpy.all(numpy.diff(cd[:10]) > 0)
+    assert cd[0] == pytest.approx(0.005, rel = 0.5)
+    #Separation bends the lift curve over before the end of the sweep
+    assert 0 < numpy.argmax(cl) < len(cl) - 1
+
+def test_prandtl_glauert():
+    incompressible = panel_solver.naca_polar("2412", [0, 4])
+    compressible = panel_solver.naca_polar("2412", [0, 4], 300, None, 0.5)
+    assert compressible[:, 1] == pytest.approx(incompressible[:, 1]/m.sqrt(1 - 0.5**2), rel = 1e-12)
+
+def test_design_codes():
+    assert panel_solver.naca_parameters("2412") == pytest.approx((0.02, 0.4, 0.12))
+    code = panel_solver.design_code(2.5, 4.1, 13.2)
+    assert panel_solver.naca_parameters(code) == pytest.approx((0.025, 0.41, 0.132))
+    X, Y = panel_solver.naca_code_coordinates("2412", 300)
+    assert len(X) == 301
+    assert X[0] == pytest.approx(1, abs = 1e-3) and X[-1] == pytest.approx(1, abs = 1e-3)
+    assert X.min() == pytest.approx(0, abs = 1e-3)
@@ -0,0 +1,57 @@
+import numpy
+import pytest
+import performance_point
+
+#Performance Point
+#Closed form optimum speeds against a dense velocity scan and the golden section search, for
+#one condition and broadcast over many
+
+conditions = {"weight": 1522.0, "S": 160.0, "density": 0.00205, "cd0": 0.025, "K": 0.045}
+
+def scan(weight, S, density, cd0, K, V = numpy.linspace(30, 600, 570001)):
+    q = 0.5*density*V**2
+    drag = q*S*(cd0 + K*(weight/(q*S))**2)
+    return V[numpy.argmin(drag)], drag.min(), V[numpy.argmin(drag*V)], (drag*V).min()
+
+def test_closed_form_against_scan():
+    speeds = performance_point.optimum_speeds(**conditions)
+    V_md, D_min, V_mp, P_min = scan(**conditions)
+    assert float(speeds["V_md"]) == pytest.approx(V_md, abs = 2e-3)
+    assert float(speeds["D_min"]) == pytest.approx(D_min, rel = 1e-9)
+    assert float(speeds["V_mp"]) == pytest.approx(V_mp, abs = 2e-3)
+    assert float(speeds["P_min"]) == pytest.approx(P_min, rel = 1e-9)
+    assert float(speeds["D_min"]) == pytest.approx(conditions["weight"]/float(speeds["L_D_max"]))
+    assert float(speeds["V_max_range_jet"]) == pytest.approx(float(speeds["V_md"])*3**0.25)
+
+def test_broadcast():
+    weight = numpy.linspace(1200, 1800, 4)[:, None]
+    density = numpy.array([0.002378, 0.0017, 0.0012])
+    speeds = performance_point.optimum_speeds(weight, conditions["S"], density, conditions["cd0"], conditions["K"])
+    assert speeds["V_md"].shape == (4, 3)
+    for i in range(4):
+        for j in range(3):
+            single = performance_point.optimum_speeds(weight[i, 0], conditions["S"], density[j], conditions["cd0"], conditions["K"])
+            assert speeds["V_md"][i, j] == pytest.approx(float(single["V_md"]), rel = 1e-14)
+    #Heavier is faster, higher (thinner air) is faster
+    assert numpy.all(numpy.diff(speeds["V_md"], axis = 0) > 0)
+    assert numpy.all(numpy.diff(speeds["V_md"], axis = 1) > 0)
+
+#The search on a parabolic polar lands on the closed form
+def test_golden_section_matches_closed_form():
+    weight = numpy.linspace(1000, 2000, 50)
+    exact = performance_point.optimum_speeds(weight, conditions["S"], conditions["density"], conditions["cd0"], conditions["K"])
+    searched = performance_point.polar_optimum_speeds(weight, conditions["S"], conditions["density"],
+                                                      lambda cl: conditions["cd0"] + conditions["K"]*cl**2)
+    for name in ("V_md", "D_min", "V_mp", "P_min"):
+        assert searched[name] == pytest.approx(exact[name], rel = 1e-7)
+
+def test_golden_section_minimizes():
+    x = performance_point.golden_section(lambda x: (x - numpy.array([0.3, 2.0]))**2, numpy.zeros(2), numpy.full(2, 3.0))
+    assert x == pytest.approx([0.3, 2.0], abs = 1e-9)
+
+def test_drag_polar_speeds_configurations():
+    solution = {"cd0": 0.025, "K_clean": 0.045, "cd0_TO": 0.04, "K_to": 0.05, "cd0_landing": 0.08, "K_landing": 0.055}
+    clean = performance_point.drag_polar_speeds(solution, 1522, 160, 0.002378)
+    landing = performance_point.drag_polar_speeds(solution, 1522, 160, 0.002378, "landing")
+    assert float(landing["V_md"]) < float(clean["V_md"])
+    assert float(landing["L_D_max"]) < float(clean["L_D_max"])
@@ -0,0 +1,45 @@
+import os
+import numpy
+import pytest
+import polar_cache
+
+#Polar Cache
+#Round trip, keys over the sim controls and least recently used eviction on the running size
+
+@pytest.fixture(autouse = True)
+def cache_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(polar_cache, "cache_dir", str(tmp_path / "polar_cache"))
+    monkeypatch.setattr(polar_cache, "cache_bytes", {})
+
+def test_round_trip():
+    polar = numpy.random.default_rng(0).random((41, 5))
+    key = polar_cache.polar_key("2412", {"reynolds_number": 5153748, "solver": "xfoil"})
+    assert polar_cache.load_polar(key) is None
+    polar_cache.store_polar(key, polar)
+    assert numpy.array_equal(polar_cache.load_polar(key), polar)
+
+def test_key_covers_controls():
+    controls = {"reynolds_number": 5153748, "mach_number": 0.3, "solver": "xfoil"}
+    key = polar_cache.polar_key("2412", controls)
+    assert key == polar_cache.polar_key("2412", dict(reversed(controls.items())))
+    assert key != polar_cache.polar_key("4412", controls)
+    assert key != polar_cache.polar_key("2412", {**controls, "solver": "panel"})
+
+#The running size follows the directory, eviction drops the least recently used polars
+def test_eviction(monkeypatch):
+    monkeypatch.setattr(polar_cache, "max_cache_bytes", 20000)
+    rng = numpy.random.default_rng(1)
+    keys = [f"key{i}" for i in range(40)]
+    for i, key in enumerate(keys):
+        polar_cache.store_polar(key, rng.random((40, 5)))
+        os.utime(polar_cache.polar_path(key), (i, i))
+        #Storing the same key again replaces the file, the size is not counted twice
+        if i == 20:
+            polar_cache.store_polar(key, rng.random((40, 5)))
+            os.utime(polar_cache.polar_path(key), (i, i))
+
+    size = polar_cache.directory_size()
+    assert size <= polar_cache.max_cache_bytes
+    assert polar_cache.cache_bytes[polar_cache.cache_dir] == size
+    kept = [key for key in keys if os.path.exists(polar_cache.polar_path(key))]
+    assert kept == keys[len(keys) - len(kept):]
@@ -0,0 +1,84 @@
+import numpy
+import pytest
+import airfoil_optimization
+import panel_solver
+import polar_cache
+from polar_database import PolarDatabase, build_database, station_cl
+
+#Polar Database
+#A small panel solver database: node values against the solver, interpolation between nodes,
+#vectorized lookups and cl max over arrays of airfoils and conditions, and reuse of the polars
+#the sweep already cached
+
+airfoils = [(0, 0, 12), (2, 4, 12), (4, 4, 15)]
+reynolds_numbers = [2000000, 5153748]
+mach_numbers = [0.0, 0.3]
+alphas = numpy.arange(0, 18.5, 1.0)
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(polar_cache, "cache_dir", str(tmp_path / "polar_cache"))
+    monkeypatch.setattr(polar_cache, "cache_bytes", {})
+    for name, value in {"solver": "panel", "workers": 1, "alpha_start": 0, "alpha_end": 18, "alpha_step": 1.0,
+                        "reynolds_number": 5153748, "mach_number": 0.3}.items():
+        monkeypatch.setattr(airfoil_optimization, name, value)
+    return airfoil_optimization
+
+@pytest.fixture
+def database(sweep, tmp_path):
+    cases = [sweep.design_case(*design) for design in airfoils]
+    build_database(reynolds_numbers, mach_numbers, cases, alphas, str(tmp_path / "polar_database"))
+    return PolarDatabase(str(tmp_path / "polar_database"))
+
+def test_nodes_match_the_solver(database):
+    polar = panel_solver.naca_polar("2412", alphas, 300, 2000000, 0.3)
+    values = database.lookup("NACA2412", 2000000, 0.3, alphas)
+    for name, column in (("cl", 1), ("cd", 2), ("cm", 4)):
+        assert values[name] == pytest.approx(polar[:, column], rel = 1e-5, abs = 1e-7)
+
+def test_interpolation_and_outside(database):
+    Re = numpy.sqrt(2000000*5153748)                       #halfway in log(Re)
+    low, high = (database.lookup("NACA2412", value, 0.0, 4.5)["cd"] for value in reynolds_numbers)
+    middle = database.lookup("NACA2412", Re, 0.0, 4.5)["cd"]
+    assert middle == pytest.approx((low + high)/2, rel = 1e-6)
+    outside = database.lookup("NACA2412", [1e6, 3e6, 3e6, 3e6], [0.1, 0.5, 0.1, 0.1], [4, 4, 30, 4])["cl"]
+    assert numpy.isnan(outside[:3]).all() and numpy.isfinite(outside[3])
+    with pytest.raises(KeyError):
+        database.lookup("NACA9999", 3e6, 0.1, 4)
+
+#Arrays of airfoils, Reynolds and Mach numbers broadcast like lookup, cl max included
+def test_vectorized_lookup_and_cl_max(database):
+    names = numpy.array(["NACA0012", "NACA2412", "NACA4415"])
+    Re = numpy.array([2.5e6, 4e6])[:, None]
+    cl = database.lookup(names, Re, 0.2, 6.0)["cl"]
+    assert cl.shape == (2, 3)
+    cl_max = database.cl_max(names, Re, 0.2)
+    assert cl_max.shape == (2, 3)
+    for i in range(2):
+        for j, name in enumerate(names):
+            assert float(database.lookup(name, Re[i, 0], 0.2, 6.0)["cl"]) == pytest.approx(cl[i, j])
+            assert float(database.cl_max(name, Re[i, 0], 0.2)) == pytest.approx(cl_max[i, j])
+    assert database.cl_max(["NACA2412", "NACA4415"], 5e6, 0.3).shape == (2,)
+    assert database.cl_max([0, 2], [3e6, 5e6], [0.1, 0.3]).shape == (2,)
+    stations = station_cl(database, "NACA2412", {"root": 5e6, "mid": 4e6, "tip": 2.5e6}, {"root": 0.3, "mid": 0.3, "tip": 0.3})
+    assert set(stations) == {"root", "mid", "tip"}
+
+#The condition the sweep already ran is read from its cache, only the others are solved
+def test_reuses_sweep_polars(sweep, tmp_path, monkeypatch):
+    cases = [sweep.design_case(*design) for design in airfoils]
+    controls = sweep.sim_controls()
+    for case in cases:
+        polar_cache.store_polar(polar_cache.polar_key(case[0], controls),
+                                panel_solver.naca_polar(case[0], sweep.alpha_sequence(), 300, 5153748, 0.3))
+
+    solved = []
+    run_case = sweep.run_case
+    def counting_run_case(case):
+        solved.append((sweep.reynolds_number, sweep.mach_number))
+        return run_case(case)
+    monkeypatch.setattr(sweep, "run_case", counting_run_case)
+
+    build_database([5153748.0, 2e6], [0.3], cases, alphas, str(tmp_path / "db"))
+    assert solved == [(2000000, 0.3)]*len(cases)
+    assert PolarDatabase(str(tmp_path / "db")).reynolds_numbers.tolist() == [2000000, 5153748]
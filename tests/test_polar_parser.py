@@ -0,0 +1,74 @@
+import io
+import numpy
+import pytest
+import fake_xfoil
+from polar_parser import load_polar, polar_metrics
+
+#Polar Parser
+#load_polar and polar_metrics against the row by row parse and stall cut the sweep used before
+#(two 7 column lines at a time, kept through stall until cl rises again)
+
+#---Old Parser: performance parameters the way the original sweep loop computed them
+def old_metrics(polar_file, t):
+    with open(polar_file, "r") as f:
+        lines = f.readlines()
+    data = []
+    stall_trigger = False
+    post_stall_error = False
+    for i in range(len(lines) - 1):
+        tokens_current = lines[i].strip().split()
+        tokens_next = lines[i+1].strip().split()
+        if len(tokens_current) == 7 and len(tokens_next) == 7:
+            try:
+                alpha, cl, cd, cdp, cm = (float(token) for token in tokens_current[:5])
+                next_cl = float(tokens_next[1])
+            except ValueError:
+                continue
+            if not stall_trigger and not post_stall_error:
+                data.append((alpha, cl, cd, cdp, cm, cl/cd))
+                if cl >= next_cl:
+                    stall_trigger = True
+            elif stall_trigger and not post_stall_error:
+                data.append((alpha, cl, cd, cdp, cm, cl/cd))
+                if cl < next_cl:
+                    post_stall_error = True
+            else:
+                break
+
+    cl_max = max(data, key = lambda x: x[1])
+    L_Dmax = max(data, key = lambda x: x[5])
+    return [cl_max[1], min(data, key = lambda x: x[2])[2], L_Dmax[5], min(data, key = lambda x: x[4])[4],
+            t, cl_max[0] - L_Dmax[0]]
+
+def write_polar(polar_file, airfoil_code, rows):
+    text = io.StringIO()
+    fake_xfoil.write_polar_header(text, airfoil_code, 5153748, 0.3, 3)
+    for row in rows:
+        text.write("  %7.3f %8.4f %9.5f %9.5f %8.4f %8.4f %8.4f\n" % tuple(row))
+    with open(polar_file, "w") as f:
+        f.write(text.getvalue())
+
+@pytest.mark.parametrize("airfoil_code", ["0012", "2412", "4415", "6409"])
+def test_fake_xfoil_polar(tmp_path, airfoil_code):
+    alphas = numpy.arange(0, 20.5, 0.5)
+    rows = [fake_xfoil.polar_point(airfoil_code, float(alpha), 5153748, 0.3, True) for alpha in alphas]
+    polar_file = tmp_path / f"NACA{airfoil_code}.txt"
+    write_polar(polar_file, airfoil_code, rows)
+
+    polar = load_polar(polar_file)
+    assert polar.shape == (len(alphas), 5)
+    assert polar_metrics(polar, 0.12) == pytest.approx(old_metrics(polar_file, 0.12), rel = 1e-12)
+
+#A post stall rise ends the kept rows, the garbled (diverged) row is skipped by both parsers
+def test_post_stall_and_garbled_rows(tmp_path):
+    rows = [(alpha, 0.1*alpha + 0.2, 0.006 + 0.0004*alpha**2, 0.002, -0.05, 0.5, 0.4) for alpha in range(0, 12)]
+    rows += [(12, 1.0, 0.07, 0.05, -0.04, 0.1, 0.9), (13, 0.9, 0.09, 0.07, -0.03, 0.1, 0.9),
+             (14, 1.1, 0.11, 0.09, -0.06, 0.1, 0.9), (15, 1.2, 0.13, 0.1, -0.08, 0.1, 0.9)]
+    polar_file = tmp_path / "NACA2412.txt"
+    write_polar(polar_file, "2412", rows)
+    with open(polar_file, "a") as f:
+        f.write("   16.000  *******   0.15000   0.12000  -0.0900   0.1000   0.9000\n")
+
+    polar = load_polar(polar_file)
+    assert len(polar) == len(rows)
+    assert polar_metrics(polar, 0.12) == pytest.approx(old_metrics(polar_file, 0.12), rel = 1e-12)
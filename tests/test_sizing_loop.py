@@ -0,0 +1,70 @@
+import numpy
+import pytest
+import main
+import sizing_loop
+import weight_sizing
+from sizing_loop import StageMemo
+
+#Sizing Loop
+#The fixed point (W_0 and S reproduce themselves through the stages), Anderson mixing, the stage
+#memo hits and its size bound, and the process pool against one design at a time
+
+@pytest.fixture
+def stages(monkeypatch):
+    fresh = {name: StageMemo(stage.function) for name, stage in sizing_loop.stages.items()}
+    monkeypatch.setattr(sizing_loop, "stages", fresh)
+    return fresh
+
+def test_converged_design_is_a_fixed_point(stages):
+    design = sizing_loop.size_aircraft()
+    assert design["converged"] and design["residuals"][-1] < 1e-8
+    crew_payload = main.parameters["crew"] + main.parameters["payload"]
+    assert design["W_0"] == pytest.approx(float(weight_sizing.gross_weight(design["fuel_fraction"], crew_payload)), rel = 1e-8)
+    assert design["S"] == pytest.approx(design["W_0"]/design["wing_loading"], rel = 1e-8)
+    assert design["W_fuel"] == pytest.approx(design["fuel_fraction"]*design["W_0"])
+    assert design["thrust_param"]["Gross Weight"] == design["W_0"]
+
+def test_anderson_solves_a_linear_fixed_point():
+    matrix = numpy.array([[0.9, 0.05], [-0.1, 0.8]])
+    target = numpy.array([3.0, -2.0])
+    G = lambda x: matrix @ (x - target) + target
+    x, iterations, history, converged = sizing_loop.anderson(G, [1.0, 1.0], tolerance = 1e-12)
+    assert converged and x == pytest.approx(target, rel = 1e-10)
+    #Plain iteration contracts by 0.9 a step, Anderson needs a handful
+    assert iterations < 10
+    assert not sizing_loop.anderson(lambda x: x + 1, [1.0, 1.0], max_iterations = 5)[3]
+
+#The second design only runs the stages whose inputs changed, the same design none of them
+def test_memo_hits(stages):
+    first = sizing_loop.size_aircraft()
+    misses = {name: stage.misses for name, stage in stages.items()}
+    again = sizing_loop.size_aircraft()
+    assert again["W_0"] == first["W_0"]
+    assert {name: stage.misses for name, stage in stages.items()} == misses
+    assert all(stage.hits > 0 for stage in stages.values())
+    #Without a database the wing does not depend on W_0: only the mission reruns for a new payload
+    sizing_loop.size_aircraft({**main.parameters, "payload": main.parameters["payload"] + 50})
+    assert stages["wing"].misses == misses["wing"] and stages["mission"].misses > misses["mission"]
+
+def test_memo_bound(stages, monkeypatch):
+    monkeypatch.setattr(sizing_loop, "max_memo", 2)
+    sizing_loop.size_aircraft()
+    assert len(stages["mission"].memo) == 2
+    bounded = StageMemo(lambda x: x*x, max_memo = 3)
+    for x in (1.0, 2.0, 3.0, 1.0, 4.0):
+        bounded(x = x)
+    assert (bounded.hits, bounded.misses) == (1, 4)
+    #1.0 was used last, 2.0 is the least recently used and went first
+    assert len(bounded.memo) == 3
+    bounded(x = 1.0)
+    bounded(x = 2.0)
+    assert (bounded.hits, bounded.misses) == (2, 5)
+
+def test_size_designs_matches_size_aircraft(stages):
+    points = [{"parameters": {**main.parameters, "aspect_ratio": AR}} for AR in (7.0, 9.0)]
+    pooled = sizing_loop.size_designs(points, workers = 2)
+    for point, design in zip(points, pooled):
+        single = sizing_loop.size_aircraft(**point)
+        assert design["W_0"] == pytest.approx(single["W_0"], rel = 1e-12)
+        assert design["S"] == pytest.approx(single["S"], rel = 1e-12)
+    assert pooled[0]["W_0"] != pooled[1]["W_0"]
@@ -0,0 +1,81 @@
+import numpy
+import pytest
+import surrogate_search
+from surrogate_search import GaussianProcess
+
+#Surrogate Search
+#The Gaussian process interpolates, duplicate designs do not break the fit, and the search finds
+#the optimum of a smooth score with far fewer cases than the grid
+
+bounds = [(0, 6), (2, 6), (8, 18)]
+
+def objective(design):
+    camber, location, thickness = design
+    return -((camber - 4)**2 + (location - 3)**2 + 0.1*(thickness - 12)**2)
+
+def test_gp_interpolates_and_is_uncertain_away_from_data():
+    rng = numpy.random.default_rng(0)
+    X = surrogate_search.initial_design(bounds, 12, False, rng)
+    y = numpy.array([objective(x) for x in X])
+    gp = GaussianProcess(bounds).fit(X, y)
+    mean, std = gp.predict(X)
+    assert mean == pytest.approx(y, abs = 1e-3*numpy.ptp(y))
+    _, far_std = gp.predict([[0, 2, 8], [6, 6, 18]])
+    assert far_std.min() > std.max()
+
+def test_gp_duplicate_designs_and_bad_scores():
+    X = [(1, 2, 10), (1, 2, 10), (3, 4, 12), (5, 3, 14)]
+    gp = GaussianProcess(bounds).fit(X, [1.0, 1.1, 2.0, 3.0])
+    assert numpy.all(numpy.isfinite(gp.predict(X)[0]))
+    with pytest.raises(ValueError):
+        GaussianProcess(bounds).fit(X, [1.0, numpy.nan, 2.0, 3.0])
+    with pytest.raises(ValueError):
+        GaussianProcess(bounds, noise = 1e-30, max_noise = 1e-29).fit(X, [1.0, 1.1, 2.0, 3.0])
+
+def test_expected_improvement():
+    ei = surrogate_search.expected_improvement(numpy.array([0.0, 1.0, 1.0]), numpy.array([0.1, 0.1, 1.0]), 0.5)
+    assert ei[0] < ei[1] < ei[2]
+    assert numpy.all(ei >= 0)
+
+def test_initial_design_is_a_latin_hypercube():
+    #Wide bounds so rounding to 0.01 never moves a design into the next stratum
+    X = surrogate_search.initial_design([(0, 1000), (0, 1000)], 10, False, numpy.random.default_rng(3))
+    for column in X.T:
+        assert sorted(numpy.floor(column/100).astype(int)) == list(range(10))
+
+@pytest.mark.parametrize("integer", [True, False])
+def test_search_finds_the_optimum(integer):
+    def evaluate(designs):
+        return [None if design[0] == 0 else [objective(design)] for design in designs]
+
+    def score(rows):
+        return [row[0] for row in rows]
+
+    designs, metrics = surrogate_search.search(evaluate, score, bounds, integer, n_initial = 8, n_iterations = 8,
+                                              batch_size = 3, seed = 1)
+    grid = 7*5*11
+    assert len(designs) <= 8 + 8*3 < grid
+    assert len({tuple(design) for design in designs}) == len(designs)
+    best = designs[int(numpy.nanargmax([numpy.nan if row is None else row[0] for row in metrics]))]
+    assert objective(best) > -1.5
+    if integer:
+        assert all(numpy.array_equal(design, numpy.round(design)) for design in designs)
+
+#Surrogate mode in the sweep: Sim_Configuration reports the cases actually evaluated
+def test_sweep_reports_evaluated_cases(tmp_path, monkeypatch):
+    import airfoil_optimization
+    import polar_cache
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(polar_cache, "cache_dir", str(tmp_path / "polar_cache"))
+    for name, value in {"solver": "panel", "search_mode": "surrogate", "search_initial": 5, "search_iterations": 2,
+                        "search_batch": 2, "workers": 1, "print_rows": False}.items():
+        monkeypatch.setattr(airfoil_optimization, name, value)
+    airfoil_optimization.write_sim_configuration()
+    airfoil_optimization.airfoil_simulation()
+    with open("Sim_Configuration.txt") as f:
+        text = f.read()
+    assert "Total Airfoils:        at most 9 (surrogate search)" in text
+    evaluated = int(text.split("Airfoils Evaluated:")[1].split()[0])
+    with open(airfoil_optimization.file_name) as f:
+        assert 2 <= evaluated <= 9
+        assert len(f.readlines()) - 1 == evaluated - text.count(": ERROR")
@@ -0,0 +1,79 @@
+import pytest
+import airfoil_optimization
+import polar_cache
+from sweep_journal import SweepJournal
+
+#Sweep Journal
+#An interrupted sweep resumes: done and failed cases keep their journal entries, pending and
+#running (interrupted) cases are solved again
+
+metrics = [1.2, 0.006, 95.0, -0.05, 0.12, 3.5]
+
+def test_statuses_survive_reopen(tmp_path):
+    journal_file = str(tmp_path / "sweep_journal.db")
+    keys = ["a", "b", "c", "d"]
+    with SweepJournal(journal_file, commit_interval = 60.0, commit_batch = 100) as journal:
+        journal.add_cases(keys, ["NACA0012", "NACA2412", "NACA4412", "NACA6412"], {"panel": 300})
+        journal.mark_running(["a", "b", "c"])
+        journal.finish("a", metrics)
+        journal.fail("b", "no converged points")
+    #c was running when the sweep stopped, d never started
+
+    with SweepJournal(journal_file) as journal:
+        assert journal.statuses(keys + ["e"]) == ["done", "failed", "running", "pending", "pending"]
+        results = journal.results(keys)
+        assert results[0] == ("NACA0012", "done", pytest.approx(metrics), None)
+        assert results[1] == ("NACA2412", "failed", None, "no converged points")
+        #Adding the cases again keeps what the journal has
+        journal.add_cases(keys, ["NACA0012", "NACA2412", "NACA4412", "NACA6412"], {"panel": 300})
+        assert journal.statuses(keys) == ["done", "failed", "running", "pending"]
+
+def test_queries_in_chunks(tmp_path, monkeypatch):
+    import sweep_journal
+    monkeypatch.setattr(sweep_journal, "query_chunk", 3)
+    keys = [f"key{i}" for i in range(10)]
+    with SweepJournal(str(tmp_path / "sweep_journal.db")) as journal:
+        journal.add_cases(keys[:7], keys[:7], {})
+        journal.finish("key5", metrics)
+        journal.fail("key1", "no converged points")
+        assert journal.statuses(keys) == ["pending", "failed"] + ["pending"]*3 + ["done"] + ["pending"]*4
+        results = journal.results(keys)
+        assert [status for _, status, _, _ in results] == ["pending", "failed"] + ["pending"]*3 + ["done"] + ["pending"]*4
+        assert results[5] == ("key5", "done", pytest.approx(metrics), None)
+        assert results[1] == ("key1", "failed", None, "no converged points")
+        assert results[9] == (None, "pending", None, None)
+
+#The sweep only solves the cases the journal does not have as done or failed
+def test_evaluate_cases_resumes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(airfoil_optimization, "solver", "panel")
+    monkeypatch.setattr(airfoil_optimization, "workers", 1)
+    monkeypatch.setattr(airfoil_optimization, "retry_failed", False)
+    monkeypatch.setattr(polar_cache, "cache_dir", str(tmp_path / "polar_cache"))
+
+    cases = [airfoil_optimization.design_case(2, 4, t) for t in (10, 12, 14, 16)]
+    controls = airfoil_optimization.sim_controls()
+    keys = [polar_cache.polar_key(case[0], controls) for case in cases]
+    with SweepJournal(airfoil_optimization.journal_file) as journal:
+        journal.add_cases(keys, [case[1] for case in cases], controls)
+        journal.mark_running(keys[:3])
+        journal.finish(keys[0], metrics)
+        journal.fail(keys[1], "no converged points")
+
+    solved = []
+    run_case = airfoil_optimization.run_case
+    def counting_run_case(case):
+        solved.append(case[1])
+        return run_case(case)
+    monkeypatch.setattr(airfoil_optimization, "run_case", counting_run_case)
+
+    results = airfoil_optimization.evaluate_cases(cases)
+    assert sorted(solved) == sorted([cases[2][1], cases[3][1]])
+    assert results[0] == (cases[0][1], "done", pytest.approx(metrics), None)
+    assert results[1][1:] == ("failed", None, "no converged points")
+    assert [status for _, status, _, _ in results[2:]] == ["done", "done"]
+
+    #A second run has nothing left to solve
+    solved.clear()
+    assert airfoil_optimization.evaluate_cases(cases) == results
+    assert solved == []
@@ -0,0 +1,45 @@
+import numpy
+import pytest
+import main
+import weight_sizing
+
+#Weight Sizing
+#The batch engine against main.weight_estimation on every key, the closure of the weight sum,
+#grids of parameter sets against one call per point, and parameter sets that do not close
+
+def test_matches_main_on_every_key():
+    sol_dict, ratio = main.weight_estimation()
+    batch_sol, batch_ratio = weight_sizing.batch_weight_estimation(main.parameters)
+    assert set(batch_sol) == set(sol_dict) and set(batch_ratio) == set(ratio)
+    assert weight_sizing.max_relative_difference(batch_sol, sol_dict) < 1e-9
+    assert weight_sizing.max_relative_difference(batch_ratio, ratio) < 1e-9
+    assert float(batch_sol["W_crew"]) == main.parameters["crew"]
+    assert float(batch_sol["W_payload"]) == main.parameters["payload"]
+    assert main.sizing_check(sol_dict, ratio) < 1e-9
+
+def test_weight_sum_closes():
+    sol_dict, ratio = weight_sizing.batch_weight_estimation(weight_sizing.parameter_grid(
+        main.parameters, aspect_ratio = numpy.linspace(6, 10, 9), R = numpy.linspace(1e6, 3e6, 5)))
+    total = sol_dict["W_crew"] + sol_dict["W_payload"] + sol_dict["W_empty"] + sol_dict["W_fuel"]
+    assert total == pytest.approx(sol_dict["W_0"], rel = 1e-12)
+    assert sol_dict["W_0"].shape == (9, 5)
+    #Longer range needs more fuel, a higher aspect ratio less
+    assert numpy.all(numpy.diff(ratio["W_fuel/W_0"], axis = 1) > 0)
+    assert numpy.all(numpy.diff(ratio["W_fuel/W_0"], axis = 0) < 0)
+
+def test_grid_matches_single_points():
+    aspect_ratio, payload = numpy.array([6.0, 8.0, 11.0]), numpy.array([50.0, 400.0])
+    grid, _ = weight_sizing.batch_weight_estimation(weight_sizing.parameter_grid(
+        main.parameters, aspect_ratio = aspect_ratio, payload = payload))
+    for i, a in enumerate(aspect_ratio):
+        for j, p in enumerate(payload):
+            single, _ = weight_sizing.batch_weight_estimation({**main.parameters, "aspect_ratio": a, "payload": p})
+            assert grid["W_0"][i, j] == pytest.approx(float(single["W_0"]), rel = 1e-14)
+
+#No real root of the weight quadratic: the design does not close and comes back as NaN
+def test_no_closure_is_nan():
+    W_0 = weight_sizing.gross_weight(numpy.array([0.2, 0.42, 0.5]), 460)
+    assert numpy.isfinite(W_0[0])
+    assert numpy.all(numpy.isnan(W_0[1:]))
+    W_0 = main.trade_study(payload = numpy.array([100.0, 1e5]))[0]["W_0"]
+    assert numpy.isfinite(W_0[0]) and numpy.isnan(W_0[1])
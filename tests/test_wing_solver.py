@@ -0,0 +1,69 @@
+import math as m
+import numpy
+import pytest
+import wing_solver
+
+#Wing Solver
+#The lifting line against the classical results (span efficiency, lift slope, zero lift angle),
+#the span load integral, stall onset below the section cl max, and the batch against single wings
+
+sections = {station: wing_solver.thin_airfoil_section("2412", 1.5) for station in wing_solver.stations}
+
+def test_thin_airfoil_section():
+    assert wing_solver.thin_airfoil_section("0012", 1.4)["alpha_L0"] == pytest.approx(0, abs = 1e-12)
+    #Thin airfoil theory gives about -2.08 deg for the NACA 2412 camber line
+    assert sections["root"]["alpha_L0"] == pytest.approx(-2.08, abs = 0.01)
+
+#Untwisted: e below 1, close to 1 (elliptic like load) near a 0.35 taper, the rectangular wing
+#and the lift slope next to the elliptic wing's a0/(1 + a0/(pi AR))
+def test_planform_efficiency_and_lift_slope():
+    taper = numpy.array([0.2, 0.35, 0.4, 0.6, 1.0])
+    wing = wing_solver.lifting_line(8, taper, 0.0, sections)
+    assert numpy.all(wing["e"] < 1)
+    assert numpy.all(wing["e"][1:3] > 0.98)
+    assert numpy.argmax(wing["e"]) in (1, 2)
+    assert wing["e"][-1] == pytest.approx(0.94, abs = 0.01)
+    elliptic = 2*m.pi/(1 + 2*m.pi/(m.pi*8))
+    assert numpy.all(wing["CL_alpha"] < elliptic)
+    assert wing["CL_alpha"][2] == pytest.approx(elliptic, rel = 0.015)
+    assert wing["K"] == pytest.approx(1/(m.pi*8*wing["e"]))
+
+def test_zero_lift_and_induced_drag():
+    alphas = numpy.arange(-4.0, 12.0, 1.0)
+    wing = wing_solver.lifting_line(8, 0.4, 0.0, sections, alphas)
+    #No twist, one section: the wing has the section's zero lift angle
+    assert wing["CL"] == pytest.approx(wing["CL_alpha"]*numpy.radians(alphas - sections["root"]["alpha_L0"]))
+    assert wing["CDi"] == pytest.approx(wing["CL"]**2/(m.pi*8*wing["e"]), rel = 1e-9)
+
+#The loading c*cl/c_mean integrates over eta to CL (eta = cos theta, the tip load is 0)
+def test_span_load_integrates_to_CL():
+    alphas = numpy.arange(0.0, 10.0)
+    wing = wing_solver.lifting_line(8, 0.4, -2.0, sections, alphas)
+    cl, loading = wing_solver.span_load(wing, alphas)
+    assert cl.shape == loading.shape == (len(alphas), len(wing["eta"]))
+    theta = numpy.concatenate([[0], numpy.arccos(wing["eta"])])
+    loading = numpy.concatenate([numpy.zeros((len(alphas), 1)), loading], axis = -1)
+    assert numpy.trapezoid(loading*numpy.sin(theta), theta) == pytest.approx(wing["CL"], rel = 1e-9)
+
+#Stall starts where the local cl reaches its cl max first, the wing CLmax is below the section's;
+#washout moves the stall inboard
+def test_stall_onset():
+    wing = wing_solver.lifting_line(8, numpy.array([0.4, 0.4]), numpy.array([0.0, -4.0]), sections)
+    assert numpy.all(wing["CL_max"] < 1.5)
+    cl, _ = wing_solver.span_load(wing, wing["alpha_stall"][:, None])
+    assert numpy.max(cl[:, 0, :], axis = -1) == pytest.approx([1.5, 1.5])
+    assert wing["stall_eta"][1] < wing["stall_eta"][0]
+
+def test_batch_matches_single_wings():
+    aspect_ratio = numpy.array([6.0, 8.0, 10.0])[:, None]
+    taper = numpy.array([0.3, 0.5, 1.0])
+    mixed = {"root": wing_solver.thin_airfoil_section("4415", 1.6), "mid": sections["mid"],
+             "tip": wing_solver.thin_airfoil_section("0012", numpy.array([1.3, 1.4, 1.5]))}
+    batch = wing_solver.lifting_line(aspect_ratio, taper, -1.0, mixed, [2.0, 6.0])
+    assert batch["CL"].shape == (3, 3, 2)
+    for i in range(3):
+        for j in range(3):
+            tip = {**mixed["tip"], "cl_max": mixed["tip"]["cl_max"][j]}
+            single = wing_solver.lifting_line(aspect_ratio[i, 0], taper[j], -1.0, {**mixed, "tip": tip}, [2.0, 6.0])
+            for name in ("CL", "CDi", "e", "CL_max"):
+                assert batch[name][i, j] == pytest.approx(single[name], rel = 1e-10)
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import numpy
+import pytest
+import airfoil_optimization
+from xfoil_pool import XfoilPool, XfoilSession
+
+#XFOIL Pool
+#Persistent fake_xfoil sessions against one-shot runs, and the failure paths: a crashed or hung
+#solver fails its case and is replaced, a session that never stops printing still times out
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+fake_xfoil = [sys.executable, os.path.join(root, "fake_xfoil.py")]
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, value in {"solver": "xfoil", "alpha_mode": "fixed", "xfoil_command": fake_xfoil,
+                        "persistent_xfoil": False, "keep_scratch": False}.items():
+        monkeypatch.setattr(airfoil_optimization, name, value)
+    return airfoil_optimization
+
+def test_pool_matches_one_shot_runs(sweep):
+    cases = [sweep.design_case(*design) for design in ((0, 0, 12), (2, 4, 12), (4, 4, 15))]
+    with XfoilPool(fake_xfoil, sweep.sim_controls(), 2, 2, 30, "scratch") as pool:
+        pooled = pool.run_cases(cases)
+    for case, (name, polar, error) in zip(cases, pooled):
+        one_shot_name, one_shot, one_shot_error = sweep.run_xfoil_case(case)
+        assert (name, error) == (one_shot_name, one_shot_error) == (case[1], None)
+        assert numpy.array_equal(polar, one_shot)
+
+def test_crash_and_hang_fail_only_their_case(sweep, monkeypatch):
+    monkeypatch.setenv("FAKE_XFOIL_CRASH", "2412")
+    monkeypatch.setenv("FAKE_XFOIL_HANG", "4412")
+    cases = [sweep.design_case(*design) for design in ((0, 0, 12), (2, 4, 12), (4, 4, 12), (2, 4, 15))]
+    with XfoilPool(fake_xfoil, sweep.sim_controls(), 1, 50, 2, "scratch") as pool:
+        results = pool.run_cases(cases)
+        assert all(session.healthy() for session in pool.sessions)
+    assert [error is None for _, _, error in results] == [True, False, False, True]
+    assert "timed out" in results[2][2]
+
+#A failed health check closes the sessions already started
+def test_pool_start_failure_closes_sessions(sweep, tmp_path):
+    started = []
+    class Failing(XfoilSession):
+        def start(self):
+            if len(started) == 2:
+                raise RuntimeError("xfoil session exited")
+            super().start()
+            started.append(self)
+    import xfoil_pool
+    original = xfoil_pool.XfoilSession
+    xfoil_pool.XfoilSession = Failing
+    try:
+        with pytest.raises(RuntimeError):
+            XfoilPool(fake_xfoil, sweep.sim_controls(), 3, 50, 30, "scratch")
+    finally:
+        xfoil_pool.XfoilSession = original
+    assert all(not session.healthy() for session in started)
+    assert os.listdir(tmp_path / "scratch") == []
+
+#The case timeout is for the whole wait, not per line of output
+def test_sync_timeout_with_continuous_output(tmp_path):
+    chatter = tmp_path / "chatter.py"
+    chatter.write_text("import sys, time\n"
+                       "for line in sys.stdin:\n"
+                       "    print(line.strip(), flush = True)\n"
+                       "    while line.strip() == 'ITER':\n"
+                       "        print('   rms: 0.1E-01', flush = True)\n"
+                       "        time.sleep(0.01)\n")
+    session = XfoilSession([sys.executable, str(chatter)], {}, str(tmp_path / "scratch"), 5)
+    try:
+        session.send("ITER\n")
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            session.sync(0.5)
+        assert time.monotonic() - start < 2
+    finally:
+        session.close()
@@ -1,8 +1,7 @@
-import math as m
-import matplotlib.pyplot as plt
-from tabulate import tabulate
-import pandas as pd
+from functools import lru_cache
 import numpy as np
+from atmosphere import atmosphere, ceiling
+from performance_point import optimum_speeds
 #==============================================================================================#
 #Dictionary of values
 param = {
@@ -16,24 +15,13 @@ param = {
 #==============================================================================================#
 #Functions
 
-#---Altitude---
+#---Altitude--- (scalars or arrays, atmosphere.py has the model, NaN above 82,000 ft)
 def rho(altitude):
-    t_0 = 519
-    a = -0.003566
-    rho_0 = 0.002378
-    p_0 = 2116.2
-
-    if altitude <= 36000:
-        temperature = t_0 + (altitude * a)
-        pressure = p_0 * ((1 + (a * altitude) / t_0) ** 5.26)
-        density = rho_0 * ((1 + (a * altitude) / t_0) ** 4.26)
-    elif 36000 < altitude <= 82000:
-        temperature = t_0 + (36000 * a)
-        pressure = p_0 * (1.26 / (m.e ** ((4.805*10**-5) * altitude)))
-        density = rho_0 * (1.68 / (m.e ** ((4.805*10**-5) * altitude)))
-    else:
+    temperature, pressure, density, _, _ = atmosphere(altitude)
+    if np.any(np.asarray(altitude) > ceiling):
         print("36000 to 82000 ft only")
-
+    if np.ndim(altitude) == 0:
+        return float(temperature), float(pressure), float(density)
     return temperature, pressure, density
 
 #---Dynamic Pressure---
@@ -53,95 +41,145 @@ def c_d(c_d0,c_di):
     return c_d0 + c_di
 
 #==============================================================================================#
-#Define Variables
-
-altitude = param["altitude"]
-S = param["Wing Area"]
-W = param["Gross Weight"]
-c_d0 = param ["C_d0"]
-k = param["k"]
-_,_,density= rho(altitude)
-param["Density"] = density
-#============================================================================================================#
-#Solving Commands
-c_lift_list = []
-c_di_list = []
-c_parasitic_list = []
-thrust_required_list = []
-velocity_list = []
-
+#Velocity Sweep
 start = 100
 end = 700
 time_step = 5
 
-for velocity in range(start,end,time_step):
+#---Performance Grid: altitude x weight x velocity axes (velocity last) for performance_map
+def performance_grid(altitudes, weights, velocities):
+    return (np.asarray(altitudes, dtype = float).reshape(-1, 1, 1),
+            np.asarray(weights, dtype = float).reshape(1, -1, 1),
+            np.asarray(velocities, dtype = float).reshape(1, 1, -1))
+
+#---Performance Map: thrust and power required for every broadcast combination of altitude,
+#weight, velocity, C_d0 and k, velocity has to be the last axis
+#Per slice along velocity: minimum thrust speed V_md (the stable/unstable branch boundary),
+#minimum power speed V_mp, and the stable mask (V >= V_md, speed stable in thrust)
+def performance_map(altitude, weight, velocity, c_d0, k, S):
+    _,_,density = rho(altitude)
     q = dynamic_pressure(density,velocity)
-    c_lift = c_l(q,S,W)
-    c_induced = (c_di(k,c_lift)) * q * S
-    c_parasitic = c_d0 * q * S
-    thrust_required = c_parasitic + c_induced
-
-    c_lift_list.append(c_lift)
-    c_di_list.append(c_induced)
-    c_parasitic_list.append(c_parasitic)
-    thrust_required_list.append(thrust_required)
-    velocity_list.append(velocity)
+    c_lift = c_l(q,S,weight)
+    induced = c_di(k,c_lift) * q * S
+    parasitic = c_d0 * q * S
+    thrust_required = parasitic + induced
+    power_required = thrust_required * velocity
+
+    velocity = np.broadcast_to(velocity, thrust_required.shape)
+    i_md = np.argmin(thrust_required, axis = -1)[..., None]
+    i_mp = np.argmin(power_required, axis = -1)[..., None]
+    V_md = np.take_along_axis(velocity, i_md, axis = -1)
+    V_mp = np.take_along_axis(velocity, i_mp, axis = -1)
+    return {
+        "density": density,
+        "c_lift": c_lift,
+        "induced": induced,
+        "parasitic": parasitic,
+        "thrust_required": thrust_required,
+        "power_required": power_required,
+        "V_md": V_md[..., 0],
+        "T_min": np.take_along_axis(thrust_required, i_md, axis = -1)[..., 0],
+        "V_mp": V_mp[..., 0],
+        "P_min": np.take_along_axis(power_required, i_mp, axis = -1)[..., 0],
+        "stable": velocity >= V_md,
+        "unstable_range": (velocity[..., 0], V_md[..., 0]),
+        "stable_range": (V_md[..., 0], velocity[..., -1])
+    }
+
+#---Thrust Required: the velocity sweep at the altitude, weight and polar in param
+#V_md, T_min, V_mp and P_min are the closed form optima (performance_point), not grid points
+def thrust_required_sweep(param, start = start, end = end, time_step = time_step):
+    velocity = np.arange(start,end,time_step)
+    sweep = performance_map(param["altitude"], param["Gross Weight"], velocity, param["C_d0"], param["k"], param["Wing Area"])
+    optimum = optimum_speeds(param["Gross Weight"], param["Wing Area"], sweep["density"], param["C_d0"], param["k"])
+    return {
+        "Density": float(sweep["density"]),
+        "velocity": velocity.tolist(),
+        "c_lift": sweep["c_lift"].tolist(),
+        "induced": sweep["induced"].tolist(),
+        "parasitic": sweep["parasitic"].tolist(),
+        "thrust_required": sweep["thrust_required"].tolist(),
+        "V_md": float(optimum["V_md"]),
+        "T_min": float(optimum["D_min"]),
+        "V_mp": float(optimum["V_mp"]),
+        "P_min": float(optimum["P_min"])
+    }
+
+#---Thrust Stage: the sweep for param, computed on first use and kept
+#Call thrust_stage.cache_clear() after changing param
+@lru_cache(maxsize = None)
+def thrust_stage():
+    return thrust_required_sweep(param)
 
 #==============================================================================================================#
-#Print and CSV generation
-data = list(zip(velocity_list,c_lift_list,c_di_list,c_parasitic_list,thrust_required_list))
-header = ["Velocity ft/s", "C_L","Induced Thrust Required","Parasitic Thrust Required","Thrust Required lbf"]
-dict = pd.DataFrame(data,columns = header)
-print(tabulate(data, headers = header, floatfmt = ".4f", tablefmt = "fancy_grid"))
-
-file_name = "Thrust_required.csv"
-
-with open(file_name,"w") as f:
-    f.write("Parameter, Value\n")
-    for key,val in param.items():
-        f.write(f"{key},{val} \n")
-    f.write(f"C_d,{c_d0}+{k}c_l \n")
-    f.write("\n")
-
-dict.to_csv(file_name, mode = 'a', index = False, )
-
-#===============================================================================================================#
-#Plot
-
-min_index = thrust_required_list.index(min(thrust_required_list))
-V_min = velocity_list[min_index]
-Tr_min = thrust_required_list[min_index]
-
-# Split for piecewise plotting
-left_V = velocity_list[:min_index+1]
-left_Tr = thrust_required_list[:min_index+1]
-right_V = velocity_list[min_index:]
-right_Tr = thrust_required_list[min_index:]
-
-#-------------------------------------------------------------------------------
-# Plot the left and right branches
-plt.figure(figsize=(10,6))
-plt.plot(left_V, left_Tr, label='Region of Velocity\n Instability', color='blue', marker='+')
-plt.plot(right_V, right_Tr, label='Region of Velocity\n Stability', color='red', marker='+')
-plt.plot(velocity_list,c_di_list, label = 'Induced Thrust Required', marker = '.')
-plt.plot(velocity_list,c_parasitic_list, label = 'Parasitic Thrust Required', marker = '.')
-
-# Min point marker
-plt.scatter([V_min], [Tr_min], color='green', label='Minimum Thrust Required', zorder=5)
-plt.axvline(x=V_min, color='green', linestyle='--', linewidth=1)
-
-# Annotate regions
-plt.text(left_V[1], left_Tr[1] + 10, 'Region of Velocity\n Instability', color='blue')
-plt.text(right_V[-15], right_Tr[-5] + 5, 'Region of Velocity\n Stability', color='red')
-
-# Plot formatting
-plt.xlabel("Velocity (ft/s)")
-plt.ylabel("Thrust Required (lb)")
-plt.title("Thrust Required Curve @ 15,000 ft", fontdict={'family':'rockwell', 'weight': 'bold'})
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
-
-#This only shows thrust required at only 1 alttitude, To get the values for other altitudes,
-#make the Velocity loop a function then make another function for altitude
+#Print, CSV generation and Plot
+def print_report(file_name = "Thrust_required.csv"):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from tabulate import tabulate
+
+    sweep = thrust_stage()
+    velocity_list = sweep["velocity"]
+    c_di_list = sweep["induced"]
+    c_parasitic_list = sweep["parasitic"]
+    thrust_required_list = sweep["thrust_required"]
+
+    data = list(zip(velocity_list,sweep["c_lift"],c_di_list,c_parasitic_list,thrust_required_list))
+    header = ["Velocity ft/s", "C_L","Induced Thrust Required","Parasitic Thrust Required","Thrust Required lbf"]
+    table = pd.DataFrame(data,columns = header)
+    print(tabulate(data, headers = header, floatfmt = ".4f", tablefmt = "fancy_grid"))
+
+    with open(file_name,"w") as f:
+        f.write("Parameter, Value\n")
+        for key,val in {**param, "Density": sweep["Density"]}.items():
+            f.write(f"{key},{val} \n")
+        f.write(f"C_d,{param['C_d0']}+{param['k']}c_l \n")
+        f.write("\n")
+
+    table.to_csv(file_name, mode = 'a', index = False, )
+
+    print(f"Minimum thrust required: {sweep['T_min']:.4f} lbf at {sweep['V_md']:.4f} ft/s")
+    print(f"Minimum power required:  {sweep['P_min']:.4f} ft lbf/s at {sweep['V_mp']:.4f} ft/s")
+
+    #Plot
+
+    V_min = sweep["V_md"]
+    Tr_min = sweep["T_min"]
+    min_index = int(np.searchsorted(velocity_list, V_min))
+
+    # Split for piecewise plotting, both branches meet at the minimum
+    left_V = velocity_list[:min_index] + [V_min]
+    left_Tr = thrust_required_list[:min_index] + [Tr_min]
+    right_V = [V_min] + velocity_list[min_index:]
+    right_Tr = [Tr_min] + thrust_required_list[min_index:]
+
+    #-------------------------------------------------------------------------------
+    # Plot the left and right branches
+    plt.figure(figsize=(10,6))
+    plt.plot(left_V, left_Tr, label='Region of Velocity\n Instability', color='blue', marker='+')
+    plt.plot(right_V, right_Tr, label='Region of Velocity\n Stability', color='red', marker='+')
+    plt.plot(velocity_list,c_di_list, label = 'Induced Thrust Required', marker = '.')
+    plt.plot(velocity_list,c_parasitic_list, label = 'Parasitic Thrust Required', marker = '.')
+
+    # Min point marker
+    plt.scatter([V_min], [Tr_min], color='green', label='Minimum Thrust Required', zorder=5)
+    plt.axvline(x=V_min, color='green', linestyle='--', linewidth=1)
+
+    # Annotate regions
+    plt.text(left_V[1], left_Tr[1] + 10, 'Region of Velocity\n Instability', color='blue')
+    plt.text(right_V[-15], right_Tr[-5] + 5, 'Region of Velocity\n Stability', color='red')
+
+    # Plot formatting
+    plt.xlabel("Velocity (ft/s)")
+    plt.ylabel("Thrust Required (lb)")
+    plt.title("Thrust Required Curve @ 15,000 ft", fontdict={'family':'rockwell', 'weight': 'bold'})
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+#This only shows thrust required at only 1 alttitude, performance_map(*performance_grid(...), c_d0, k, S)
+#gives every altitude and weight at once
+
+if __name__ == "__main__":
+    print_report()
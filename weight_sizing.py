@@ -0,0 +1,110 @@
+import numpy
+
+#Weight Sizing
+#Numeric version of main.weight_estimation for batches of parameter sets
+#Every entry of parameters can be a scalar or a NumPy array, arrays broadcast against each
+#other so one call sizes every combination at once
+#With the segment ratios fixed the only unknown is W_0:
+#   W_0 = W_crew + W_payload + (A*W_0 + B)*W_0 + W_fuel/W_0*W_0
+#   A*W_0**2 + (B + W_fuel/W_0 - 1)*W_0 + W_crew + W_payload = 0
+#The smaller root is the design weight (same root sympy.solve returns first), parameter
+#sets with no real root come back as NaN
+
+K_LD = 10.5                     #Raymer wetted aspect ratio constant
+AVGAS100LL = 6.01               #lb/gal
+empty_weight_A = 1.543e-5       #W_empty/W_0 = A*W_0 + B
+empty_weight_B = 0.57
+fuel_reserve = 1.05             #6% reserve and trapped fuel, 1.05 as in main
+loiter_L_D = 0.866              #loiter at 86.6% of the maximum L/D (propeller)
+segment_ratios = {              #fixed historical segment weight fractions
+    "W_1/W_0": 0.98,            #warm up and takeoff
+    "W_2/W_1": 0.97,            #climb
+    "W_5/W_4": 0.99,            #descent
+    "W_6/W_5": 0.997            #landing
+}
+parameter_names = ("R", "E", "V_Emax", "n_p", "sfc_cruise", "sfc_loiter", "aspect_ratio", "swet_sref", "crew", "payload")
+
+#==============================================================================================#
+#Functions
+
+#---Parameter Grid: every combination of the swept parameters as broadcastable arrays
+#sweeps maps parameter names to 1D arrays, everything else is taken from parameters
+def parameter_grid(parameters, **sweeps):
+    grid = dict(parameters)
+    for axis, (name, values) in enumerate(sweeps.items()):
+        shape = [1]*len(sweeps)
+        shape[axis] = -1
+        grid[name] = numpy.asarray(values, dtype = float).reshape(shape)
+    return grid
+
+#---Lift to Drag: maximum L/D from the wetted aspect ratio
+def max_lift_to_drag(aspect_ratio, swet_sref, k_ld = K_LD):
+    return k_ld*numpy.sqrt(aspect_ratio/swet_sref)
+
+#---Gross Weight: W_0 for a fuel fraction W_fuel/W_0 and the fixed (crew and payload) weight
+#Quadratic in W_0, the smaller root in the cancellation free form 2c/(-b + sqrt(b^2 - 4ac))
+def gross_weight(fuel_fraction, W_fixed):
+    b = empty_weight_B + numpy.asarray(fuel_fraction, dtype = float) - 1
+    discriminant = b**2 - 4*empty_weight_A*W_fixed
+    with numpy.errstate(invalid = "ignore", divide = "ignore"):
+        root = numpy.sqrt(numpy.where(discriminant >= 0, discriminant, numpy.nan))
+        return numpy.where(b < 0, 2*W_fixed/(-b + root), numpy.nan)
+
+#---Batch Weight Estimation: returns (sol_dict, ratio) like main.weight_estimation with arrays
+#parameters can also carry "K_LD" to replace the Raymer constant
+def batch_weight_estimation(parameters):
+    p = {name: numpy.asarray(parameters[name], dtype = float) for name in parameter_names}
+
+    #Mission segment fractions, Breguet range and endurance for cruise and loiter
+    L_D = max_lift_to_drag(p["aspect_ratio"], p["swet_sref"], numpy.asarray(parameters.get("K_LD", K_LD), dtype = float))
+    cruise = numpy.exp(-p["R"]*p["sfc_cruise"]/(p["n_p"]*L_D))
+    loiter = numpy.exp(-p["E"]*p["sfc_loiter"]*p["V_Emax"]/(loiter_L_D*L_D*p["n_p"]))
+    W_6_W_0 = (segment_ratios["W_1/W_0"]*segment_ratios["W_2/W_1"]*cruise*loiter
+               *segment_ratios["W_5/W_4"]*segment_ratios["W_6/W_5"])
+    fuel_fraction = fuel_reserve*(1 - W_6_W_0)
+
+    W_0 = gross_weight(fuel_fraction, p["crew"] + p["payload"])
+
+    W_1 = segment_ratios["W_1/W_0"]*W_0
+    W_2 = segment_ratios["W_2/W_1"]*W_1
+    W_3 = cruise*W_2
+    W_4 = loiter*W_3
+    W_5 = segment_ratios["W_5/W_4"]*W_4
+    W_6 = segment_ratios["W_6/W_5"]*W_5
+    W_empty = (empty_weight_A*W_0 + empty_weight_B)*W_0
+    W_fuel = fuel_fraction*W_0
+
+    sol_dict = {
+        "W_0": W_0,
+        "W_empty": W_empty,
+        "W_fuel": W_fuel,
+        "W_crew": numpy.broadcast_to(p["crew"], W_0.shape),
+        "W_payload": numpy.broadcast_to(p["payload"], W_0.shape),
+        "W_1": W_1, "W_2": W_2, "W_3": W_3, "W_4": W_4, "W_5": W_5, "W_6": W_6,
+        "L_D-maxCruise": L_D,
+        "L_D-maxLoiter": L_D*loiter_L_D
+    }
+    ratio = {
+        "W_empty/W_0": W_empty/W_0,
+        "W_fuel/W_0": numpy.broadcast_to(fuel_fraction, W_0.shape),
+        "W_1/W_0": W_1/W_0,
+        "W_2/W_1": W_2/W_1,
+        "W_3/W_2": numpy.broadcast_to(cruise, W_0.shape),
+        "W_4/W_3": numpy.broadcast_to(loiter, W_0.shape),
+        "W_5/W_4": W_5/W_4,
+        "W_6/W_5": W_6/W_5,
+        "Fuel_Density_AVGAS100LL_lb/gal": AVGAS100LL,
+        "Fuel_Volume_gal": W_fuel/AVGAS100LL,
+        "W_6/W_0": numpy.broadcast_to(W_6_W_0, W_0.shape)
+    }
+    return sol_dict, ratio
+
+#---Compare: largest relative difference between a batch result and a scalar reference dict
+#Keys missing from either side are skipped
+def max_relative_difference(batch, reference, keys = None):
+    keys = [key for key in (keys or reference) if key in batch]
+    worst = 0.0
+    for key in keys:
+        value, ref = numpy.asarray(batch[key], dtype = float), float(reference[key])
+        worst = max(worst, float(numpy.max(numpy.abs(value - ref)/max(abs(ref), 1e-12))))
+    return worst
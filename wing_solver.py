@@ -0,0 +1,146 @@
+import math as m
+import numpy as np
+
+#Wing Solver
+#Prandtl lifting line (Fourier series of the span load, symmetric terms only) for straight
+#tapered wings with linear twist, with section lift slope, zero lift angle and cl max given at
+#the root, mid span and tip and linear in between
+#Gives the span load, CL and induced drag at any alpha, the span efficiency and K of the
+#planform and the stall onset CLmax (the first station to reach its section cl max)
+#Planform and section inputs broadcast into a batch of wings, each wing's system is solved
+#once (np.linalg.solve, batched) for two right hand sides, the alpha part and the twist/zero
+#lift part, so any number of alphas cost one extra multiply
+#Sections come from thin airfoil theory for a NACA code (thin_airfoil_section) or from the
+#polar database (database_section)
+
+stations = ("root", "mid", "tip")
+
+#==============================================================================================#
+#Sections
+
+#---Thin Airfoil Section: 2 pi lift slope and the camber line zero lift angle of a NACA 4 digit
+def thin_airfoil_section(airfoil_code, cl_max, points = 2000):
+    from panel_solver import naca_parameters
+    camber, location, _ = naca_parameters(airfoil_code)
+    theta = (np.arange(points) + 0.5)*m.pi/points
+    x = (1 - np.cos(theta))/2
+    if camber == 0:
+        slope = np.zeros_like(x)
+    else:
+        slope = np.where(x < location, 2*camber/location**2*(location - x), 2*camber/(1 - location)**2*(location - x))
+    alpha_L0 = -np.sum(slope*(np.cos(theta) - 1))*(m.pi/points)/m.pi
+    return {"a0": 2*m.pi, "alpha_L0": m.degrees(alpha_L0), "cl_max": cl_max}
+
+#---Database Section: lift slope and zero lift angle fitted over the linear range, cl max, at a
+#Reynolds and Mach number from a polar_database.PolarDatabase
+def database_section(database, airfoil, reynolds_number, mach_number, linear_range = (0.0, 6.0)):
+    alphas = database.alphas[(database.alphas >= linear_range[0]) & (database.alphas <= linear_range[1])]
+    cl = database.lookup(airfoil, reynolds_number, mach_number, alphas, names = ("cl",))["cl"]
+    slope, intercept = np.polyfit(alphas, cl, 1)
+    return {"a0": m.degrees(slope), "alpha_L0": -intercept/slope,
+            "cl_max": float(database.cl_max(airfoil, reynolds_number, mach_number))}
+
+#---Span Profile: root, mid and tip values (each broadcast) at the stations eta = |y|/(b/2)
+def span_profile(root, mid, tip, eta):
+    root, mid, tip = (np.asarray(value, dtype = float)[..., None] for value in (root, mid, tip))
+    return np.where(eta <= 0.5, root + (mid - root)*eta/0.5, mid + (tip - mid)*(eta - 0.5)/0.5)
+
+#==============================================================================================#
+#Lifting Line
+
+#---Lifting Line: the wing batch at every alpha (deg)
+#aspect_ratio, taper (tip/root chord) and twist (tip minus root incidence, deg, negative is
+#washout) broadcast with the section values, sections = {"root": {"a0" (per rad), "alpha_L0"
+#(deg), "cl_max"}, "mid": .., "tip": ..}, n_terms collocation points on the half span
+def lifting_line(aspect_ratio, taper, twist, sections, alphas = 0.0, n_terms = 40):
+    theta = (np.arange(n_terms) + 1)*(m.pi/2)/n_terms      #tip excluded, root at pi/2
+    eta = np.cos(theta)
+    n = 2*np.arange(n_terms) + 1
+    aspect_ratio, taper, twist = (np.asarray(value, dtype = float)[..., None] for value in (aspect_ratio, taper, twist))
+
+    a0, alpha_L0, cl_max = (span_profile(*(sections[station][name] for station in stations), eta)
+                            for name in ("a0", "alpha_L0", "cl_max"))
+    chord_span = 2/(aspect_ratio*(1 + taper))*(1 - (1 - taper)*eta)         #c/b
+    mu = chord_span*a0/4
+    mu, twist_local, alpha_L0, cl_max, aspect_ratio, chord_span = np.broadcast_arrays(
+        mu, np.radians(twist*eta), np.radians(alpha_L0), cl_max, aspect_ratio, chord_span)
+
+    #sum_n A_n sin(n theta)(mu n + sin theta) = mu sin(theta)(alpha + twist - alpha_L0)
+    sin_n = np.sin(theta[:, None]*n[None, :])
+    matrix = sin_n*(mu[..., :, None]*n + np.sin(theta)[:, None])
+    rhs = np.stack([mu*np.sin(theta), mu*np.sin(theta)*(twist_local - alpha_L0)], axis = -1)
+    A = np.linalg.solve(matrix, rhs)                                         #(..., n_terms, 2)
+    A_alpha, A_fixed = A[..., 0], A[..., 1]
+
+    #Local cl = 4 (b/c) sum A_n sin(n theta), linear in alpha
+    cl_alpha = 4/chord_span*(A_alpha @ sin_n.T)
+    cl_fixed = 4/chord_span*(A_fixed @ sin_n.T)
+
+    alphas = np.radians(np.asarray(alphas, dtype = float))
+    AR = aspect_ratio[..., 0]
+    A_n = A_alpha[..., None, :]*alphas[..., None] + A_fixed[..., None, :]  #(..., alphas, n_terms)
+    CL = m.pi*AR[..., None]*A_n[..., 0]
+    CDi = m.pi*AR[..., None]*np.sum(n*A_n**2, axis = -1)
+
+    #Planform efficiency from the alpha loading alone (no twist, constant zero lift angle)
+    delta = np.sum(n[1:]*(A_alpha[..., 1:]/A_alpha[..., :1])**2, axis = -1)
+    e = 1/(1 + delta)
+
+    #Stall onset: the lowest alpha where a station reaches its cl max
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        alpha_station = np.where(cl_alpha > 0, (cl_max - cl_fixed)/cl_alpha, np.inf)
+    i_stall = np.argmin(alpha_station, axis = -1)
+    alpha_stall = np.take_along_axis(alpha_station, i_stall[..., None], axis = -1)[..., 0]
+    CL_max = m.pi*AR*(A_alpha[..., 0]*alpha_stall + A_fixed[..., 0])
+
+    return {
+        "alpha": np.degrees(alphas),
+        "CL": CL,
+        "CDi": CDi,
+        "e": e,
+        "K": 1/(m.pi*AR*e),
+        "CL_alpha": m.pi*AR*A_alpha[..., 0],                                 #per rad
+        "CL_max": CL_max,
+        "alpha_stall": np.degrees(alpha_stall),
+        "stall_eta": eta[i_stall],
+        "eta": eta,
+        "chord_ratio": chord_span*aspect_ratio,                              #local chord over the mean chord
+        "cl_alpha": cl_alpha,                                                #local cl per rad of alpha
+        "cl_fixed": cl_fixed,                                                #local cl at zero alpha
+        "cl_max_local": cl_max
+    }
+
+#---Span Load: local cl and the span loading c*cl/(c_mean) at the stations for each alpha
+def span_load(result, alphas):
+    alphas = np.radians(np.asarray(alphas, dtype = float))[..., None]
+    cl = result["cl_alpha"][..., None, :]*alphas + result["cl_fixed"][..., None, :]
+    return cl, cl*result["chord_ratio"][..., None, :]
+
+#---Design Wing: the current design, aspect ratio from main.parameters, station cl max from
+#initial_drag.station_cl on the selected airfoil (thin airfoil sections)
+def design_wing(taper = 0.5, twist = 0.0, alphas = np.arange(0.0, 16.0, 1.0)):
+    import main
+    import initial_drag
+    code = initial_drag.selected_airfoil.replace("NACA", "")
+    sections = {station: thin_airfoil_section(code, cl) for station, cl in initial_drag.station_cl.items()}
+    return lifting_line(main.parameters["aspect_ratio"], taper, twist, sections, alphas)
+
+#==============================================================================================#
+#Report: lifting line CLmax and e next to the initial_drag estimates
+def print_report():
+    from tabulate import tabulate
+    import initial_drag
+
+    wing = design_wing()
+    drag = initial_drag.drag_stage()
+    print(tabulate([
+        ["CLmax (clean)", float(wing["CL_max"]), drag["cl_maxave"]*0.9],
+        ["Span efficiency e", float(wing["e"]), drag["e_clean"]],
+        ["K", float(wing["K"]), drag["K_clean"]]],
+        headers = ("", "Lifting line", "initial_drag")))
+    print(f"Stall starts at eta = {float(wing['stall_eta']):.2f}, alpha = {float(wing['alpha_stall']):.2f} deg")
+    print()
+    print(tabulate(np.column_stack([wing["alpha"], wing["CL"], wing["CDi"]]), headers = ("alpha", "CL", "CDi"), floatfmt = ".4f"))
+
+if __name__ == "__main__":
+    print_report()
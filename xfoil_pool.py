@@ -0,0 +1,303 @@
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from polar_parser import load_polar
+from panel_solver import write_coordinates
+from adaptive_alpha import adaptive_sweep
+import telemetry
+
+#XFOIL Session Pool
+#Long lived XFOIL processes driven over stdin/stdout, each case loads a new airfoil, runs
+#the alpha sequence and returns to the top menu instead of quitting
+#A case is finished when XFOIL echoes a sync token: a 4 character word that is not an
+#XFOIL command, sent at the top menu, which XFOIL answers with "<token> command not recognized"
+#Sessions are restarted when the process dies or a case hangs past the timeout, and are
+#recycled after cases_per_session cases
+#With "adaptive" in the settings the angles are run one ALFA at a time (adaptive_alpha), each
+#starts from the boundary layer of the point before it and its result is read from stdout
+#Session starts and cases are recorded in telemetry ("session" and "case" records)
+
+#==============================================================================================#
+#Functions
+
+#---Geometry Command: NACA for a 4-digit code, a non-integer design is written out and LOADed
+def geometry_command(airfoil_code, directory, panel):
+    if "_" not in airfoil_code:
+        return f"NACA {airfoil_code}"
+    coordinate_file = f"NACA{airfoil_code}.dat"
+    write_coordinates(os.path.join(directory, coordinate_file), airfoil_code, panel)
+    return f"LOAD {coordinate_file}"
+
+#---Oper Commands: one airfoil from the top menu into OPER with the flow condition set
+#VISC toggles viscous mode, so it is only sent on the first case of a session and RE after that
+def oper_commands(settings, geometry, viscous_on):
+    reynolds = f"RE {settings['reynolds_number']}" if viscous_on else f"VISC\n{settings['reynolds_number']}"
+    return f"""{geometry}
+PPAR
+N {settings['panel']}
+
+
+OPER
+VPAR
+N {settings['ncrit']}
+
+ITER {settings['number_itterations']}
+{reynolds}
+MACH {settings['mach_number']}
+"""
+
+#---Case Commands: one airfoil from the top menu back to the top menu
+def case_commands(settings, geometry, polar_file, viscous_on):
+    alpha_start, alpha_end, alpha_step = settings["aseq"]
+    return oper_commands(settings, geometry, viscous_on) + f"""PACC
+{polar_file}
+
+ASEQ {alpha_start} {alpha_end} {alpha_step}
+PACC
+
+"""
+
+#---Point Result: the last alpha, CL, CD, CDp, Cm XFOIL printed, None when it did not converge
+def point_result(lines):
+    text = "".join(lines)
+    lift = re.findall(r"a\s*=\s*(\S+)\s+CL\s*=\s*(\S+)", text)
+    drag = re.findall(r"Cm\s*=\s*(\S+)\s+CD\s*=\s*(\S+).*?CDp\s*=\s*(\S+)", text)
+    if "Convergence failed" in text or not lift or not drag:
+        return None
+    (alpha, cl), (cm, cd, cdp) = lift[-1], drag[-1]
+    try:
+        return [float(alpha), float(cl), float(cd), float(cdp), float(cm)]
+    except ValueError:
+        return None
+
+#---Session: one XFOIL process with its own scratch directory
+class XfoilSession:
+    def __init__(self, xfoil_command, settings, scratch_root, timeout):
+        self.xfoil_command = xfoil_command
+        self.settings = settings
+        self.scratch_root = scratch_root
+        self.timeout = timeout
+        self.proc = None
+        self.scratch = None
+        self.sync_count = 0
+        try:
+            self.start()
+        except BaseException:
+            self.close()
+            raise
+
+    def start(self):
+        os.makedirs(self.scratch_root, exist_ok = True)
+        self.scratch = tempfile.mkdtemp(prefix = "xfoil_session_", dir = self.scratch_root)
+        start = time.perf_counter()
+        self.proc = subprocess.Popen(self.xfoil_command,
+                stdin = subprocess.PIPE,
+                stdout = subprocess.PIPE,
+                stderr = subprocess.STDOUT,
+                text = True,
+                bufsize = 1,
+                cwd = self.scratch)
+        spawn_time = time.perf_counter() - start
+        self.cases_run = 0
+        self.viscous_on = False
+
+        #stdout is read on a thread so waiting for the sync token can time out
+        self.lines = queue.Queue()
+        reader = threading.Thread(target = self.read_output, args = (self.proc.stdout, self.lines), daemon = True)
+        reader.start()
+
+        #Health check: a fresh session has to answer a sync before it gets a case
+        self.sync(self.timeout)
+        telemetry.record("session", spawn_time = spawn_time, ready_time = time.perf_counter() - start)
+
+    @staticmethod
+    def read_output(stdout, lines):
+        for line in stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def send(self, commands):
+        try:
+            self.proc.stdin.write(commands)
+            self.proc.stdin.flush()
+        except OSError:
+            raise RuntimeError("xfoil session exited")
+
+    #---Sync: sends a token and waits until XFOIL echoes it, returns the output before it
+    #timeout is for the whole wait, a session that keeps printing still runs out of it
+    def sync(self, timeout):
+        self.sync_count = (self.sync_count + 1) % 1000
+        token = f"Y{self.sync_count:03d}"
+        self.send(f"{token}\n")
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"timed out after {timeout} s")
+            try:
+                line = self.lines.get(timeout = remaining)
+            except queue.Empty:
+                raise TimeoutError(f"timed out after {timeout} s")
+            if line is None:
+                raise RuntimeError("xfoil session exited")
+            if token in line:
+                return output
+            output.append(line)
+
+    def healthy(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, case):
+        if "adaptive" in self.settings:
+            return self.run_adaptive(case)
+        airfoil_code, airfoil_name, t = case
+        polar_file = f"{airfoil_name}.txt"
+        polar_path = os.path.join(self.scratch, polar_file)
+        if os.path.exists(polar_path):
+            os.remove(polar_path)
+
+        geometry = geometry_command(airfoil_code, self.scratch, self.settings["panel"])
+        start = time.perf_counter()
+        self.send(case_commands(self.settings, geometry, polar_file, self.viscous_on))
+        self.viscous_on = True
+        self.sync(self.timeout)
+        self.cases_run += 1
+        solve_time = time.perf_counter() - start
+
+        if not os.path.exists(polar_path):
+            telemetry.record("case", airfoil = airfoil_name, backend = "session", solve_time = solve_time, error = "no polar file written")
+            return airfoil_name, None, "no polar file written"
+        start = time.perf_counter()
+        polar = load_polar(polar_path)
+        telemetry.record("case", airfoil = airfoil_name, backend = "session", solve_time = solve_time,
+                         parse_time = time.perf_counter() - start, points = len(polar), polar_bytes = os.path.getsize(polar_path))
+        os.remove(polar_path)
+        if len(polar) == 0:
+            return airfoil_name, None, "no converged points"
+        return airfoil_name, polar, None
+
+    #---Adaptive Case: ALFA per point from inside OPER, INIT only for a fresh start or after
+    #a point that did not converge, so every other point is warm started
+    def run_adaptive(self, case):
+        airfoil_code, airfoil_name, t = case
+        geometry = geometry_command(airfoil_code, self.scratch, self.settings["panel"])
+        start = time.perf_counter()
+        self.send(oper_commands(self.settings, geometry, self.viscous_on))
+        self.viscous_on = True
+        self.sync(self.timeout)
+
+        def solve_points(alphas, init):
+            rows = []
+            if init:
+                self.send("INIT\n")
+            for alpha in alphas:
+                self.send(f"ALFA {alpha}\n")
+                row = point_result(self.sync(self.timeout))
+                if row is None:
+                    self.send("INIT\n")
+                else:
+                    rows.append(row)
+            return rows
+
+        alpha_start, alpha_end, alpha_step = self.settings["aseq"]
+        coarse_step, stall_points = self.settings["adaptive"]
+        polar = adaptive_sweep(solve_points, alpha_start, alpha_end, alpha_step, coarse_step, stall_points)
+        self.send("\n")
+        self.sync(self.timeout)
+        self.cases_run += 1
+        telemetry.record("case", airfoil = airfoil_name, backend = "adaptive", solve_time = time.perf_counter() - start,
+                         points = len(polar))
+
+        if len(polar) == 0:
+            return airfoil_name, None, "no converged points"
+        return airfoil_name, polar, None
+
+    def close(self):
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                try:
+                    self.proc.stdin.write("\n\nQUIT\n")
+                    self.proc.stdin.flush()
+                    self.proc.wait(timeout = 5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self.proc.kill()
+                    self.proc.wait()
+            self.proc = None
+        if self.scratch is not None:
+            shutil.rmtree(self.scratch, ignore_errors = True)
+            self.scratch = None
+
+    def restart(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        self.close()
+        self.start()
+
+#---Pool: size sessions shared by the sweep workers
+#run_cases returns (airfoil_name, polar, error) per case in the order the cases were given
+class XfoilPool:
+    def __init__(self, xfoil_command, settings, size = 4, cases_per_session = 50, timeout = 120, scratch_root = "sweep_scratch"):
+        self.cases_per_session = cases_per_session
+        #A session that fails its health check closes the ones already started before the error goes up
+        self.sessions = []
+        try:
+            for _ in range(size):
+                self.sessions.append(XfoilSession(xfoil_command, settings, scratch_root, timeout))
+        except BaseException:
+            self.close()
+            raise
+        self.idle = queue.Queue()
+        for session in self.sessions:
+            self.idle.put(session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+
+    #---Replace: restarts a session, a failed restart is retried on the session's next case
+    def replace(self, session):
+        try:
+            session.restart()
+        except (TimeoutError, RuntimeError, OSError):
+            session.close()
+
+    def run_case(self, case):
+        session = self.idle.get()
+        try:
+            if not session.healthy():
+                try:
+                    session.restart()
+                except (TimeoutError, RuntimeError, OSError) as e:
+                    session.close()
+                    return case[1], None, f"xfoil session failed to start: {e}"
+            try:
+                result = session.run(case)
+            except (TimeoutError, RuntimeError) as e:
+                #A hung or crashed solver is killed and replaced, the case is reported failed
+                telemetry.record("case", airfoil = case[1], backend = "session", error = str(e))
+                telemetry.count("session_restarts")
+                self.replace(session)
+                return case[1], None, str(e)
+            if session.cases_run >= self.cases_per_session:
+                self.replace(session)
+            return result
+        finally:
+            self.idle.put(session)
+
+    def run_cases(self, cases):
+        with ThreadPoolExecutor(max_workers = len(self.sessions)) as pool:
+            return list(pool.map(self.run_case, cases))